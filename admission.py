@@ -0,0 +1,73 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of being queued"""
+
+    def __init__(self, retry_after):
+        super().__init__("Server overloaded, retry later.")
+        self.retry_after = retry_after
+
+
+class Deadline:
+    """A per-request time budget, started at construction"""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self):
+        return self.clock() >= self.expires_at
+
+
+class AdmissionController:
+    """Bounded concurrency with a capped waiting line.
+
+    At most max_concurrent requests run at once and at most max_queue more
+    wait for a slot. A request arriving when both are full -- or one that
+    waits longer than its timeout -- is shed with Overloaded, so latency
+    stays bounded instead of growing with the backlog.
+    """
+
+    def __init__(self, max_concurrent=2, max_queue=8, retry_after=1):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._slots = threading.Semaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def admit(self, timeout=None):
+        """Wait for a slot; raise Overloaded if the line is full or the wait times out"""
+        with self._lock:
+            if self.pending >= self.max_concurrent + self.max_queue:
+                self.shed += 1
+                raise Overloaded(self.retry_after)
+            self.pending += 1
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.pending -= 1
+                self.shed += 1
+            raise Overloaded(self.retry_after)
+        with self._lock:
+            self.admitted += 1
+
+    def release(self):
+        self._slots.release()
+        with self._lock:
+            self.pending -= 1
+
+    @contextmanager
+    def slot(self, timeout=None):
+        self.admit(timeout)
+        try:
+            yield
+        finally:
+            self.release()
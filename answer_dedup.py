@@ -0,0 +1,116 @@
+import hashlib
+import re
+
+import numpy as np
+
+# Mersenne prime used for the universal hash family behind MinHash
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_answer(text):
+    """Collapse whitespace and case so formatting-only variants hash equal"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def content_hash(text):
+    return hashlib.blake2b(normalize_answer(text).encode('utf-8'), digest_size=16).digest()
+
+
+def shingles(text, size=5):
+    """Hashed word n-grams of an answer, as a uint64 array"""
+    words = normalize_answer(text).split()
+    if len(words) < size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    hashes = {
+        int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=4).digest(), 'little')
+        for gram in grams
+    }
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+class MinHasher:
+    """MinHash signatures whose agreement rate estimates Jaccard similarity"""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    def signature(self, text):
+        values = shingles(text)
+        hashed = (np.outer(values, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return hashed.min(axis=0)
+
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def _near_duplicate_groups(texts, threshold, num_perm, bands):
+    """Cluster texts whose estimated Jaccard similarity reaches threshold.
+
+    Signatures are split into bands and only texts sharing a band bucket are
+    compared, so the cost stays close to linear in the number of texts.
+    Returns a union-find parent list whose roots are the earliest members.
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    signatures = np.array([hasher.signature(text) for text in texts]).reshape(len(texts), num_perm)
+    rows = num_perm // bands
+    parents = list(range(len(texts)))
+
+    for band in range(bands):
+        buckets = {}
+        for i, sig in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(sig.tobytes(), []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                if np.mean(signatures[first] == signatures[other]) < threshold:
+                    continue
+                root_a, root_b = _find(parents, first), _find(parents, other)
+                if root_a != root_b:
+                    parents[max(root_a, root_b)] = min(root_a, root_b)
+    return parents
+
+
+def deduplicate_answers(answers, near_threshold=None, num_perm=64, bands=16):
+    """Map every answer to a canonical answer id.
+
+    Exact duplicates (after whitespace and case normalization) always share
+    an id. With ``near_threshold`` set, answers whose MinHash similarity is
+    at least that value are merged as well. The first occurrence of each
+    group is kept as its canonical text.
+
+    Returns ``(unique_answers, answer_ids)`` where ``answer_ids[i]`` indexes
+    ``unique_answers`` for input answer ``i``.
+    """
+    unique_answers = []
+    first_index = {}
+    exact_ids = np.empty(len(answers), dtype=np.int32)
+    for i, answer in enumerate(answers):
+        key = content_hash(answer)
+        if key not in first_index:
+            first_index[key] = len(unique_answers)
+            unique_answers.append(answer)
+        exact_ids[i] = first_index[key]
+
+    if near_threshold is None or len(unique_answers) < 2:
+        return unique_answers, exact_ids
+
+    parents = _near_duplicate_groups(unique_answers, near_threshold, num_perm, bands)
+    roots = [_find(parents, i) for i in range(len(unique_answers))]
+    remap = {}
+    canonical = []
+    for root in roots:
+        if root not in remap:
+            remap[root] = len(canonical)
+            canonical.append(unique_answers[root])
+    near_ids = np.array([remap[root] for root in roots], dtype=np.int32)
+    return canonical, near_ids[exact_ids]
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+
+from shared_index import atomic_write, attach_array, publish_array
+
+
+def normalize_question(text):
+    """Lowercase, drop punctuation and collapse whitespace.
+
+    "Side effects of chemotherapy?" and "side effects of  chemotherapy"
+    normalize to the same key.
+    """
+    text = text.lower().replace("’", "'")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def question_key(text):
+    """64-bit key of a normalized question"""
+    digest = hashlib.blake2b(normalize_question(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class AnswerTable:
+    """Precomputed answer payloads looked up by normalized question.
+
+    Keys are sorted uint64 hashes of normalized questions; payload ``i`` is
+    the JSON text at ``buffer[offsets[i]:offsets[i + 1]]``. A lookup is one
+    binary search plus one JSON decode. Built offline by
+    scripts/build_answer_table.py and memory-mapped at startup.
+    """
+
+    BUFFER_FILE = "payloads.bin"
+    META_FILE = "meta.json"
+    KEYS_ARRAY = "keys"
+    OFFSETS_ARRAY = "offsets"
+
+    def __init__(self, keys, offsets, buffer, meta=None):
+        self.keys = keys
+        self.offsets = offsets
+        self.buffer = buffer
+        self.meta = meta or {}
+
+    @classmethod
+    def build(cls, payloads, meta=None):
+        """Build from a ``{question: payload}`` mapping; later duplicates win"""
+        by_key = {question_key(question): payload for question, payload in payloads.items()}
+        keys = np.array(sorted(by_key), dtype=np.uint64)
+        encoded = [json.dumps(by_key[int(key)], ensure_ascii=False).encode('utf-8') for key in keys]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+        return cls(keys, offsets, b"".join(encoded), meta)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, question):
+        """Payload stored for the question, or None"""
+        key = np.uint64(question_key(question))
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return json.loads(self.buffer[start:end].decode('utf-8'))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        with atomic_write(os.path.join(directory, self.BUFFER_FILE)) as f:
+            f.write(self.buffer)
+        publish_array(directory, self.KEYS_ARRAY, self.keys)
+        publish_array(directory, self.OFFSETS_ARRAY, self.offsets)
+        with atomic_write(os.path.join(directory, self.META_FILE), 'w') as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Open a saved table memory-mapped, or return None if there is none"""
+        meta_path = os.path.join(directory, cls.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        keys = attach_array(directory, cls.KEYS_ARRAY)
+        offsets = attach_array(directory, cls.OFFSETS_ARRAY)
+        with open(os.path.join(directory, cls.BUFFER_FILE), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                buffer = b""
+            else:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(keys, offsets, buffer, meta)
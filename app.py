@@ -1,18 +1,155 @@
-from flask import Flask, render_template, request, jsonify
+import functools
+import hmac
+from contextlib import contextmanager
+import os
+import json
+import logging
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, make_response, render_template, request, jsonify, send_from_directory, url_for
+from admission import AdmissionController, Deadline, Overloaded
 from data_handler import DataHandler
-from biobert_qa import BioBERT_QA
-from nlp_pipeline import pipeline_pretraitement_requete
+import metrics
+from memory_report import LEDGER, AllocationTracker
+from profiling import ProfileStore, RequestProfiler
+from answer_table import normalize_question
+from qa_service import EXAMPLE_QUERIES, load_pipeline
+from semantic_cache import SemanticAnswerCache
+from single_flight import SingleFlight
+from static_assets import IMMUTABLE, AssetManifest
+from suggest_index import SuggestionIndex
+from tracing import SlowLog, Trace, activate, span, tag
 
-from context_provider import LocalContextRetriever
+# Per-sentence debug output stays off unless LOG_LEVEL=DEBUG
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Initialize BioBERT model for question answering
-context_provider = LocalContextRetriever("data/cancer_qa_dataset.json")
-biobert_model = BioBERT_QA()
+# Fingerprinted, precompressed copies of static/ written by
+# scripts/build_assets.py; until it has run, pages link the plain files
+ASSETS_DIR = os.environ.get("ASSETS_DIR", os.path.join(app.static_folder, "dist"))
+assets = AssetManifest(ASSETS_DIR)
+
+@app.context_processor
+def asset_helpers():
+    def asset_url(filename):
+        hashed = assets.url(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('fingerprinted_asset', filename=hashed)
+    return {'asset_url': asset_url}
+
+# Recent answers keyed by query embedding; a new query this similar to a
+# cached one is answered without running BioBERT
+answer_cache = SemanticAnswerCache(
+    max_entries=int(os.environ.get("ANSWER_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("ANSWER_CACHE_TTL", "3600")),
+    threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.92")),
+)
+
+# Small pool shared by all requests for pipeline stages that can overlap,
+# such as spaCy preprocessing and query encoding
+stage_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("STAGE_THREADS", "4")), thread_name_prefix="stage"
+)
+
+# Initialize retrieval and the BioBERT model for question answering
+qa_pipeline = load_pipeline(answer_cache=answer_cache, executor=stage_executor)
+
+# Typeahead over the knowledge base questions and topics for /api/suggest
+corpus = qa_pipeline.retriever.corpus
+suggestion_index = SuggestionIndex.build(
+    zip(corpus.questions, (corpus.focus_names[focus_id] for focus_id in corpus.focus_ids))
+)
+
+# Largest number of questions accepted by /api/query/batch
+MAX_BATCH_QUERIES = int(os.environ.get("MAX_BATCH_QUERIES", "32"))
+
+# Identical questions arriving while one is being answered wait for that
+# answer instead of running the pipeline again
+inflight_queries = SingleFlight()
+
+# At most MAX_CONCURRENT_QUERIES model requests run at once and at most
+# MAX_QUEUED_QUERIES wait; anything beyond that is shed with a 503
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get("MAX_CONCURRENT_QUERIES", "2")),
+    max_queue=int(os.environ.get("MAX_QUEUED_QUERIES", "8")),
+    retry_after=int(os.environ.get("RETRY_AFTER", "1")),
+)
+
+# Seconds a query may spend, queueing included, before the QA loop returns
+# its best answer so far
+QUERY_DEADLINE = float(os.environ.get("QUERY_DEADLINE", "10"))
 
 # Initialize components
-data_handler = DataHandler()
+with LEDGER.measure("datasets"):
+    data_handler = DataHandler()
+LEDGER.add_bytes("datasets", cancer_types=data_handler.cancer_types_df, treatments=data_handler.treatments_df,
+                 side_effects=data_handler.side_effects_df)
+
+# /debug/memory answers only requests carrying this token in X-Debug-Token;
+# without one the route does not exist
+DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN", "")
+
+# TRACEMALLOC=<frames> traces allocations from here on, so /debug/memory
+# can list what grew since startup. Off by default: it slows every allocation
+TRACEMALLOC_FRAMES = int(os.environ.get("TRACEMALLOC", "0"))
+allocations = AllocationTracker(frames=max(TRACEMALLOC_FRAMES, 1))
+if TRACEMALLOC_FRAMES > 0:
+    allocations.start()
+
+# /api/query requests slower than SLOW_QUERY_MS are written with their
+# stage spans to SLOW_LOG_DIR/slow_queries.<pid>.jsonl, one file per worker
+# rotated at SLOW_LOG_MAX_BYTES; an empty SLOW_LOG_DIR turns the log off
+SLOW_LOG_DIR = os.environ.get("SLOW_LOG_DIR", "logs")
+slow_log = SlowLog(
+    os.path.join(SLOW_LOG_DIR, f"slow_queries.{os.getpid()}.jsonl"),
+    threshold=float(os.environ.get("SLOW_QUERY_MS", "2000")) / 1000,
+    max_bytes=int(os.environ.get("SLOW_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    backups=int(os.environ.get("SLOW_LOG_BACKUPS", "5")),
+) if SLOW_LOG_DIR else None
+
+# Model requests are profiled when they send X-Profile: <DEBUG_TOKEN>, or at
+# random with probability PROFILE_SAMPLE_RATE. Collapsed stacks of the
+# request thread and the stage pool go to PROFILE_DIR, newest
+# PROFILE_MAX_FILES kept. Only token-triggered requests get the file name
+# back in X-Profile-File
+profiler = RequestProfiler(
+    ProfileStore(os.environ.get("PROFILE_DIR", "profiles"), max_files=int(os.environ.get("PROFILE_MAX_FILES", "100"))),
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+    interval=float(os.environ.get("PROFILE_INTERVAL", "0.005")),
+    extra_prefixes=("stage",),
+)
+
+def profiled(view):
+    """Run the view under the stack sampler when this request is to be profiled"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Profile')
+        triggered = bool(token and DEBUG_TOKEN and hmac.compare_digest(token, DEBUG_TOKEN))
+        if not profiler.wanted(triggered):
+            return view(*args, **kwargs)
+        with profiler.profile(request.path) as profile:
+            response = make_response(view(*args, **kwargs))
+        # Only the token holder learns where the profile went; sampled
+        # profiles stay on the server
+        if triggered and profile['file']:
+            response.headers['X-Profile-File'] = profile['file']
+        return response
+    return wrapper
+
+# Counters owned by the serving components, read when /metrics is scraped
+metrics.REGISTRY.callback('qa_requests_shed_total', 'Model requests rejected with 503', 'counter',
+                          lambda: admission.shed)
+metrics.REGISTRY.callback('qa_requests_pending', 'Model requests running or queued', 'gauge',
+                          lambda: admission.pending)
+metrics.REGISTRY.callback('qa_deadline_cut_total', 'Queries whose BioBERT loop was cut by the deadline', 'counter',
+                          lambda: qa_pipeline.deadline_cut)
+metrics.REGISTRY.callback('qa_coalesced_requests_total', 'Queries that waited for an identical in-flight query',
+                          'counter', lambda: inflight_queries.coalesced)
+metrics.REGISTRY.callback('qa_semantic_cache_entries', 'Answers held in the semantic cache', 'gauge',
+                          lambda: len(answer_cache))
 
 @app.route('/')
 def index():
@@ -22,20 +159,8 @@ def index():
     treatment_count = len(data_handler.get_treatments())
     side_effect_count = len(data_handler.get_side_effects())
     
-    # Get example queries for landing page
-    example_queries = [
-        "What are treatment options for breast cancer stage 2?",
-        "Side effects of chemotherapy?",
-        "Diet recommendations during radiation?",
-        "Recovery time after surgery?",
-        "What is immunotherapy for lung cancer?",
-        "How does radiation therapy work?",
-        "Symptoms of ovarian cancer?",
-        "Cost of cancer treatments?"
-    ]
-    
     return render_template('index.html', 
-                         example_queries=example_queries,
+                         example_queries=EXAMPLE_QUERIES,
                          cancer_count=cancer_count,
                          treatment_count=treatment_count,
                          side_effect_count=side_effect_count)
@@ -58,7 +183,47 @@ def chat():
 def statistics():
     return render_template("statistics.html", cancer_count=52, treatment_count=210, side_effect_count=103)
 
+def overloaded(error):
+    response = jsonify({'error': 'Serveur surchargé, veuillez réessayer.'})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+def traced(view):
+    """Run the view under a new trace, returned in X-Trace-Id; slow ones go to the slow log"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        trace = Trace(request.path, request.headers.get('X-Trace-Id'))
+        with activate(trace):
+            response = make_response(view(*args, **kwargs))
+        trace.finish(status=response.status_code)
+        if slow_log is not None:
+            slow_log.record(trace)
+        response.headers['X-Trace-Id'] = trace.trace_id
+        return response
+    return wrapper
+
+@contextmanager
+def model_slot(deadline):
+    """Admission slot for a request's retrieval and BioBERT work.
+
+    Answer table and semantic cache hits never enter it, so only queries
+    that need the models wait for a slot or are shed.
+    """
+    with span("admission"):
+        admission.admit(timeout=deadline.remaining())
+    try:
+        yield
+    finally:
+        admission.release()
+
+def answer_admitted(query):
+    """Answer a query within the per-request deadline, admitting only its model work"""
+    deadline = Deadline(QUERY_DEADLINE)
+    return qa_pipeline.answer(query, deadline, admit=functools.partial(model_slot, deadline))
+
 @app.route('/api/query', methods=['POST'])
+@profiled
+@traced
 def process_query():
     try:
         data = request.get_json()
@@ -67,45 +232,152 @@ def process_query():
         if not query:
             return jsonify({'error': 'Veuillez entrer une question.'}), 400
 
-        nlp_result = pipeline_pretraitement_requete(query)
-        entities = nlp_result['entites']
-        tokens = nlp_result['tokens']
+        tag(query=query)
+
+        payload = inflight_queries.do(normalize_question(query), answer_admitted, query)
+        return jsonify({'success': True, **payload})
+
+    except Overloaded as e:
+        return overloaded(e)
+    except Exception as e:
+        logger.error("❌ Exception occurred: %s", e)
+        tag(error=str(e))
+        return jsonify({'error': f'Erreur lors du traitement : {str(e)}'}), 500
+
+
+def sse_event(event, data):
+    """One server-sent event carrying JSON data"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/query/stream', methods=['POST'])
+def stream_query():
+    """Server-sent events for /api/query, one per pipeline stage.
+
+    The question comes in the JSON body, as for /api/query, so it never
+    appears in URLs and access logs. The client sees the detected entities
+    and tokens, then the retrieved context, then the answer. When it
+    disconnects, the next write fails, the generator is closed and no
+    further BioBERT passes run. A query that needs the models and is shed
+    gets an 'error' event with retry_after, as the stream has started.
+    """
+    data = request.get_json(silent=True)
+    query = str(data.get('query') or '').strip() if isinstance(data, dict) else ''
+    if not query:
+        return jsonify({'error': 'Veuillez entrer une question.'}), 400
 
-        print(f"\n🔎 Query received: {query}")
+    deadline = Deadline(QUERY_DEADLINE)
 
-        # Get best matching context answer from JSON
-        answer_blocks = context_provider.get_best_answer_chunks(query)
-        print("🔍 Top context block(s):")
-        for block in answer_blocks:
-            print(block[:200], "...")
+    def events():
+        try:
+            for event, data in qa_pipeline.stream(query, deadline, admit=functools.partial(model_slot, deadline)):
+                if event == 'answer':
+                    data = {'success': True, **data}
+                yield sse_event(event, data)
+        except Overloaded as e:
+            yield sse_event('error', {'error': 'Serveur surchargé, veuillez réessayer.',
+                                      'retry_after': e.retry_after})
+        except Exception as e:
+            logger.error("❌ Exception occurred: %s", e)
+            yield sse_event('error', {'error': f'Erreur lors du traitement : {str(e)}'})
 
-        candidate_sentences = []
-        for block in answer_blocks:
-            candidate_sentences.extend(context_provider.split_into_sentences(block))
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-        print(f"🧠 Extracted {len(candidate_sentences)} candidate sentences.")
-        final_answer = "No clear answer found."
+@app.route('/api/suggest')
+def suggest():
+    """Known questions and topics matching what the user has typed so far"""
+    limit = request.args.get('limit', 8, type=int)
+    response = jsonify({'suggestions': suggestion_index.suggest(request.args.get('q', ''), limit)})
+    # Same knowledge base, same suggestions: let the browser reuse them while typing
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response
 
-        for sentence in candidate_sentences:
-            print(f"\n🧩 Sentence: {sentence}")
-            answer = biobert_model.answer_question(query, context=sentence)
-            print(f"🤖 Answer: {answer}")
-            if answer and isinstance(answer, str) and len(answer.strip()) > 5 and "no clear answer" not in answer.lower():
-                final_answer = answer
-                break
+@app.route('/assets/<path:filename>')
+def fingerprinted_asset(filename):
+    """A built static file, precompressed when the client accepts it"""
+    variant = assets.variant(filename, request.headers.get('Accept-Encoding'))
+    if variant is None:
+        return not_found(None)
+    name, encoding = variant
+    response = send_from_directory(ASSETS_DIR, name, mimetype=mimetypes.guess_type(filename)[0],
+                                   conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    # The name changes with the content, so browsers never need to revalidate
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
 
+@app.route('/api/query/batch', methods=['POST'])
+@profiled
+def process_query_batch():
+    """Answer a list of questions; results come back in the same order"""
+    try:
+        data = request.get_json()
+        queries = data.get('queries') if isinstance(data, dict) else None
+
+        if not isinstance(queries, list) or not queries:
+            return jsonify({'error': 'Veuillez fournir une liste de questions.'}), 400
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({'error': f'Au plus {MAX_BATCH_QUERIES} questions par lot.'}), 400
+
+        results = [{'error': 'Veuillez entrer une question.'}] * len(queries)
+        valid = [i for i, query in enumerate(queries) if isinstance(query, str) and query.strip()]
+        answers = []
+        if valid:
+            deadline = Deadline(QUERY_DEADLINE)
+            answers = qa_pipeline.answer_batch([queries[i].strip() for i in valid], deadline,
+                                               admit=functools.partial(model_slot, deadline))
+        for i, payload in zip(valid, answers):
+            results[i] = payload
         return jsonify({
             'success': True,
-            'response': final_answer,
-            'entities': entities,
-            'tokens': tokens,
-            'intent': 'biobert_json_match'
+            'results': [{'success': 'error' not in payload, **payload} for payload in results]
         })
 
+    except Overloaded as e:
+        return overloaded(e)
     except Exception as e:
-        print(f"❌ Exception occurred: {str(e)}")
+        logger.error("❌ Exception occurred: %s", e)
         return jsonify({'error': f'Erreur lors du traitement : {str(e)}'}), 500
 
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage latencies and serving counters in Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/health')
+def health():
+    """Liveness check with load counters; touches no model"""
+    return jsonify({
+        'status': 'ok',
+        'pending_queries': admission.pending,
+        'shed_queries': admission.shed,
+        'deadline_cut_queries': qa_pipeline.deadline_cut
+    })
+
+@app.route('/debug/memory')
+def debug_memory():
+    """Startup memory per component and, when tracing, allocation growth.
+
+    ?top=N limits the allocation sites listed; ?reset=1 takes a new
+    baseline after reporting.
+    """
+    if not DEBUG_TOKEN:
+        return not_found(None)
+    if not hmac.compare_digest(request.headers.get('X-Debug-Token', ''), DEBUG_TOKEN):
+        return jsonify({'error': 'Forbidden'}), 403
+
+    report = LEDGER.report()
+    report['semantic_cache_entries'] = len(answer_cache)
+    report['allocations'] = None
+    if allocations.active:
+        report['allocations'] = allocations.diff(limit=request.args.get('top', 20, type=int))
+        if request.args.get('reset') == '1':
+            allocations.reset()
+    return jsonify(report)
+
     
 @app.route('/api/stats')
 def get_stats():
@@ -0,0 +1,19 @@
+"""ASGI entry point serving the Flask app.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+Model routes run on a small bounded pool of inference threads; pages,
+stats and health checks run on their own pool and stay responsive while
+inference is saturated.
+"""
+import os
+
+from app import app
+from wsgi_bridge import ThreadedWSGIApp
+
+application = ThreadedWSGIApp(
+    app,
+    heavy_prefixes=('/api/query',),
+    inference_threads=int(os.environ.get("INFERENCE_THREADS", "2")),
+    web_threads=int(os.environ.get("WEB_THREADS", "8")),
+)
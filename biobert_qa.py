@@ -3,6 +3,30 @@ from transformers import AutoTokenizer, AutoModelForQuestionAnswering
 import torch
 import re
 import os
+import json
+import logging
+
+from tracing import annotate
+
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_WEIGHTS = "model.safetensors"
+SAFETENSORS_INDEX = "model.safetensors.index.json"
+
+# BERT's position embeddings stop here; both answer paths cut the context
+# (never the question) to fit, so they see the same tokens
+MAX_LENGTH = 512
+
+
+def safetensors_files(model_path):
+    """The safetensors weight files of a saved model, [] when it has none"""
+    index_path = os.path.join(model_path, SAFETENSORS_INDEX)
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            shards = set(json.load(f)["weight_map"].values())
+        return sorted(os.path.join(model_path, shard) for shard in shards)
+    single = os.path.join(model_path, SAFETENSORS_WEIGHTS)
+    return [single] if os.path.exists(single) else []
 
 def clean_context(text):
     # Remove excessive whitespace and newlines
@@ -23,12 +47,23 @@ class BioBERT_QA:
         self.model_path = os.path.join(script_dir, "model", "biobert_v1.1_pubmed_squad_v2_local")
         self.device = torch.device("cpu")  # or "cuda" if using GPU
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
-        self.model = AutoModelForQuestionAnswering.from_pretrained(self.model_path)
+        # safetensors weights are memory-mapped rather than unpickled: the
+        # model's tensors point into the page cache, which loads at page
+        # fault speed and is shared by every worker on the host
+        self.weight_files = safetensors_files(self.model_path)
+        if not self.weight_files:
+            logger.warning("⚠️ No safetensors weights in %s; run scripts/saveModel.py to convert them.",
+                           self.model_path)
+        self.model = AutoModelForQuestionAnswering.from_pretrained(
+            self.model_path, use_safetensors=True if self.weight_files else None
+        )
         self.model.to(self.device)
 
     def answer_question(self, question, context):
-        inputs = self.tokenizer.encode_plus(question, context, add_special_tokens=True, return_tensors="pt")
+        inputs = self.tokenizer(question, context, add_special_tokens=True, truncation="only_second",
+                                max_length=MAX_LENGTH, return_tensors="pt")
         input_ids = inputs["input_ids"].tolist()[0]
+        annotate(input_tokens=len(input_ids))
         inputs = {k: v.to(self.device) for k, v in inputs.items()}
         with torch.no_grad():
             outputs = self.model(**inputs)
@@ -40,3 +75,30 @@ class BioBERT_QA:
         if not answer.strip() or "[CLS]" in answer:
             return "No clear answer found in the given context."
         return answer
+
+    def answer_questions(self, pairs, batch_size=16):
+        """Answer (question, context) pairs in padded batches, in order"""
+        answers = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            inputs = self.tokenizer(
+                [question for question, _ in batch], [context for _, context in batch],
+                add_special_tokens=True, padding=True, truncation="only_second", max_length=MAX_LENGTH,
+                return_tensors="pt"
+            )
+            input_ids = inputs["input_ids"].tolist()
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            with torch.no_grad():
+                outputs = self.model(**inputs)
+            # Padding positions must never be picked as span boundaries
+            padding = inputs["attention_mask"] == 0
+            starts = outputs.start_logits.masked_fill(padding, float("-inf")).argmax(dim=1).tolist()
+            ends = outputs.end_logits.masked_fill(padding, float("-inf")).argmax(dim=1).tolist()
+            for ids, first, last in zip(input_ids, starts, ends):
+                answer = self.tokenizer.convert_tokens_to_string(
+                    self.tokenizer.convert_ids_to_tokens(ids[first:last + 1])
+                )
+                if not answer.strip() or "[CLS]" in answer:
+                    answer = "No clear answer found in the given context."
+                answers.append(answer)
+        return answers
@@ -0,0 +1,115 @@
+import json
+import os
+from collections import Counter
+
+import numpy as np
+
+from shared_index import atomic_write, attach_array, publish_array
+
+
+class BM25Index:
+    """Okapi BM25 over token lists, stored as compact postings arrays.
+
+    Postings are kept in CSR form: the documents containing term ``t`` are
+    ``docs[offsets[t]:offsets[t + 1]]`` (sorted, int32) with matching term
+    frequencies in ``tfs`` (uint16). Scoring a query touches only the
+    postings of its own terms.
+    """
+
+    ARRAYS = ("offsets", "docs", "tfs", "doc_lengths", "idf")
+
+    def __init__(self, vocab, offsets, docs, tfs, doc_lengths, idf, k1=1.5, b=0.75):
+        self.vocab = vocab
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.idf = idf
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(cls, doc_term_counts, **kwargs):
+        """Build from one ``Counter`` of term frequencies per document"""
+        vocab = sorted({term for counts in doc_term_counts for term in counts})
+        term_ids = {term: i for i, term in enumerate(vocab)}
+        triples = [
+            (term_ids[term], doc, count)
+            for doc, counts in enumerate(doc_term_counts)
+            for term, count in counts.items()
+        ]
+        terms = np.array([t[0] for t in triples], dtype=np.int64)
+        docs = np.array([t[1] for t in triples], dtype=np.int32)
+        tfs = np.minimum(np.array([t[2] for t in triples], dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)
+        order = np.lexsort((docs, terms))
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocab)), out=offsets[1:])
+        doc_lengths = np.array([sum(counts.values()) for counts in doc_term_counts], dtype=np.float32)
+        doc_freq = np.diff(offsets).astype(np.float32)
+        n = len(doc_term_counts)
+        idf = np.log1p((n - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        return cls(vocab, offsets, docs, tfs, doc_lengths, idf, **kwargs)
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def scores(self, query_tokens):
+        """BM25 score of every document (zero where no query term occurs)"""
+        scores = np.zeros(len(self), dtype=np.float32)
+        if not self.avg_length:
+            return scores
+        for term in set(query_tokens):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.docs[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query_tokens, k, rows=None):
+        """Return ``(doc_indices, scores)`` of the k best matching documents, best first"""
+        scores = self.scores(query_tokens)
+        candidates = np.flatnonzero(scores) if rows is None else np.asarray(rows)[scores[rows] > 0]
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = np.argsort(-scores[candidates], kind='stable')
+        return candidates[order], scores[candidates[order]]
+
+    def save(self, directory, name):
+        for array_name in self.ARRAYS:
+            publish_array(directory, f"{name}-{array_name}", getattr(self, array_name))
+        with atomic_write(os.path.join(directory, f"{name}-vocab.json"), 'w') as f:
+            json.dump(self.vocab, f)
+
+    @classmethod
+    def load(cls, directory, name, **kwargs):
+        """Attach a saved index (postings memory-mapped), or None if missing"""
+        vocab_path = os.path.join(directory, f"{name}-vocab.json")
+        if not os.path.exists(vocab_path):
+            return None
+        arrays = [attach_array(directory, f"{name}-{array_name}") for array_name in cls.ARRAYS]
+        if any(array is None for array in arrays):
+            return None
+        with open(vocab_path, 'r', encoding='utf-8') as f:
+            vocab = json.load(f)
+        return cls(vocab, *arrays, **kwargs)
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Merge several best-first rankings; items ranked high anywhere rise to the top"""
+    fused = Counter()
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            fused[item] += 1.0 / (k + rank + 1)
+    return [item for item, _ in sorted(fused.items(), key=lambda pair: (-pair[1], pair[0]))]
@@ -1,26 +1,284 @@
+import csv
 import json
 import re
+import warnings
+from collections import Counter
 import nltk
+import numpy as np
+import torch
 from nltk.tokenize import sent_tokenize
 from sentence_transformers import SentenceTransformer, util
 
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from corpus_store import CorpusStore, source_signature
+from shared_index import attach_array, publish_array, spill_array
+from vector_index import QuantizedEmbeddings, normalize_rows
+
+# Words shared by many focus names that say nothing about which disease a
+# query is about; they never route a query on their own
+GENERIC_FOCUS_TERMS = {
+    "adult", "childhood", "cancer", "tumor", "neoplasm", "carcinoma", "primary", "other",
+    "and", "of", "with", "the", "in", "including", "cell", "unclassifiable",
+}
+
+# Generic words that still say a query is about a disease, not a body part
+DISEASE_WORDS = {"cancer", "tumor", "tumour", "neoplasm", "carcinoma", "malignancy"}
+
+# Focus name terms that name a disease by themselves (lymphoma, leukemia,
+# sarcoma, histiocytosis, ...) rather than a body part or a common word
+DISEASE_TERM = re.compile(r"(oma|emia|osis)$")
+
+
+def focus_words(text):
+    """Lowercased words of a focus name or query, singularized"""
+    words = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(word) > 4 and word.endswith("s"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def focus_terms(text):
+    """Content words of a focus name or query: its words minus the generic ones"""
+    return focus_words(text) - GENERIC_FOCUS_TERMS
+
+
+def readonly_tensor(array):
+    """Zero-copy torch view of a (possibly read-only, memory-mapped) array"""
+    with warnings.catch_warnings():
+        # torch warns that it cannot protect non-writable memory; nothing
+        # in the retriever writes to the embedding matrix
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.from_numpy(array)
+
 class LocalContextRetriever:
-    def __init__(self, json_path):
+    def __init__(self, json_path, corpus_dir=None, near_dedup_threshold=None,
+                 embedding_precision="float32", rerank_k=32, tokenizer=None,
+                 sparse_prune_ratio=2.0, sparse_prune_k=16):
         nltk.download('punkt', quiet=True)  # ✅ download once at startup
 
+        # Questions and answers live in one packed UTF-8 buffer; when
+        # corpus_dir is given it is written once and memory-mapped afterwards.
+        # Duplicate answers are collapsed to one canonical answer id.
+        self.near_dedup_threshold = near_dedup_threshold
+        self.corpus = self._load_corpus(json_path, corpus_dir)
+        self.questions = self.corpus.questions
+        self.answers = self.corpus.answers
+        self.answer_ids = self.corpus.answer_ids
+        self._sentence_cache = {}
+
+        # Row indices of each focus (disease) partition, and the terms that
+        # route a query to it
+        self.partitions = [
+            np.flatnonzero(np.asarray(self.corpus.focus_ids) == focus_id)
+            for focus_id in range(len(self.corpus.focus_names))
+        ]
+        self.partition_terms = [focus_terms(name) for name in self.corpus.focus_names]
+        self.partition_disease_words = [
+            bool(focus_words(name) & DISEASE_WORDS) for name in self.corpus.focus_names
+        ]
+
+        # With corpus_dir, the normalized embedding matrix (and quantized
+        # codes) are published next to the corpus store by whichever process
+        # builds them first -- normally scripts/build_index.py -- and every
+        # other worker attaches to them read-only without re-encoding
         self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        with open(json_path, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
-
-        self.questions = [item['question'] for item in self.data]
-        self.answers = [item['answer'] for item in self.data]
-        self.embeddings = self.model.encode(self.questions, convert_to_tensor=True)
-
-    def get_best_answer_chunks(self, query, top_k=1):
-        query_embedding = self.model.encode(query, convert_to_tensor=True)
-        similarities = util.pytorch_cos_sim(query_embedding, self.embeddings)[0]
-        best_indices = similarities.topk(k=top_k).indices.tolist()
-        return [self.answers[i] for i in best_indices]
+        full = self._load_embeddings(corpus_dir)
+        if embedding_precision == "float32":
+            self.index = None
+            self.embeddings = readonly_tensor(full)
+        else:
+            # First pass scans float16/int8 codes, the only resident part;
+            # the top rerank_k hits are re-scored against the normalized
+            # float32 rows, read from a file mapping a few rows per query
+            codes, scales = self._load_codes(corpus_dir, full, embedding_precision)
+            if not isinstance(full, np.memmap):
+                full = spill_array(full)
+            self.embeddings = full
+            self.index = QuantizedEmbeddings(full, embedding_precision, rerank_k, codes=codes, scales=scales)
+
+        # Optional sparse side: BM25 over lemmatized question + answer
+        # tokens. tokenizer maps a list of texts to a list of token lists
+        # (see nlp_pipeline.lemmatisation_corpus).
+        self.sparse_prune_ratio = sparse_prune_ratio
+        self.sparse_prune_k = sparse_prune_k
+        self.bm25 = self._load_bm25(corpus_dir, tokenizer) if tokenizer else None
+
+    def _load_corpus(self, json_path, corpus_dir):
+        signature = source_signature(json_path)
+        signature['near_dedup_threshold'] = self.near_dedup_threshold
+        if corpus_dir and CorpusStore.exists(corpus_dir):
+            store = CorpusStore.load(corpus_dir)
+            if store.meta == signature:
+                return store
+
+        store = CorpusStore.from_records(
+            self._read_records(json_path), meta=signature, near_threshold=self.near_dedup_threshold
+        )
+        if corpus_dir:
+            store.save(corpus_dir)
+            store = CorpusStore.load(corpus_dir)
+        return store
+
+    def _load_embeddings(self, corpus_dir):
+        """Normalized float32 question embeddings for the current corpus version"""
+        name = f"embeddings-{self.corpus.version}"
+        full = attach_array(corpus_dir, name) if corpus_dir else None
+        if full is None:
+            full = normalize_rows(self.model.encode(list(self.questions), convert_to_numpy=True))
+            if corpus_dir:
+                publish_array(corpus_dir, name, full)
+                full = attach_array(corpus_dir, name)
+        return full
+
+    def _load_codes(self, corpus_dir, full, precision):
+        """Quantized codes (and int8 scales) of the embeddings, shared like the matrix"""
+        name = f"embeddings-{self.corpus.version}-{precision}"
+        codes = attach_array(corpus_dir, name) if corpus_dir else None
+        scales = attach_array(corpus_dir, name + "-scales") if corpus_dir else None
+        if codes is None or (precision == "int8" and scales is None):
+            codes, scales = QuantizedEmbeddings.quantize(full, precision)
+            if corpus_dir:
+                publish_array(corpus_dir, name, codes)
+                if scales is not None:
+                    publish_array(corpus_dir, name + "-scales", scales)
+        return codes, scales
+
+    def _load_bm25(self, corpus_dir, tokenizer):
+        name = f"bm25-{self.corpus.version}-{getattr(tokenizer, '__name__', 'tokens')}"
+        index = BM25Index.load(corpus_dir, name) if corpus_dir else None
+        if index is not None:
+            return index
+
+        # Each canonical answer is tokenized once, however many questions share it
+        texts = list(self.questions) + list(self.corpus.unique_answers)
+        tokens = tokenizer(texts)
+        answer_counts = [Counter(answer_tokens) for answer_tokens in tokens[len(self.questions):]]
+        doc_counts = [
+            Counter(question_tokens) + answer_counts[int(answer_id)]
+            for question_tokens, answer_id in zip(tokens[:len(self.questions)], self.answer_ids)
+        ]
+        index = BM25Index.build(doc_counts)
+        if corpus_dir:
+            index.save(corpus_dir, name)
+        return index
+
+    @staticmethod
+    def _read_records(path):
+        """Read question/answer records from the JSON or CSV knowledge base"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            if path.endswith('.csv'):
+                return list(csv.DictReader(f))
+            return json.load(f)
+
+    def route(self, query, entities=None):
+        """Row indices of the focus partitions a query names, or None.
+
+        Only a confident match routes: the query (plus any detected entity
+        texts) names a disease term of a focus name, such as "leukemia", or
+        contains every content term of one -- and "cancer" or "tumor" too
+        when the name has it, so "skin rash" does not pick Skin Cancer.
+        Words a query only shares by chance ("oral chemotherapy", "chronic
+        pain") leave it unrouted. When routed, only the partitions with the
+        most shared terms are kept. None means the caller should search the
+        whole corpus.
+        """
+        text = " ".join([query] + [entity['text'] for entity in entities or []])
+        words = focus_words(text)
+        terms = words - GENERIC_FOCUS_TERMS
+        if not terms:
+            return None
+        names_disease = bool(words & DISEASE_WORDS)
+        overlaps = []
+        confident = False
+        for partition, needs_disease_word in zip(self.partition_terms, self.partition_disease_words):
+            shared = terms & partition
+            overlaps.append(len(shared))
+            if not shared:
+                continue
+            if any(DISEASE_TERM.search(term) for term in shared):
+                confident = True
+            elif shared == partition and (names_disease or not needs_disease_word):
+                confident = True
+        if not confident:
+            return None
+        best = max(overlaps)
+        return np.concatenate([
+            rows for rows, overlap in zip(self.partitions, overlaps) if overlap == best
+        ])
+
+    def encode_query(self, query):
+        """Normalized float32 embedding of a query"""
+        return normalize_rows(self.model.encode(query, convert_to_numpy=True))
+
+    def encode_queries(self, queries, batch_size=32):
+        """Normalized float32 embeddings of several queries, one row each"""
+        return normalize_rows(self.model.encode(list(queries), batch_size=batch_size, convert_to_numpy=True))
+
+    def _rank_rows(self, query_embedding, rows, k):
+        """Row indices of the k best matches among rows (all rows when None)"""
+        if self.index is not None:
+            return self.index.search(query_embedding, k, rows)[0].tolist()
+
+        if rows is None:
+            candidates = self.embeddings
+        else:
+            candidates = self.embeddings[torch.from_numpy(rows)]
+        similarities = util.pytorch_cos_sim(torch.from_numpy(query_embedding), candidates)[0]
+        best = similarities.topk(k=k).indices.tolist()
+        return best if rows is None else [int(rows[i]) for i in best]
+
+    def _rank_hybrid(self, query_embedding, tokens, rows, k):
+        """Fuse BM25 and dense rankings with reciprocal-rank fusion.
+
+        When one BM25 hit clearly beats the runner-up (by sparse_prune_ratio)
+        the dense side only scores the top sparse_prune_k sparse hits.
+        """
+        sparse_rows, sparse_scores = self.bm25.search(tokens, max(k, self.sparse_prune_k), rows)
+        if len(sparse_rows) == 0:
+            return self._rank_rows(query_embedding, rows, k)
+
+        confident = len(sparse_scores) == 1 or sparse_scores[0] >= self.sparse_prune_ratio * sparse_scores[1]
+        dense_rows = np.sort(sparse_rows[:self.sparse_prune_k]) if confident else rows
+        dense_k = min(k, len(self.questions) if dense_rows is None else len(dense_rows))
+        dense_ranking = self._rank_rows(query_embedding, dense_rows, dense_k)
+        return reciprocal_rank_fusion([dense_ranking, sparse_rows[:k].tolist()])[:k]
+
+    def get_best_answer_ids(self, query, top_k=1, entities=None, tokens=None, query_embedding=None):
+        """Return up to top_k distinct canonical answer ids, best match first.
+
+        tokens are the query's lemmatized tokens; when given (and a BM25
+        index was built) dense and sparse rankings are fused. Pass
+        query_embedding when the query was already encoded.
+        """
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
+        rows = self.route(query, entities)
+        # Several questions can share one answer, so look a little deeper
+        # than top_k to still return top_k distinct answers
+        k = min(top_k * 4, len(self.questions) if rows is None else len(rows))
+        if self.bm25 is not None and tokens:
+            ranked = self._rank_hybrid(query_embedding, tokens, rows, k)
+        else:
+            ranked = self._rank_rows(query_embedding, rows, k)
+        answer_ids = []
+        for i in ranked:
+            answer_id = int(self.answer_ids[i])
+            if answer_id not in answer_ids:
+                answer_ids.append(answer_id)
+            if len(answer_ids) == top_k:
+                break
+        return answer_ids
+
+    def get_best_answer_chunks(self, query, top_k=1, entities=None, tokens=None):
+        return [self.corpus.unique_answer(i) for i in self.get_best_answer_ids(query, top_k, entities, tokens)]
+
+    def sentences_for(self, answer_id):
+        """Candidate sentences of a canonical answer, split once and cached"""
+        if answer_id not in self._sentence_cache:
+            self._sentence_cache[answer_id] = self.split_into_sentences(self.corpus.unique_answer(answer_id))
+        return self._sentence_cache[answer_id]
 
     def split_into_sentences(self, text):
         cleaned = re.sub(r'\n+', ' ', text)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import mmap
+import os
+from collections.abc import Sequence
+
+import numpy as np
+
+from answer_dedup import deduplicate_answers
+from shared_index import array_path, atomic_write, attach_array, publish_array
+
+
+class TextView(Sequence):
+    """Read-only list-like view over one section of a CorpusStore"""
+
+    def __init__(self, store, start, length, ids=None):
+        self._store = store
+        self._start = start
+        self._length = length
+        self._ids = ids
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("corpus index out of range")
+        if self._ids is not None:
+            index = self._ids[index]
+        return self._store.text(self._start + index)
+
+
+class CorpusStore:
+    """Question and answer text packed into one contiguous UTF-8 buffer.
+
+    Texts are laid out as all questions followed by the unique answers.
+    Entry ``i`` spans ``buffer[offsets[i]:offsets[i + 1]]`` and is only
+    decoded when it is accessed. ``answer_ids[q]`` gives the canonical answer
+    id of question ``q``; duplicate answers are stored once. ``focus_ids[q]``
+    indexes ``focus_names``, the disease each row covers.
+
+    A store saved with :meth:`save` can be reopened with :meth:`load`, which
+    memory-maps the buffer and index arrays so forked workers share the same
+    pages instead of holding private copies.
+    """
+
+    BUFFER_FILE = "text.bin"
+    OFFSETS_ARRAY = "offsets"
+    ANSWER_IDS_ARRAY = "answer_ids"
+    FOCUS_IDS_ARRAY = "focus_ids"
+    FOCUS_NAMES_FILE = "focus.json"
+    META_FILE = "meta.json"
+
+    def __init__(self, buffer, offsets, answer_ids, focus_ids, focus_names, meta=None):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.answer_ids = answer_ids
+        self.focus_ids = focus_ids
+        self.focus_names = focus_names
+        self.meta = meta or {}
+        self.size = len(answer_ids)
+        self.unique_answer_count = len(offsets) - 1 - self.size
+        self.questions = TextView(self, 0, self.size)
+        self.answers = TextView(self, self.size, self.size, ids=answer_ids)
+        self.unique_answers = TextView(self, self.size, self.unique_answer_count)
+
+    @classmethod
+    def from_records(cls, records, meta=None, near_threshold=None):
+        """Build an in-memory store from ``{"question", "answer"}`` records.
+
+        Answers are deduplicated on the way in (see
+        :func:`answer_dedup.deduplicate_answers`). Records may carry a
+        ``focus`` field; rows without one share the empty focus name.
+        """
+        questions = [item['question'] for item in records]
+        unique_answers, answer_ids = deduplicate_answers(
+            [item['answer'] for item in records], near_threshold=near_threshold
+        )
+        focus_names = []
+        focus_index = {}
+        focus_ids = np.empty(len(records), dtype=np.int32)
+        for i, item in enumerate(records):
+            focus = (item.get('focus') or '').strip()
+            if focus not in focus_index:
+                focus_index[focus] = len(focus_names)
+                focus_names.append(focus)
+            focus_ids[i] = focus_index[focus]
+
+        encoded = [text.encode('utf-8') for text in questions + unique_answers]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+        return cls(b"".join(encoded), offsets, answer_ids, focus_ids, focus_names, meta)
+
+    def text(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.buffer[start:end].decode('utf-8')
+
+    def unique_answer(self, answer_id):
+        return self.text(self.size + answer_id)
+
+    @property
+    def version(self):
+        """Short digest identifying this build of the knowledge base"""
+        return hashlib.blake2b(json.dumps(self.meta, sort_keys=True).encode('utf-8'), digest_size=8).hexdigest()
+
+    @property
+    def nbytes(self):
+        """Bytes held by the text buffer and the index arrays"""
+        return len(self.buffer) + self.offsets.nbytes + self.answer_ids.nbytes + self.focus_ids.nbytes
+
+    def __len__(self):
+        return self.size
+
+    def save(self, directory):
+        """Write the store; meta.json goes last so a reader never sees a half-written store as current"""
+        os.makedirs(directory, exist_ok=True)
+        with atomic_write(os.path.join(directory, self.BUFFER_FILE)) as f:
+            f.write(self.buffer)
+        publish_array(directory, self.OFFSETS_ARRAY, self.offsets)
+        publish_array(directory, self.ANSWER_IDS_ARRAY, self.answer_ids)
+        publish_array(directory, self.FOCUS_IDS_ARRAY, self.focus_ids)
+        with atomic_write(os.path.join(directory, self.FOCUS_NAMES_FILE), 'w') as f:
+            json.dump(self.focus_names, f)
+        with atomic_write(os.path.join(directory, self.META_FILE), 'w') as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Open a saved store with the buffer and offsets memory-mapped read-only"""
+        with open(os.path.join(directory, cls.META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        offsets = attach_array(directory, cls.OFFSETS_ARRAY)
+        answer_ids = attach_array(directory, cls.ANSWER_IDS_ARRAY)
+        focus_ids = attach_array(directory, cls.FOCUS_IDS_ARRAY)
+        with open(os.path.join(directory, cls.FOCUS_NAMES_FILE), 'r', encoding='utf-8') as f:
+            focus_names = json.load(f)
+        with open(os.path.join(directory, cls.BUFFER_FILE), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                buffer = b""
+            else:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, offsets, answer_ids, focus_ids, focus_names, meta)
+
+    @classmethod
+    def exists(cls, directory):
+        paths = [os.path.join(directory, name) for name in (cls.BUFFER_FILE, cls.FOCUS_NAMES_FILE, cls.META_FILE)]
+        paths += [array_path(directory, name) for name in (cls.OFFSETS_ARRAY, cls.ANSWER_IDS_ARRAY, cls.FOCUS_IDS_ARRAY)]
+        return all(os.path.exists(path) for path in paths)
+
+
+def source_signature(path):
+    """Cheap fingerprint of a source file used to detect a stale saved store"""
+    stat = os.stat(path)
+    return {'source': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
@@ -0,0 +1,22 @@
+# gunicorn -c gunicorn.conf.py app:app
+import os
+import subprocess
+import sys
+
+bind = "0.0.0.0:5000"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# BioBERT requests are slow; give them time before the worker is recycled
+timeout = 120
+
+
+def on_starting(server):
+    """Build the shared retrieval index and the static assets in separate processes.
+
+    Runs once in the master before any worker forks, so every worker only
+    attaches to the memory-mapped files in data/corpus/ and adding workers
+    adds almost no retrieval memory. Workers read static/dist/manifest.json
+    to link the fingerprinted assets.
+    """
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    subprocess.check_call([sys.executable, os.path.join(project_root, "scripts", "build_index.py")])
+    subprocess.check_call([sys.executable, os.path.join(project_root, "scripts", "build_assets.py")])
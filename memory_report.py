@@ -0,0 +1,186 @@
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def rss_bytes():
+    """Current resident set size; the peak where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def object_bytes(obj):
+    """Bytes held by a model, tensor, array or DataFrame (0 when unknown)"""
+    if obj is None:
+        return 0
+    if isinstance(obj, int):
+        return obj
+    if hasattr(obj, 'parameters') and hasattr(obj, 'buffers'):
+        # torch.nn.Module: weights and buffers such as position ids
+        return sum(tensor.element_size() * tensor.nelement()
+                   for tensor in list(obj.parameters()) + list(obj.buffers()))
+    if hasattr(obj, 'element_size') and hasattr(obj, 'nelement'):
+        return obj.element_size() * obj.nelement()
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'columns'):
+        return int(obj.memory_usage(deep=True).sum())
+    return int(getattr(obj, 'nbytes', 0))
+
+
+def file_mappings(paths):
+    """Address ranges where this process maps any of the files (Linux only; None elsewhere)"""
+    wanted = {os.path.realpath(path) for path in paths}
+    try:
+        with open('/proc/self/maps') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    ranges = []
+    for line in lines:
+        parts = line.split(maxsplit=5)
+        if len(parts) == 6 and parts[5].strip() in wanted:
+            low, high = parts[0].split('-')
+            ranges.append((int(low, 16), int(high, 16)))
+    return ranges
+
+
+def file_backed_bytes(module, paths):
+    """Bytes of a torch module's tensors that live in memory-mapped files.
+
+    Such pages come from the OS page cache and are shared by every process
+    mapping the same file. None when mappings cannot be inspected.
+    """
+    ranges = file_mappings(paths)
+    if ranges is None:
+        return None
+    total = 0
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        address = tensor.data_ptr()
+        if any(low <= address < high for low, high in ranges):
+            total += tensor.element_size() * tensor.nelement()
+    return total
+
+
+class MemoryLedger:
+    """RSS growth and sizes of the large objects of each loaded component.
+
+    measure(name) wraps the loading of one component and records how much
+    the process RSS grew meanwhile; add_bytes(name, ...) records the sizes
+    of the tensors and tables it ended up holding. Components are expected
+    to load one at a time, as they do at startup.
+    """
+
+    def __init__(self):
+        self.components = {}
+        self._lock = threading.Lock()
+
+    def _component(self, name):
+        return self.components.setdefault(name, {'rss_delta_bytes': 0, 'load_seconds': 0.0, 'bytes': {}})
+
+    @contextmanager
+    def measure(self, name):
+        before = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                component = self._component(name)
+                component['rss_delta_bytes'] += rss_bytes() - before
+                component['load_seconds'] += time.perf_counter() - start
+
+    def add_bytes(self, name, **objects):
+        with self._lock:
+            component = self._component(name)
+            component['bytes'].update({key: object_bytes(obj) for key, obj in objects.items()})
+
+    def report(self):
+        with self._lock:
+            components = {name: {**component, 'bytes': dict(component['bytes'])}
+                          for name, component in self.components.items()}
+        return {
+            'rss_bytes': rss_bytes(),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'accounted_rss_bytes': sum(component['rss_delta_bytes'] for component in components.values()),
+            'components': components,
+        }
+
+
+# Filled in as the NLP models, retriever, BioBERT and datasets load
+LEDGER = MemoryLedger()
+
+
+class AllocationTracker:
+    """Opt-in tracemalloc diff against a baseline snapshot.
+
+    Tracing slows every allocation down, so it only starts when asked to
+    (normally once startup is over, to watch steady-state growth).
+    """
+
+    # Allocations made by the tracing and import machinery itself
+    IGNORED = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>')
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self.baseline = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.baseline is not None and tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.reset()
+
+    def stop(self):
+        with self._lock:
+            self.baseline = None
+        tracemalloc.stop()
+
+    def _snapshot(self):
+        gc.collect()
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in self.IGNORED]
+        )
+
+    def reset(self):
+        """Take a new baseline; later diffs show growth since now"""
+        snapshot = self._snapshot()
+        with self._lock:
+            self.baseline = snapshot
+
+    def diff(self, limit=20):
+        """Top allocation sites by growth since the baseline"""
+        with self._lock:
+            baseline = self.baseline
+        if baseline is None:
+            raise RuntimeError("Allocation tracking is not started")
+        stats = self._snapshot().compare_to(baseline, 'traceback' if self.frames > 1 else 'lineno')
+        return {
+            'traced_bytes': tracemalloc.get_traced_memory()[0],
+            'growth_bytes': sum(stat.size_diff for stat in stats),
+            'top': [
+                {
+                    'location': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    'size_diff_bytes': stat.size_diff,
+                    'count_diff': stat.count_diff,
+                    'size_bytes': stat.size,
+                }
+                for stat in stats[:limit]
+            ],
+        }
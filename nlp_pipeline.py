@@ -4,6 +4,10 @@ import subprocess
 import sys
 from langdetect import detect
 
+from memory_report import LEDGER
+from metrics import STAGE_SECONDS
+from tracing import span
+
 def download_spacy_model(model_name):
     """Download spaCy model if not available"""
     try:
@@ -23,8 +27,10 @@ def load_spacy_model(model_name):
         return spacy.load(model_name)
 
 # Charger les modèles spaCy complets avec téléchargement automatique
-nlp_fr = load_spacy_model("fr_core_news_sm")
-nlp_en = load_spacy_model("en_core_web_sm")
+with LEDGER.measure("spacy_fr"):
+    nlp_fr = load_spacy_model("fr_core_news_sm")
+with LEDGER.measure("spacy_en"):
+    nlp_en = load_spacy_model("en_core_web_sm")
 
 def nettoyage_normalisation(text, lang):
     text = text.lower()
@@ -42,23 +48,40 @@ def tokenisation_lemmatisation_stopwords(text, lang):
     tokens = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct and not token.is_space]
     return tokens
 
+def lemmatisation_corpus(texts, lang="en", batch_size=64):
+    """Même nettoyage et filtrage que pour les requêtes, appliqué en lot via nlp.pipe"""
+    nlp = nlp_fr if lang == "fr" else nlp_en
+    nettoyes = (nettoyage_normalisation(text, lang) for text in texts)
+    return [
+        [token.lemma_ for token in doc if not token.is_stop and not token.is_punct and not token.is_space]
+        for doc in nlp.pipe(nettoyes, batch_size=batch_size, disable=["ner", "parser"])
+    ]
+
 def ner_medical(text, lang):
     nlp = nlp_fr if lang == "fr" else nlp_en
     doc = nlp(text)
     entities = [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
     return entities
 
-def pipeline_pretraitement_requete(text):
+def detection_langue(text):
     try:
         lang = detect(text)
     except:
         lang = "en"
     if lang not in ("fr", "en"):
         lang = "en"
+    return lang
+
+def pipeline_pretraitement_requete(text):
+    with STAGE_SECONDS.time(stage="language_detection"), span("language_detection") as attributs:
+        lang = detection_langue(text)
+        attributs["langue"] = lang
 
     nettoye = nettoyage_normalisation(text, lang)
-    tokens = tokenisation_lemmatisation_stopwords(nettoye, lang)
-    entites = ner_medical(nettoye, lang)
+    with STAGE_SECONDS.time(stage="spacy"), span("spacy", caracteres=len(nettoye)) as attributs:
+        tokens = tokenisation_lemmatisation_stopwords(nettoye, lang)
+        entites = ner_medical(nettoye, lang)
+        attributs.update(tokens=len(tokens), entites=len(entites))
 
     return {
         "langue_detectee": lang,
@@ -68,3 +91,27 @@ def pipeline_pretraitement_requete(text):
         "entites": entites
     }
 
+def pipeline_pretraitement_requetes(texts, batch_size=64):
+    """Version par lot de pipeline_pretraitement_requete.
+
+    Les textes sont regroupés par langue et passent une seule fois dans
+    nlp.pipe : le même doc fournit les tokens et les entités. Les résultats
+    sont rendus dans l'ordre des textes.
+    """
+    langues = [detection_langue(text) for text in texts]
+    nettoyes = [nettoyage_normalisation(text, lang) for text, lang in zip(texts, langues)]
+    resultats = [None] * len(texts)
+    for lang, nlp in (("fr", nlp_fr), ("en", nlp_en)):
+        indices = [i for i, langue in enumerate(langues) if langue == lang]
+        if not indices:
+            continue
+        docs = nlp.pipe((nettoyes[i] for i in indices), batch_size=batch_size)
+        for i, doc in zip(indices, docs):
+            resultats[i] = {
+                "langue_detectee": lang,
+                "texte_original": texts[i],
+                "texte_nettoye": nettoyes[i],
+                "tokens": [token.lemma_ for token in doc if not token.is_stop and not token.is_punct and not token.is_space],
+                "entites": [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
+            }
+    return resultats
@@ -0,0 +1,56 @@
+import re
+import string
+
+
+def perturb_typo(question, rng):
+    """Swap two adjacent letters inside one longer word"""
+    words = question.split()
+    candidates = [i for i, word in enumerate(words) if len(word.rstrip(string.punctuation)) > 4]
+    if not candidates:
+        return question
+    i = rng.choice(candidates)
+    word = words[i]
+    j = rng.randrange(len(word.rstrip(string.punctuation)) - 1)
+    words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return " ".join(words)
+
+
+def perturb_drop_word(question, rng):
+    words = question.split()
+    if len(words) < 3:
+        return question
+    del words[rng.randrange(1, len(words))]
+    return " ".join(words)
+
+
+def perturb_swap_words(question, rng):
+    words = question.split()
+    if len(words) < 2:
+        return question
+    i = rng.randrange(len(words) - 1)
+    words[i], words[i + 1] = words[i + 1], words[i]
+    return " ".join(words)
+
+
+def perturb_plain(question, rng):
+    """Lowercase without punctuation, as typed in a hurry"""
+    return re.sub(r"\s+", " ", question.lower().translate(str.maketrans(string.punctuation, " " * len(string.punctuation)))).strip()
+
+
+PERTURBATIONS = {
+    'typo': perturb_typo,
+    'drop_word': perturb_drop_word,
+    'swap_words': perturb_swap_words,
+    'plain': perturb_plain,
+}
+
+# Perturbations that change the answer table key (normalize_question); "plain"
+# only changes case and punctuation, which the key ignores
+KEY_CHANGING = ('typo', 'drop_word', 'swap_words')
+
+
+def perturb(question, rng, kinds=KEY_CHANGING, count=2):
+    """Apply `count` distinct perturbations, picked at random from `kinds`"""
+    for kind in rng.sample(kinds, min(count, len(kinds))):
+        question = PERTURBATIONS[kind](question, rng)
+    return question
@@ -0,0 +1,136 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+def frame_label(code):
+    """'function (file.py:first line)': one label per function, without ';'"""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+def collapse(frame, root):
+    """Stack of a frame as 'root;outermost;...;innermost'"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join([root] + labels[::-1])
+
+
+class StackSampler:
+    """Wall-clock sampler of one thread's Python stack.
+
+    A background thread records the target thread's stack every interval
+    seconds, plus the stacks of threads whose name starts with one of
+    extra_prefixes (e.g. the pipeline stage pool, which that pool's other
+    requests share). Stacks are counted in collapsed form, rooted at the
+    thread name, so the output feeds flamegraph.pl or speedscope directly.
+    """
+
+    def __init__(self, thread_id=None, interval=0.005, extra_prefixes=()):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.extra_prefixes = tuple(extra_prefixes)
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            name = names.get(thread_id, str(thread_id))
+            if thread_id == self.thread_id:
+                self.stacks[collapse(frame, 'request')] += 1
+            elif self.extra_prefixes and name.startswith(self.extra_prefixes):
+                self.stacks[collapse(frame, name)] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class ProfileStore:
+    """Directory of collapsed-stack files holding at most max_files; oldest go first"""
+
+    def __init__(self, directory, max_files=100):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name for name in os.listdir(self.directory) if name.endswith('.folded')]
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+
+    def write(self, label, collapsed):
+        """Write one profile; returns its file name"""
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_') or 'request'
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 10**9:09d}-{slug}.folded"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+                f.write(collapsed)
+            stale = self.files()[:-self.max_files] if self.max_files > 0 else []
+            for old in stale:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except FileNotFoundError:
+                    pass
+        return name
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their stacks to a store.
+
+    A request is profiled when it sends the trigger (the X-Profile header,
+    compared by the caller) or, independently, with probability
+    sample_rate. When neither applies the cost is one comparison.
+    """
+
+    def __init__(self, store, sample_rate=0.0, interval=0.005, extra_prefixes=(), rng=None):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.extra_prefixes = tuple(extra_prefixes)
+        self.rng = rng or random.Random()
+
+    def wanted(self, triggered=False):
+        return triggered or (self.sample_rate > 0 and self.rng.random() < self.sample_rate)
+
+    @contextmanager
+    def profile(self, label):
+        """Sample the calling thread for the duration of the block.
+
+        Yields a dict whose 'file' is set to the written file name on exit.
+        """
+        result = {'file': None, 'samples': 0}
+        sampler = StackSampler(interval=self.interval, extra_prefixes=self.extra_prefixes).start()
+        try:
+            yield result
+        finally:
+            sampler.stop()
+            result['samples'] = sampler.samples
+            if sampler.stacks:
+                result['file'] = self.store.write(label, sampler.collapsed())
@@ -0,0 +1,364 @@
+import logging
+import os
+import time
+from contextlib import nullcontext
+
+from answer_table import AnswerTable
+from biobert_qa import BioBERT_QA
+from context_provider import LocalContextRetriever
+from memory_report import LEDGER, file_backed_bytes
+from metrics import CACHE_LOOKUPS, FORWARD_PASSES, STAGE_SECONDS
+from nlp_pipeline import pipeline_pretraitement_requete, pipeline_pretraitement_requetes, lemmatisation_corpus
+from stage_graph import StageGraph
+from tracing import span, tag
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+KNOWLEDGE_BASE_PATH = os.path.join(PROJECT_ROOT, "data", "cancer_qa_dataset.csv")
+CORPUS_DIR = os.path.join(PROJECT_ROOT, "data", "corpus")
+ANSWER_TABLE_DIR = os.path.join(PROJECT_ROOT, "data", "answer_table")
+
+logger = logging.getLogger(__name__)
+
+NO_ANSWER = "No clear answer found."
+
+# Example queries shown on the landing page
+EXAMPLE_QUERIES = [
+    "What are treatment options for breast cancer stage 2?",
+    "Side effects of chemotherapy?",
+    "Diet recommendations during radiation?",
+    "Recovery time after surgery?",
+    "What is immunotherapy for lung cancer?",
+    "How does radiation therapy work?",
+    "Symptoms of ovarian cancer?",
+    "Cost of cancer treatments?"
+]
+
+
+def is_usable_answer(answer):
+    return bool(answer) and isinstance(answer, str) and len(answer.strip()) > 5 and "no clear answer" not in answer.lower()
+
+
+def is_partial_answer(answer):
+    """A short answer that is only returned when the deadline cuts the search"""
+    return bool(answer) and isinstance(answer, str) and bool(answer.strip()) and "no clear answer" not in answer.lower()
+
+
+class QAPipeline:
+    """Preprocessing, retrieval and BioBERT answering for one query.
+
+    Shared by the Flask routes and the offline tools so they all answer the
+    same way. The optional answer table and semantic cache are checked, in
+    that order, before any model runs. Given ``admit``, a function
+    returning a context manager (an admission slot), only retrieval and
+    BioBERT run inside it, so table and cache hits never wait for one.
+    With a deadline the BioBERT loop stops between forward passes once it
+    expires and returns the best answer seen so far; deadline_cut counts
+    the queries cut that way.
+
+    The stages before BioBERT form an explicit dependency graph (see
+    query_stages); given an executor, independent stages such as spaCy
+    preprocessing and query encoding run concurrently.
+    """
+
+    def __init__(self, retriever, qa_model, answer_cache=None, answer_table=None, executor=None):
+        self.retriever = retriever
+        self.qa_model = qa_model
+        self.answer_cache = answer_cache
+        self.answer_table = answer_table
+        self.executor = executor
+        self.deadline_cut = 0
+        self.stages = self.query_stages()
+
+    def query_stages(self):
+        """Stages from the raw query to the semantic cache lookup.
+
+        analysis (spaCy) and embedding (MiniLM) only need the query; the
+        cache lookup needs the embedding. Retrieval runs after them, once
+        the query is known to need the models (see stream).
+        """
+        return (StageGraph(inputs=('query',))
+                .add('analysis', lambda query: pipeline_pretraitement_requete(query), after=('query',))
+                .add('embedding', self._encode_query, after=('query',))
+                .add('cached', self._cached_answer, after=('embedding',)))
+
+    def _precomputed_answer(self, query):
+        """Answer table payload for the query, if it has one"""
+        if self.answer_table is None:
+            return None
+        with span("table_lookup") as attributes:
+            precomputed = self.answer_table.get(query)
+            attributes['hit'] = precomputed is not None
+        CACHE_LOOKUPS.inc(cache="table", result="miss" if precomputed is None else "hit")
+        return precomputed
+
+    def _encode_query(self, query):
+        with STAGE_SECONDS.time(stage="query_encode"), span("query_encode", query_chars=len(query)):
+            return self.retriever.encode_query(query)
+
+    def _cached_answer(self, query_embedding):
+        """Answer of a recent paraphrase of the query, if any"""
+        if self.answer_cache is None:
+            return None
+        with STAGE_SECONDS.time(stage="cache_lookup"), span("cache_lookup") as attributes:
+            cached = self.answer_cache.get(query_embedding, version=self.retriever.corpus.version)
+            attributes['hit'] = cached is not None
+        CACHE_LOOKUPS.inc(cache="semantic", result="miss" if cached is None else "hit")
+        return cached
+
+    def retrieve_context(self, query, entities=None, tokens=None, query_embedding=None):
+        """Best matching answer ids and their candidate sentences"""
+        # Get best matching context answer(s) from the knowledge base
+        with STAGE_SECONDS.time(stage="retrieval"), span("retrieval", hybrid=bool(tokens)) as attributes:
+            answer_ids = self.retriever.get_best_answer_ids(
+                query, entities=entities, tokens=tokens, query_embedding=query_embedding
+            )
+            attributes['answer_ids'] = answer_ids
+        if logger.isEnabledFor(logging.DEBUG):
+            for answer_id in answer_ids:
+                logger.debug("🔍 Context block: %s ...", self.retriever.corpus.unique_answer(answer_id)[:200])
+
+        candidate_sentences = []
+        with STAGE_SECONDS.time(stage="sentence_split"), span("sentence_split") as attributes:
+            block_sentences = []
+            for answer_id in answer_ids:
+                sentences = self.retriever.sentences_for(answer_id)
+                candidate_sentences.extend(sentences)
+                block_sentences.append(len(sentences))
+            attributes.update(block_sentences=block_sentences, sentences=len(candidate_sentences))
+        logger.debug("🧠 Extracted %d candidate sentences.", len(candidate_sentences))
+        return answer_ids, candidate_sentences
+
+    def read_sentences(self, query, sentences):
+        """Yield BioBERT's answer for each sentence in turn, one forward pass per step"""
+        for sentence in sentences:
+            with STAGE_SECONDS.time(stage="biobert_forward"), span("biobert_forward",
+                                                                   sentence_chars=len(sentence)) as attributes:
+                answer = self.qa_model.answer_question(query, context=sentence)
+                attributes['usable'] = is_usable_answer(answer)
+            logger.debug("🧩 Sentence: %s -> 🤖 Answer: %s", sentence, answer)
+            yield answer
+
+    def answer_from_context(self, query, entities=None, tokens=None, query_embedding=None):
+        """Retrieve context for a query and run BioBERT until a usable answer is found"""
+        _, candidate_sentences = self.retrieve_context(query, entities, tokens, query_embedding)
+        for answer in self.read_sentences(query, candidate_sentences):
+            if is_usable_answer(answer):
+                return answer
+        return NO_ANSWER
+
+    def answer(self, query, deadline=None, admit=None):
+        """Full response payload for a query"""
+        for event, data in self.stream(query, deadline, admit):
+            if event == 'answer':
+                return data
+
+    def stream(self, query, deadline=None, admit=None):
+        """The work of answer() as (event, data) pairs, one per finished stage.
+
+        Events are 'analysis' (entities and tokens), 'context' (retrieved
+        answer blocks), 'progress' after each BioBERT pass and finally
+        'answer' with the payload answer() returns. A query that misses
+        both caches enters admit() before retrieval and holds it until its
+        answer is ready. Closing the generator early skips the remaining
+        BioBERT passes and leaves admit().
+        """
+        start = time.perf_counter()
+        precomputed = self._precomputed_answer(query)
+        if precomputed is not None:
+            FORWARD_PASSES.observe(0)
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="total")
+            tag(source="answer_table", forward_passes=0)
+            yield 'answer', dict(precomputed, cached=True)
+            return
+
+        logger.debug("🔎 Query received: %s", query)
+        run = self.stages.run(self.executor, query=query)
+
+        nlp_result = run.result('analysis')
+        entities = nlp_result['entites']
+        tokens = nlp_result['tokens']
+        yield 'analysis', {'entities': entities, 'tokens': tokens}
+
+        # Paraphrases of a recently answered question reuse its answer
+        query_embedding = run.result('embedding')
+        version = self.retriever.corpus.version
+        cached = run.result('cached')
+        cut = False
+        passes = 0
+        if cached is not None:
+            final_answer = cached['response']
+        else:
+            with admit() if admit is not None else nullcontext():
+                answer_ids, candidate_sentences = self.retrieve_context(query, entities, tokens, query_embedding)
+                yield 'context', {
+                    'blocks': [self.retriever.corpus.unique_answer(answer_id) for answer_id in answer_ids],
+                    'sentences': len(candidate_sentences)
+                }
+                final_answer = NO_ANSWER
+                partial = None
+                for passes, answer in enumerate(self.read_sentences(query, candidate_sentences), 1):
+                    yield 'progress', {'passes': passes}
+                    if is_usable_answer(answer):
+                        final_answer = answer
+                        break
+                    partial = partial or (answer if is_partial_answer(answer) else None)
+                    if deadline is not None and deadline.expired() and passes < len(candidate_sentences):
+                        self.deadline_cut += 1
+                        cut = True
+                        final_answer = partial or NO_ANSWER
+                        break
+            if self.answer_cache is not None and not cut:
+                self.answer_cache.put(query_embedding, {'response': final_answer}, version=version)
+
+        payload = {
+            'response': final_answer,
+            'entities': entities,
+            'tokens': tokens,
+            'intent': 'biobert_json_match',
+            'cached': cached is not None
+        }
+        if cut:
+            payload['deadline_exceeded'] = True
+        FORWARD_PASSES.observe(passes)
+        tag(source="semantic_cache" if cached is not None else "biobert", forward_passes=passes,
+            deadline_exceeded=cut)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="total")
+        yield 'answer', payload
+
+    def _answer_round(self, pairs):
+        """BioBERT answers of one round, and the errors of the pairs that failed.
+
+        The padded batch runs first; if it raises, each pair is retried on
+        its own so one bad input only fails its own query.
+        """
+        try:
+            with STAGE_SECONDS.time(stage="biobert_batch"):
+                return self.qa_model.answer_questions(pairs), {}
+        except Exception as e:
+            logger.warning("⚠️ BioBERT batch of %d pairs failed (%s); answering them one by one", len(pairs), e)
+        answers, errors = [], {}
+        for position, (question, context) in enumerate(pairs):
+            try:
+                answers.append(self.qa_model.answer_question(question, context))
+            except Exception as e:
+                answers.append(None)
+                errors[position] = str(e)
+        return answers, errors
+
+    def _answer_in_rounds(self, queries, sentences, deadline=None):
+        """BioBERT over many queries' candidate sentences in padded batches.
+
+        Round r reads sentence r of every query still unanswered, so each
+        query stops at the same sentence as answer_from_context would.
+        Returns the answers, the indices of queries cut by the deadline and
+        the errors of queries BioBERT failed on.
+        """
+        answers = {}
+        partial = {}
+        failed = {}
+        depth = 0
+        remaining = [i for i, candidates in sentences.items() if candidates]
+        while remaining:
+            pairs = [(queries[i], sentences[i][depth]) for i in remaining]
+            round_answers, errors = self._answer_round(pairs)
+            for position, (i, answer) in enumerate(zip(remaining, round_answers)):
+                if position in errors:
+                    failed[i] = errors[position]
+                elif is_usable_answer(answer):
+                    answers[i] = answer
+                elif is_partial_answer(answer):
+                    partial.setdefault(i, answer)
+            depth += 1
+            remaining = [i for i in remaining if i not in answers and i not in failed and depth < len(sentences[i])]
+            if remaining and deadline is not None and deadline.expired():
+                self.deadline_cut += len(remaining)
+                for i in remaining:
+                    answers[i] = partial.get(i, NO_ANSWER)
+                return {i: answers.get(i, NO_ANSWER) for i in sentences if i not in failed}, set(remaining), failed
+        return {i: answers.get(i, NO_ANSWER) for i in sentences if i not in failed}, set(), failed
+
+    def answer_batch(self, queries, deadline=None, admit=None):
+        """Response payloads for several queries, in order.
+
+        Preprocessing, query encoding and BioBERT each run once over the
+        whole batch rather than once per query. Retrieval and BioBERT run
+        inside one admit() for the whole batch, entered only if some query
+        missed both caches. A query whose retrieval or BioBERT pass fails
+        gets an {'error': ...} item instead of failing the batch.
+        """
+        results = [None] * len(queries)
+        pending = []
+        for i, query in enumerate(queries):
+            precomputed = self._precomputed_answer(query)
+            if precomputed is not None:
+                results[i] = dict(precomputed, cached=True)
+            else:
+                pending.append(i)
+        if not pending:
+            return results
+
+        nlp_results = pipeline_pretraitement_requetes([queries[i] for i in pending])
+        embeddings = dict(zip(pending, self.retriever.encode_queries([queries[i] for i in pending])))
+        version = self.retriever.corpus.version
+
+        misses = []
+        for i, nlp_result in zip(pending, nlp_results):
+            results[i] = {
+                'response': None,
+                'entities': nlp_result['entites'],
+                'tokens': nlp_result['tokens'],
+                'intent': 'biobert_json_match',
+                'cached': False
+            }
+            cached = self._cached_answer(embeddings[i])
+            if cached is not None:
+                results[i].update(response=cached['response'], cached=True)
+            else:
+                misses.append(i)
+        if not misses:
+            return results
+
+        sentences = {}
+        with admit() if admit is not None else nullcontext():
+            for i in misses:
+                try:
+                    answer_ids = self.retriever.get_best_answer_ids(
+                        queries[i], entities=results[i]['entities'], tokens=results[i]['tokens'],
+                        query_embedding=embeddings[i]
+                    )
+                    sentences[i] = [s for answer_id in answer_ids for s in self.retriever.sentences_for(answer_id)]
+                except Exception as e:
+                    results[i] = {'error': str(e)}
+            answers, cut, failed = self._answer_in_rounds(queries, sentences, deadline)
+        for i, error in failed.items():
+            results[i] = {'error': error}
+        for i, final_answer in answers.items():
+            results[i]['response'] = final_answer
+            if i in cut:
+                results[i]['deadline_exceeded'] = True
+            elif self.answer_cache is not None:
+                self.answer_cache.put(embeddings[i], {'response': final_answer}, version=version)
+        return results
+
+
+def load_answer_table(directory, version):
+    """The precomputed answer table, if one was built for this knowledge base version"""
+    table = AnswerTable.load(directory)
+    if table is not None and table.meta.get('version') != version:
+        logger.warning("⚠️ Ignoring answer table in %s: built for another knowledge base version.", directory)
+        return None
+    return table
+
+
+def load_pipeline(answer_cache=None, answer_table_dir=ANSWER_TABLE_DIR, executor=None):
+    """Load the retriever, BioBERT and (when present) the answer table"""
+    with LEDGER.measure("retriever"):
+        retriever = LocalContextRetriever(KNOWLEDGE_BASE_PATH, corpus_dir=CORPUS_DIR, tokenizer=lemmatisation_corpus)
+    LEDGER.add_bytes("retriever", corpus=retriever.corpus, minilm=retriever.model, embeddings=retriever.embeddings,
+                     quantized_index=retriever.index, bm25=retriever.bm25)
+    with LEDGER.measure("biobert"):
+        qa_model = BioBERT_QA()
+    LEDGER.add_bytes("biobert", model=qa_model.model,
+                     file_backed=file_backed_bytes(qa_model.model, qa_model.weight_files))
+    answer_table = load_answer_table(answer_table_dir, retriever.corpus.version) if answer_table_dir else None
+    return QAPipeline(retriever, qa_model, answer_cache, answer_table, executor)
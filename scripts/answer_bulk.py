@@ -0,0 +1,182 @@
+"""Answer a file of questions offline with the same pipeline as /api/query.
+
+Questions are read as a stream from a CSV file (--column, default
+"question") or a JSONL file (one object per line with that field), then
+answered in batches by a pool of worker processes. Each worker loads the
+pipeline once and answers a batch with QAPipeline.answer_batch.
+
+Results are appended to a JSONL file as batches finish, one line per
+question with its input position ("index"), so lines are not in input
+order. The output file is also the checkpoint: it is flushed and synced
+after every batch, and rerunning the same command skips every index it
+already holds. A line cut short by an interruption is dropped on resume.
+Each line keeps its question, and resuming stops with an error if the
+input now has a different question at an answered index.
+
+    python scripts/answer_bulk.py questions.csv answers.jsonl
+    python scripts/answer_bulk.py questions.jsonl answers.jsonl --workers 4 --batch-size 32
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Get the directory where this script is located and go up one level to project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+DEFAULT_WORKERS = 2
+DEFAULT_BATCH_SIZE = 16
+
+# Set in each worker process by init_worker
+_pipeline = None
+
+
+def read_questions(path, column):
+    """Yield (index, question) from a CSV or JSONL file without loading it whole"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith('.jsonl'):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for index, record in enumerate(records):
+            if column not in record:
+                raise ValueError(f"Record {index} of {path} has no '{column}' field")
+            yield index, str(record[column] or '').strip()
+
+
+def load_checkpoint(path):
+    """{index: question} of the questions already answered in the output file.
+
+    A last line without its newline was cut short by an interruption; it
+    is truncated so that appended results start on a fresh line.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, 'rb+') as f:
+        data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            f.truncate(complete)
+    for line in data[:complete].splitlines():
+        if line.strip():
+            result = json.loads(line)
+            done[result['index']] = result['question']
+    return done
+
+
+def batches(questions, done, size):
+    """Lists of up to size (index, question) pairs not answered yet.
+
+    done maps answered indices to their questions; an index whose question
+    differs means the input changed since the output was written.
+    """
+    batch = []
+    for index, question in questions:
+        if index in done:
+            if done[index] != question:
+                raise ValueError(f"Question {index} differs from the one answered in the output file; "
+                                 f"the input changed, so write to a new output file")
+            continue
+        batch.append((index, question))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def init_worker(threads, use_answer_table):
+    global _pipeline
+    import torch
+    from qa_service import ANSWER_TABLE_DIR, load_pipeline
+    from semantic_cache import SemanticAnswerCache
+
+    # Workers share the cores instead of each starting one thread per core
+    torch.set_num_threads(threads)
+    _pipeline = load_pipeline(answer_cache=SemanticAnswerCache(),
+                              answer_table_dir=ANSWER_TABLE_DIR if use_answer_table else None)
+
+
+def answer_batch(batch):
+    """Result lines for one batch; runs in a worker process"""
+    results = [{'index': index, 'question': question} for index, question in batch]
+    valid = [i for i, (_, question) in enumerate(batch) if question]
+    for i, (_, question) in enumerate(batch):
+        if not question:
+            results[i]['error'] = 'empty question'
+    try:
+        payloads = _pipeline.answer_batch([batch[i][1] for i in valid])
+    except Exception as e:
+        payloads = [{'error': str(e)}] * len(valid)
+    for i, payload in zip(valid, payloads):
+        results[i].update(payload)
+    return results
+
+
+def write_results(out, results):
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+    # The output doubles as the checkpoint: make the batch durable before moving on
+    out.flush()
+    os.fsync(out.fileno())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a CSV or JSONL file of questions offline.")
+    parser.add_argument("input", help="CSV or .jsonl file of questions")
+    parser.add_argument("output", help="JSONL results file; rerun with the same file to resume")
+    parser.add_argument("--column", default="question", help="CSV column or JSON field holding the question")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Questions per batch")
+    parser.add_argument("--threads", type=int, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--no-answer-table", action="store_true",
+                        help="Answer every question with the models, ignoring data/answer_table/")
+    args = parser.parse_args()
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    done = load_checkpoint(args.output)
+    if done:
+        print(f"Resuming: {len(done)} questions already answered in {args.output}")
+
+    answered = errors = 0
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                               initargs=(threads, not args.no_answer_table))
+    try:
+        with open(args.output, 'a', encoding='utf-8') as out:
+            pending = set()
+
+            def collect(finished):
+                global answered, errors
+                for future in finished:
+                    results = future.result()
+                    write_results(out, results)
+                    answered += len(results)
+                    errors += sum('error' in result for result in results)
+                print(f"Answered {answered} questions ({errors} errors) in {time.perf_counter() - started:.0f}s")
+
+            # Keep a bounded number of batches queued so the input is streamed, not loaded whole
+            for batch in batches(read_questions(args.input, args.column), done, args.batch_size):
+                if len(pending) >= 2 * args.workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                pending.add(pool.submit(answer_batch, batch))
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun the same command to resume from {args.output}")
+        pool.shutdown(wait=False, cancel_futures=True)
+        sys.exit(130)
+    except ValueError as e:
+        # Bad input record, or an input that no longer matches the output file
+        print(f"❌ {e}")
+        pool.shutdown(wait=False, cancel_futures=True)
+        sys.exit(1)
+    pool.shutdown()
+    print(f"✅ {answered} questions answered ({errors} errors), results in {args.output}")
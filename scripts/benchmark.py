@@ -0,0 +1,247 @@
+"""Micro and macro benchmarks of the QA pipeline.
+
+Every stage is timed in isolation on a fixed, seeded sample of dataset
+questions, then QAPipeline.answer and the /api/query route, both with the
+answer table and semantic cache off so every call runs the models. The
+route is timed again with them on, after one priming pass, as
+process_query_cached: the cost of a cache hit. For each benchmark the
+first call is reported as the cold timing and the following calls as warm
+timings, with throughput and the peak RSS reached so far. Stages run in
+pipeline order and each one's inputs are computed only after it has been
+timed, so its cold call is the first time its code runs in the process.
+Model loading is timed as the cold start; the app is imported on top of
+the models already loaded, so its RSS counts one model set.
+
+    python scripts/benchmark.py --output baseline.json
+    python scripts/benchmark.py --compare baseline.json --tolerance 0.15
+    python scripts/benchmark.py --compare baseline.json --results new.json
+
+With --compare the exit status is 1 when any warm median is slower than
+the baseline by more than the tolerance.
+"""
+import argparse
+import csv
+import importlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+# Get the directory where this script is located and go up one level to project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# Same files as qa_service; not imported from there so that loading the
+# models happens inside the timed cold start (and --results needs no models)
+DATA_PATH = os.path.join(project_root, "data", "cancer_qa_dataset.csv")
+CORPUS_DIR = os.path.join(project_root, "data", "corpus")
+
+DEFAULT_SEED = 13
+DEFAULT_SAMPLE = 50
+DEFAULT_REPEATS = 3
+DEFAULT_TOLERANCE = 0.10
+
+
+def load_questions(path):
+    """Distinct dataset questions, in file order"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(dict.fromkeys(row['question'] for row in csv.DictReader(f)))
+
+
+def sample_queries(questions, size, seed):
+    return random.Random(seed).sample(questions, min(size, len(questions)))
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(cold, warm):
+    warm = sorted(warm)
+    total = sum(warm)
+    return {
+        'cold_ms': cold * 1000,
+        'warm_mean_ms': total / len(warm) * 1000 if warm else 0.0,
+        'warm_p50_ms': percentile(warm, 50) * 1000,
+        'warm_p95_ms': percentile(warm, 95) * 1000,
+        'throughput_per_s': len(warm) / total if total else 0.0,
+        'calls': len(warm),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def bench(fn, inputs, repeats):
+    """Cold: the first call. Warm: `repeats` further passes over all inputs.
+
+    None when there are no inputs (e.g. no sample question yielded a sentence).
+    """
+    if not inputs:
+        return None
+    cold, _ = timed(fn, *inputs[0])
+    warm = [timed(fn, *args)[0] for _ in range(repeats) for args in inputs]
+    return summarize(cold, warm)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(queries, repeats, http=True):
+    import torch
+
+    results = {'startup': {}, 'stages': {}}
+    startup = results['startup']
+
+    # Cold start: importing nlp_pipeline loads both spaCy models
+    seconds, nlp = timed(importlib.import_module, 'nlp_pipeline')
+    startup['spacy_models'] = {'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+    from context_provider import LocalContextRetriever
+    from biobert_qa import BioBERT_QA
+    from qa_service import ANSWER_TABLE_DIR, QAPipeline, load_answer_table
+    seconds, retriever = timed(lambda: LocalContextRetriever(
+        DATA_PATH, corpus_dir=CORPUS_DIR, tokenizer=nlp.lemmatisation_corpus))
+    startup['retriever'] = {'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+    seconds, qa_model = timed(BioBERT_QA)
+    startup['biobert'] = {'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+
+    torch_threads = torch.get_num_threads()
+
+    # Each stage is timed before its outputs are computed for the next one,
+    # so no stage has already run when its cold call is measured
+    stages = results['stages']
+    single = [(query,) for query in queries]
+    stages['language_detection'] = bench(nlp.detection_langue, single, repeats)
+    stages['preprocessing'] = bench(nlp.pipeline_pretraitement_requete, single, repeats)
+    analyses = [nlp.pipeline_pretraitement_requete(query) for query in queries]
+    stages['query_encode'] = bench(retriever.encode_query, single, repeats)
+    embeddings = [retriever.encode_query(query) for query in queries]
+    retrieve = lambda query, analysis, embedding: retriever.get_best_answer_ids(
+        query, entities=analysis['entites'], tokens=analysis['tokens'], query_embedding=embedding)
+    stages['retrieval'] = bench(retrieve, list(zip(queries, analyses, embeddings)), repeats)
+    answer_ids = [retrieve(*args) for args in zip(queries, analyses, embeddings)]
+    blocks = [retriever.corpus.unique_answer(ids[0]) for ids in answer_ids if ids]
+    stages['sentence_split'] = bench(retriever.split_into_sentences, [(block,) for block in blocks], repeats)
+    sentence_pairs = [(query, sentences[0]) for query, sentences in
+                      zip(queries, (retriever.split_into_sentences(block) for block in blocks)) if sentences]
+    stages['biobert_forward'] = bench(lambda query, sentence: qa_model.answer_question(query, context=sentence),
+                                      sentence_pairs, repeats)
+    stages['pipeline'] = bench(QAPipeline(retriever, qa_model).answer, single, repeats)
+
+    if http:
+        # The app serves the models loaded above rather than loading a second set
+        def shared_pipeline(answer_cache=None, executor=None):
+            answer_table = load_answer_table(ANSWER_TABLE_DIR, retriever.corpus.version)
+            return QAPipeline(retriever, qa_model, answer_cache, answer_table, executor)
+
+        with mock.patch('qa_service.load_pipeline', shared_pipeline):
+            seconds, app = timed(importlib.import_module, 'app')
+        startup['app'] = {'seconds': seconds, 'peak_rss_mb': peak_rss_mb()}
+        client = app.app.test_client()
+        post = lambda query: client.post('/api/query', json={'query': query})
+        # Repeated queries would otherwise be served from the caches after the first pass
+        pipeline = app.qa_pipeline
+        answer_table, answer_cache = pipeline.answer_table, pipeline.answer_cache
+        pipeline.answer_table = pipeline.answer_cache = None
+        try:
+            stages['process_query'] = bench(post, single, repeats)
+        finally:
+            pipeline.answer_table, pipeline.answer_cache = answer_table, answer_cache
+        for query in queries:
+            post(query)
+        stages['process_query_cached'] = bench(post, single, repeats)
+    return results, torch_threads
+
+
+def compare(current, baseline, tolerance, metric='warm_p50_ms'):
+    """Per-stage rows of (stage, baseline, current, ratio, regressed)"""
+    rows = []
+    for stage, base in baseline.get('stages', {}).items():
+        if not base or not current.get('stages', {}).get(stage):
+            continue
+        before, after = base[metric], current['stages'][stage][metric]
+        ratio = after / before if before else float('inf') if after else 1.0
+        rows.append((stage, before, after, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def print_comparison(rows, tolerance, metric):
+    print(f"{'stage':<20} {'baseline':>10} {'current':>10} {'ratio':>7}   ({metric}, tolerance {tolerance:.0%})")
+    for stage, before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{stage:<20} {before:>10.2f} {after:>10.2f} {ratio:>7.2f}   {flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the QA pipeline stages and the /api/query path.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the query sample")
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE, help="Number of dataset questions")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Warm passes over the sample")
+    parser.add_argument("--threads", type=int, help="torch intra-op threads (default: torch's choice)")
+    parser.add_argument("--no-http", action="store_true", help="Skip the /api/query benchmark")
+    parser.add_argument("--output", help="Write the results JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a stored results JSON")
+    parser.add_argument("--results", help="With --compare, compare this results JSON instead of running")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before a stage is flagged (0.10 = 10%%)")
+    parser.add_argument("--metric", default="warm_p50_ms", help="Stage field compared with --compare")
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results, encoding='utf-8') as f:
+            results = json.load(f)
+    else:
+        if args.threads:
+            import torch
+            torch.set_num_threads(args.threads)
+        queries = sample_queries(load_questions(DATA_PATH), args.sample, args.seed)
+        results, torch_threads = run_benchmarks(queries, args.repeats, http=not args.no_http)
+        meta = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'seed': args.seed,
+            'sample': len(queries),
+            'repeats': args.repeats,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'torch_threads': torch_threads,
+        }
+        results = {'meta': meta, **results}
+        print(json.dumps(results, indent=2))
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance, args.metric)
+        print_comparison(rows, args.tolerance, args.metric)
+        sys.exit(1 if any(regressed for *_, regressed in rows) else 0)
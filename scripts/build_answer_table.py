@@ -0,0 +1,55 @@
+"""Precompute answers for every knowledge base question and example query.
+
+Runs the full QA pipeline over each distinct (normalized) question, in
+chunks through QAPipeline.answer_batch, and stores the response payloads
+in data/answer_table/. /api/query serves an exact or normalized match
+from this table without running any model. The
+table is tied to the knowledge base version and is ignored once the
+dataset changes, so rerun this after updating the data.
+
+    python scripts/build_answer_table.py [--batch-size 32]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Get the directory where this script is located and go up one level to project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from answer_table import AnswerTable, normalize_question
+from qa_service import ANSWER_TABLE_DIR, EXAMPLE_QUERIES, load_pipeline
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=32, help="Questions answered per answer_batch call")
+    args = parser.parse_args()
+
+    # No cache and no existing table: every answer comes from the models
+    pipeline = load_pipeline(answer_table_dir=None)
+
+    questions = {}
+    for question in list(pipeline.retriever.questions) + EXAMPLE_QUERIES:
+        questions.setdefault(normalize_question(question), question)
+
+    payloads = {}
+    failed = 0
+    started = time.perf_counter()
+    pending = list(questions.values())
+    for start in range(0, len(pending), args.batch_size):
+        batch = pending[start:start + args.batch_size]
+        # Preprocessing, encoding and BioBERT run once per chunk, not per question
+        for question, payload in zip(batch, pipeline.answer_batch(batch)):
+            if 'error' in payload:
+                failed += 1
+                print(f"⚠️ Skipped '{question}': {payload['error']}")
+                continue
+            payload.pop('cached')
+            payloads[question] = payload
+        print(f"Answered {start + len(batch)}/{len(pending)} questions in {time.perf_counter() - started:.0f}s")
+
+    table = AnswerTable.build(payloads, meta={'version': pipeline.retriever.corpus.version})
+    table.save(ANSWER_TABLE_DIR)
+    print(f"Answer table with {len(table)} entries saved to {ANSWER_TABLE_DIR}"
+          + (f" ({failed} questions skipped)" if failed else ""))
@@ -0,0 +1,32 @@
+"""Fingerprint and precompress the static files for long-lived caching.
+
+Copies every file under static/ to static/dist/ with a content hash in its
+name (css/style.css -> css/style.<hash>.css), writes .gz variants of the
+text files, and .br variants too when the brotli package is installed.
+static/dist/manifest.json maps source names to fingerprinted names; the
+templates link to those and /assets/ serves them with an immutable
+Cache-Control. static/dist/built.json lists every name any build wrote, so
+files linked by pages from before a deploy are still served.
+gunicorn.conf.py runs this from its on_starting hook.
+
+    python scripts/build_assets.py
+"""
+import argparse
+import os
+import sys
+
+# Get the directory where this script is located and go up one level to project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from static_assets import build_assets, compressors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--static-dir", default=os.path.join(project_root, "static"))
+    parser.add_argument("--output-dir", default=os.path.join(project_root, "static", "dist"))
+    args = parser.parse_args()
+
+    manifest = build_assets(args.static_dir, args.output_dir)
+    encodings = ", ".join(suffix for suffix, _ in compressors())
+    print(f"{len(manifest)} static files fingerprinted ({encodings} variants) in {args.output_dir}")
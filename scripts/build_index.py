@@ -0,0 +1,33 @@
+"""Build the shared retrieval index once, before any web worker starts.
+
+Writes the packed corpus store, the normalized question embeddings, the
+quantized codes and the BM25 postings to data/corpus/. Workers started afterwards memory-map
+these files read-only instead of each encoding the corpus into private
+memory. gunicorn.conf.py runs this from its on_starting hook.
+
+    python scripts/build_index.py [--precision int8]
+"""
+import argparse
+import os
+import sys
+
+# Get the directory where this script is located and go up one level to project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from context_provider import LocalContextRetriever
+from nlp_pipeline import lemmatisation_corpus
+from qa_service import CORPUS_DIR, KNOWLEDGE_BASE_PATH
+from vector_index import PRECISIONS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32",
+                        help="also publish quantized codes for this precision")
+    args = parser.parse_args()
+
+    retriever = LocalContextRetriever(
+        KNOWLEDGE_BASE_PATH, corpus_dir=CORPUS_DIR, embedding_precision=args.precision, tokenizer=lemmatisation_corpus
+    )
+    print(f"Index for {len(retriever.questions)} questions "
+          f"(version {retriever.corpus.version}) ready in {CORPUS_DIR}")
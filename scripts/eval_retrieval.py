@@ -0,0 +1,215 @@
+"""Recall, MRR, latency and memory of LocalContextRetriever configurations.
+
+Every dataset question is a labelled query: the relevant results are the
+canonical answers of its dataset rows. Seeded perturbations of each
+question (typos, dropped or swapped words, lowercase without punctuation)
+stand in for paraphrases. Each configuration -- exact float32 scan or
+quantized codes with a re-rank depth, dense-only or hybrid BM25, and the
+number of answers asked for -- runs over all queries through
+get_best_answer_ids. Query embeddings are computed once up front, so the
+per-query latency is the retrieval itself.
+
+Memory is reported twice. index_bytes is what the index itself holds:
+the float32 matrix for an exact scan, the codes and scales for a
+quantized one. resident_bytes adds the float32 rows a quantized index
+still re-ranks from; like the service, the eval keeps those in a file
+mapping and counts only the distinct rows the queries touched, which is
+the page-cache working set. The table marks the Pareto-optimal
+configurations: no other one has at least the same MRR with no more
+latency and no more resident memory.
+
+    python scripts/eval_retrieval.py
+    python scripts/eval_retrieval.py --precisions float32,int8 --rerank-k 8,32 --hybrid --output pareto.json
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Get the directory where this script is located and go up one level to project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from context_provider import LocalContextRetriever
+from perturbations import PERTURBATIONS
+from shared_index import spill_array
+from vector_index import PRECISIONS, QuantizedEmbeddings
+
+DATA_PATH = os.path.join(project_root, "data", "cancer_qa_dataset.csv")
+CORPUS_DIR = os.path.join(project_root, "data", "corpus")
+K_VALUES = (1, 3, 5, 10)
+
+
+def labelled_queries(questions, answer_ids, perturbations, seed):
+    """(query, kind, relevant answer ids) for every distinct question and its perturbations"""
+    relevant = {}
+    for question, answer_id in zip(questions, answer_ids):
+        relevant.setdefault(question, set()).add(int(answer_id))
+    rng = random.Random(seed)
+    queries = []
+    for question, answers in relevant.items():
+        queries.append((question, 'original', answers))
+        for kind in perturbations:
+            queries.append((PERTURBATIONS[kind](question, rng), kind, answers))
+    return queries
+
+
+def recall_at_k(ranked_answer_ids, relevant_ids, k):
+    hits = sum(bool(relevant & set(ranked[:k])) for ranked, relevant in zip(ranked_answer_ids, relevant_ids))
+    return hits / max(len(relevant_ids), 1)
+
+
+def mean_reciprocal_rank(ranked_answer_ids, relevant_ids):
+    total = 0.0
+    for ranked, relevant in zip(ranked_answer_ids, relevant_ids):
+        rank = next((position for position, answer_id in enumerate(ranked, 1) if answer_id in relevant), None)
+        total += 1 / rank if rank else 0.0
+    return total / max(len(relevant_ids), 1)
+
+
+def pareto_front(rows):
+    """Indices of rows not dominated on (higher mrr, lower p50_ms, lower resident_bytes)"""
+    front = []
+    for i, row in enumerate(rows):
+        dominated = any(
+            other['mrr'] >= row['mrr'] and other['p50_ms'] <= row['p50_ms']
+            and other['resident_bytes'] <= row['resident_bytes']
+            and (other['mrr'] > row['mrr'] or other['p50_ms'] < row['p50_ms']
+                 or other['resident_bytes'] < row['resident_bytes'])
+            for j, other in enumerate(rows) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+
+class RowLog:
+    """File-backed float32 rows that remember which rows the re-rank read"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = []
+
+    def __getitem__(self, index):
+        self.reads.append(index)
+        return self.rows[index]
+
+    @property
+    def touched_bytes(self):
+        if not self.reads:
+            return 0
+        return len(np.unique(np.concatenate(self.reads))) * self.rows.strides[0]
+
+
+def configure(retriever, full, mapped, precision, rerank_k):
+    """Point the retriever at an exact float32 scan or a quantized index.
+
+    Returns the index bytes and, for a quantized index, the RowLog its
+    re-rank reads ``mapped`` through (None for an exact scan).
+    """
+    if precision == "float32":
+        retriever.index = None
+        return full.nbytes, None
+    row_log = RowLog(mapped)
+    codes, scales = QuantizedEmbeddings.quantize(full, precision)
+    retriever.index = QuantizedEmbeddings(row_log, precision, rerank_k, codes=codes, scales=scales)
+    return retriever.index.nbytes, row_log
+
+
+def evaluate(retriever, queries, embeddings, tokens, top_k):
+    """Ranked answer ids per query and per-query latencies in seconds"""
+    ranked, latencies = [], []
+    for (query, _, _), query_embedding, query_tokens in zip(queries, embeddings, tokens):
+        start = time.perf_counter()
+        ranked.append(retriever.get_best_answer_ids(query, top_k=top_k, tokens=query_tokens,
+                                                    query_embedding=query_embedding))
+        latencies.append(time.perf_counter() - start)
+    return ranked, latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall/MRR versus latency and memory of retrieval configurations.")
+    parser.add_argument("--precisions", default=",".join(PRECISIONS), help="Embedding precisions to compare")
+    parser.add_argument("--rerank-k", default="8,32", help="Re-rank depths for quantized precisions")
+    parser.add_argument("--top-k", default="1,5,10", help="Number of answers requested per query")
+    parser.add_argument("--hybrid", action="store_true", help="Also evaluate dense + BM25 fusion (needs spaCy)")
+    parser.add_argument("--perturbations", default=",".join(PERTURBATIONS), help="Paraphrase perturbations, or ''")
+    parser.add_argument("--seed", type=int, default=13, help="Seed of the perturbations")
+    parser.add_argument("--output", help="Write all rows as JSON")
+    args = parser.parse_args()
+
+    tokenizer = None
+    if args.hybrid:
+        from nlp_pipeline import lemmatisation_corpus as tokenizer
+    # Loaded as float32; quantized indexes are built from the same rows per configuration
+    retriever = LocalContextRetriever(DATA_PATH, corpus_dir=CORPUS_DIR, tokenizer=tokenizer,
+                                      embedding_precision="float32")
+    full = retriever.embeddings.numpy()
+    # Quantized configurations re-rank from a file mapping, as the service does
+    mapped = spill_array(full)
+
+    perturbations = [kind for kind in args.perturbations.split(",") if kind]
+    queries = labelled_queries(list(retriever.questions), retriever.answer_ids, perturbations, args.seed)
+    relevant = [answers for _, _, answers in queries]
+    start = time.perf_counter()
+    embeddings = retriever.encode_queries([query for query, _, _ in queries])
+    encode_ms = (time.perf_counter() - start) / len(queries) * 1000
+    query_tokens = tokenizer([query for query, _, _ in queries]) if tokenizer else [None] * len(queries)
+    bm25_bytes = retriever.bm25.nbytes if retriever.bm25 is not None else 0
+
+    configs = []
+    for precision in args.precisions.split(","):
+        depths = [int(k) for k in args.rerank_k.split(",")] if precision != "float32" else [None]
+        for rerank_k, top_k, hybrid in itertools.product(depths, [int(k) for k in args.top_k.split(",")],
+                                                         [False, True] if args.hybrid else [False]):
+            configs.append((precision, rerank_k, top_k, hybrid))
+
+    rows = []
+    for precision, rerank_k, top_k, hybrid in configs:
+        index_bytes, row_log = configure(retriever, full, mapped, precision, rerank_k)
+        tokens = query_tokens if hybrid else [None] * len(queries)
+        ranked, latencies = evaluate(retriever, queries, embeddings, tokens, top_k)
+        latencies_ms = np.array(latencies) * 1000
+        extra_bytes = bm25_bytes if hybrid else 0
+        row = {
+            'precision': precision, 'rerank_k': rerank_k, 'top_k': top_k, 'hybrid': hybrid,
+            'recall': {k: recall_at_k(ranked, relevant, k) for k in K_VALUES if k <= top_k},
+            'mrr': mean_reciprocal_rank(ranked, relevant),
+            'p50_ms': float(np.percentile(latencies_ms, 50)),
+            'p95_ms': float(np.percentile(latencies_ms, 95)),
+            'index_bytes': int(index_bytes + extra_bytes),
+            'resident_bytes': int(index_bytes + extra_bytes + (row_log.touched_bytes if row_log is not None else 0)),
+            'by_perturbation': {
+                kind: mean_reciprocal_rank([r for r, q in zip(ranked, queries) if q[1] == kind],
+                                           [q[2] for q in queries if q[1] == kind])
+                for kind in ['original'] + perturbations
+            },
+        }
+        rows.append(row)
+    front = set(pareto_front(rows))
+
+    print(f"{len(queries)} queries ({len(queries) // (len(perturbations) + 1)} questions x "
+          f"{len(perturbations) + 1} variants), query encoding {encode_ms:.2f} ms/query")
+    print(f"{'precision':<9} {'rerank':>6} {'top_k':>5} {'hybrid':>6}  " + "  ".join(f"R@{k:<4}" for k in K_VALUES)
+          + f"  {'MRR':<6} {'p50 ms':>7} {'p95 ms':>7} {'index B':>10} {'resident B':>10}  pareto")
+    for i, row in enumerate(rows):
+        recalls = "  ".join(f"{row['recall'][k]:.3f}" if k in row['recall'] else "  -  " for k in K_VALUES)
+        print(f"{row['precision']:<9} {row['rerank_k'] or '-':>6} {row['top_k']:>5} {'yes' if row['hybrid'] else 'no':>6}  "
+              f"{recalls}  {row['mrr']:.3f}  {row['p50_ms']:>7.3f} {row['p95_ms']:>7.3f} {row['index_bytes']:>10} "
+              f"{row['resident_bytes']:>10}  "
+              f"{'*' if i in front else ''}")
+    print("MRR by query variant: " + ", ".join(
+        f"{kind} {min(r['by_perturbation'][kind] for r in rows):.3f}-{max(r['by_perturbation'][kind] for r in rows):.3f}"
+        for kind in ['original'] + perturbations))
+
+    if args.output:
+        for i, row in enumerate(rows):
+            row['pareto'] = i in front
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'seed': args.seed, 'queries': len(queries), 'encode_ms': encode_ms, 'rows': rows}, f, indent=2)
+        print(f"✅ Results written to {args.output}")
@@ -0,0 +1,297 @@
+"""Load generator for the Flask API.
+
+Sends a seeded mix of /api/query (dataset questions), /api/stats and
+/api/data/<type> requests to a running server. Dataset questions are all
+in the precomputed answer table, so by default (--questions perturbed)
+each one gets two random typo, dropped-word or swapped-word perturbations:
+those miss the table, and mostly miss the semantic cache, so the run
+measures retrieval and BioBERT. --questions verbatim sends them unchanged
+and measures the answer table path. Every level reports the share of
+/api/query answers that still came from a cache. There are two load modes:
+
+- closed loop: N concurrent users, each sending its next request as soon
+  as the previous one returns (--users 1,2,4,8)
+- open loop: requests arrive at a fixed rate whether or not earlier ones
+  have returned (--rates 1,2,5,10 per second). Latency is measured from
+  the scheduled send time, so queueing inside the client is not hidden.
+
+Each load level runs for --duration seconds and reports throughput,
+p50/p95/p99 latency and error rates per endpoint. Given several levels,
+the knee is the last level before the first one that degrades: its error
+rate (503 sheds included) exceeds --max-error-rate, its p99 exceeds
+--knee-factor times the lightest level's p99, or its throughput grows by
+less than --min-gain over the level before.
+
+    python scripts/load_test.py --users 1,2,4,8,16
+    python scripts/load_test.py --users 1,2,4,8,16 --questions verbatim
+    python scripts/load_test.py --rates 1,2,4,8 --start "gunicorn -c gunicorn.conf.py app:app"
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Get the directory where this script is located and go up one level to project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from perturbations import perturb
+
+DATA_PATH = os.path.join(project_root, "data", "cancer_qa_dataset.csv")
+DATA_TYPES = ("cancer_types", "treatments", "side_effects")
+DEFAULT_MIX = "query=0.8,stats=0.1,data=0.1"
+
+QUESTION_MODES = ('perturbed', 'verbatim')
+
+
+def load_questions(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(dict.fromkeys(row['question'] for row in csv.DictReader(f)))
+
+
+def parse_mix(text):
+    """'query=0.8,stats=0.2' -> {'query': 0.8, 'stats': 0.2}"""
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        if name not in ('query', 'stats', 'data'):
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+class RequestMix:
+    """Seeded stream of (endpoint, method, path, json body) requests"""
+
+    def __init__(self, questions, mix, seed, question_mode='perturbed'):
+        if question_mode not in QUESTION_MODES:
+            raise ValueError(f"Unknown question mode '{question_mode}', expected one of {QUESTION_MODES}")
+        self.questions = questions
+        self.question_mode = question_mode
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            name = self.rng.choices(self.names, self.weights)[0]
+            if name == 'query':
+                question = self.rng.choice(self.questions)
+                if self.question_mode == 'perturbed':
+                    question = perturb(question, self.rng)
+                return name, 'POST', '/api/query', {'query': question}
+            if name == 'data':
+                return name, 'GET', f'/api/data/{self.rng.choice(DATA_TYPES)}', None
+            return name, 'GET', '/api/stats', None
+
+
+def send(session, base_url, request, timeout):
+    """(endpoint, status or None, seconds, cached) -- cached only for /api/query answers"""
+    name, method, path, body = request
+    start = time.perf_counter()
+    cached = None
+    try:
+        response = session.request(method, base_url + path, json=body, timeout=timeout)
+        status = response.status_code
+        if name == 'query' and status == 200:
+            cached = bool(response.json().get('cached'))
+    except (requests.RequestException, ValueError):
+        status = None
+    return name, status, time.perf_counter() - start, cached
+
+
+def run_closed(base_url, mix, users, duration, timeout):
+    results = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def user():
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            result = send(session, base_url, mix.next(), timeout)
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=user) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_open(base_url, mix, rate, duration, timeout, max_inflight):
+    results = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def fire(request, scheduled):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        name, status, _, cached = send(local.session, base_url, request, timeout)
+        # Latency from the scheduled send time includes time spent waiting for a free client thread
+        with lock:
+            results.append((name, status, time.perf_counter() - scheduled, cached))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        for i in range(int(rate * duration)):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, mix.next(), scheduled)
+    return results
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(results, elapsed):
+    def stats(rows):
+        latencies = sorted(seconds for _, status, seconds, _ in rows if status is not None and status < 500)
+        errors = sum(1 for _, status, _, _ in rows if status is None or status >= 500)
+        answered = [cached for *_, cached in rows if cached is not None]
+        return {
+            'requests': len(rows),
+            'throughput_per_s': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'error_rate': errors / len(rows) if rows else 0.0,
+            'shed': sum(1 for _, status, _, _ in rows if status == 503),
+            'cached_rate': sum(answered) / len(answered) if answered else None,
+        }
+
+    summary = stats(results)
+    summary['endpoints'] = {name: stats([row for row in results if row[0] == name])
+                            for name in sorted({row[0] for row in results})}
+    return summary
+
+
+def format_rate(rate):
+    return '-' if rate is None else f"{rate:.0%}"
+
+
+def degradation(level, previous, p99_limit, max_error_rate, min_gain):
+    """Why a load level is past the knee, or None if it is not"""
+    if level['error_rate'] > max_error_rate:
+        return f"error rate {level['error_rate']:.1%} above {max_error_rate:.1%} at {level['load']:g}"
+    if level['p99_ms'] > p99_limit:
+        return f"p99 {level['p99_ms']:.0f} ms above {p99_limit:.0f} ms at {level['load']:g}"
+    if previous is not None and level['throughput_per_s'] < previous['throughput_per_s'] * (1 + min_gain):
+        return (f"throughput {level['throughput_per_s']:.2f}/s at {level['load']:g} gained less than "
+                f"{min_gain:.0%} over {previous['throughput_per_s']:.2f}/s")
+    return None
+
+
+def find_knee(levels, factor, max_error_rate=0.01, min_gain=0.1):
+    """(last load level before the first degraded one, reason it degraded)
+
+    The knee is None when even the lightest level degrades (errors above
+    max_error_rate); the reason is None when no level degrades.
+    """
+    if not levels:
+        return None, None
+    p99_limit = levels[0]['p99_ms'] * factor
+    knee, previous = None, None
+    for level in levels:
+        reason = degradation(level, previous, p99_limit, max_error_rate, min_gain)
+        if reason is not None:
+            return knee, reason
+        knee, previous = level['load'], level
+    return knee, None
+
+
+def wait_until_ready(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url + '/health', timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"Server at {base_url} did not become ready within {timeout}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Closed- and open-loop load test of the Flask API.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--users", help="Closed loop: comma-separated concurrent user counts")
+    group.add_argument("--rates", help="Open loop: comma-separated arrival rates (requests/s)")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Server base URL")
+    parser.add_argument("--start", help="Command that starts the server; stopped when the test ends")
+    parser.add_argument("--ready-timeout", type=float, default=300, help="Seconds to wait for --start")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per load level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=13, help="Seed of the request mix")
+    parser.add_argument("--questions", choices=QUESTION_MODES, default='perturbed',
+                        help="Perturb dataset questions so they miss the caches, or send them verbatim")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--max-inflight", type=int, default=256, help="Open loop: client threads")
+    parser.add_argument("--knee-factor", type=float, default=2.0, help="p99 growth that marks the knee")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="Error rate, 503 sheds included, that marks the knee")
+    parser.add_argument("--min-gain", type=float, default=0.1,
+                        help="Smallest relative throughput gain per level before the knee")
+    parser.add_argument("--output", help="Write all level summaries as JSON")
+    args = parser.parse_args()
+
+    server = None
+    if args.start:
+        server = subprocess.Popen(shlex.split(args.start), cwd=project_root)
+    try:
+        wait_until_ready(args.url, args.ready_timeout if server else 10)
+        questions = load_questions(DATA_PATH)
+        mode = 'closed' if args.users else 'open'
+        loads = [float(x) for x in (args.users or args.rates).split(',')]
+
+        levels = []
+        print(f"{mode}-loop, {args.duration:.0f}s per level, mix {args.mix}, {args.questions} questions")
+        print(f"{'load':>8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'shed':>6} "
+              f"{'cached':>7}")
+        for load in loads:
+            mix = RequestMix(questions, parse_mix(args.mix), args.seed, args.questions)
+            start = time.perf_counter()
+            if mode == 'closed':
+                results = run_closed(args.url, mix, int(load), args.duration, args.timeout)
+            else:
+                results = run_open(args.url, mix, load, args.duration, args.timeout, args.max_inflight)
+            summary = summarize(results, time.perf_counter() - start)
+            summary['load'] = load
+            levels.append(summary)
+            print(f"{load:>8g} {summary['throughput_per_s']:>8.2f} {summary['p50_ms']:>9.1f} "
+                  f"{summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f} {summary['error_rate']:>7.1%} "
+                  f"{summary['shed']:>6} {format_rate(summary['cached_rate']):>7}")
+
+        knee, reason = find_knee(levels, args.knee_factor, args.max_error_rate, args.min_gain)
+        unit = 'users' if mode == 'closed' else 'requests/s'
+        if knee is None:
+            print(f"Knee: below the lightest level ({reason})")
+        else:
+            print(f"Knee: {knee:g} {unit} ({reason or 'no level degraded'})")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'mode': mode, 'questions': args.questions, 'mix': args.mix, 'duration': args.duration,
+                           'seed': args.seed, 'knee': knee, 'knee_reason': reason, 'levels': levels}, f, indent=2)
+            print(f"✅ Results written to {args.output}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
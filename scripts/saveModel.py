@@ -1,28 +1,92 @@
-from transformers import AutoTokenizer, AutoModelForQuestionAnswering
+"""Save BioBERT locally as safetensors and verify the saved weights.
+
+Downloads the model from the Hub (or converts a local copy saved in the
+older pickle format), writes model.safetensors next to the tokenizer and
+checks every saved tensor against the model that was saved. The app then
+memory-maps these weights instead of unpickling them into each worker.
+
+    python scripts/saveModel.py
+"""
 import os
+import sys
 
-model_name = "ktrapeznikov/biobert_v1.1_pubmed_squad_v2"
+import torch
+from safetensors import safe_open
+from transformers import AutoTokenizer, AutoModelForQuestionAnswering
 
 # Get the directory where this script is located and go up one level to project root
 script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, script_dir)
+
+from biobert_qa import safetensors_files
+from memory_report import file_backed_bytes, object_bytes
+
+model_name = "ktrapeznikov/biobert_v1.1_pubmed_squad_v2"
 
 # Set path to model folder relative to the project root (universal for both OS)
 local_save_path = os.path.join(script_dir, "model", "biobert_v1.1_pubmed_squad_v2_local")
 
-# Create directory if it doesn't exist
-if not os.path.exists(local_save_path):
-    os.makedirs(local_save_path)
-
-    # Load from Hub and save locally
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForQuestionAnswering.from_pretrained(model_name)
-    
-    tokenizer.save_pretrained(local_save_path)
-    model.save_pretrained(local_save_path)
-    print(f"Model and tokenizer saved to {local_save_path}")
-else:
-    print(f"Model and tokenizer already exist at {local_save_path}")
-
-# Then in your run_inference function, you would load from local_save_path
-# tokenizer = AutoTokenizer.from_pretrained(local_save_path)
-# model = AutoModelForQuestionAnswering.from_pretrained(local_save_path)
\ No newline at end of file
+# Pickled weights written by older versions of this script
+LEGACY_WEIGHTS = ("pytorch_model.bin", "pytorch_model.bin.index.json")
+
+
+def verify_safetensors(path, model):
+    """Check every saved tensor equals the model's; returns the bytes checked"""
+    expected = model.state_dict()
+    files = safetensors_files(path)
+    if not files:
+        raise ValueError(f"No safetensors weights were written to {path}")
+    saved = set()
+    checked = 0
+    for file in files:
+        with safe_open(file, framework="pt") as f:
+            for name in f.keys():
+                tensor = f.get_tensor(name)
+                if name not in expected or not torch.equal(tensor, expected[name]):
+                    raise ValueError(f"Saved tensor '{name}' in {file} does not match the model")
+                saved.add(name)
+                checked += tensor.element_size() * tensor.nelement()
+    # Tied weights are saved once; the other names share that tensor's memory
+    saved_pointers = {expected[name].data_ptr() for name in saved}
+    missing = [name for name in expected if name not in saved and expected[name].data_ptr() not in saved_pointers]
+    if missing:
+        raise ValueError(f"Tensors missing from the safetensors files: {missing[:5]}")
+    return checked
+
+
+def check_mapped_load(path):
+    """Load the way BioBERT_QA does and report how much of the weights is file-backed"""
+    model = AutoModelForQuestionAnswering.from_pretrained(path, use_safetensors=True)
+    total = object_bytes(model)
+    backed = file_backed_bytes(model, safetensors_files(path))
+    if backed is None:
+        print("ℹ️ Cannot inspect memory mappings on this platform")
+    else:
+        print(f"📦 {backed / 2**20:.0f} of {total / 2**20:.0f} MiB of weights are memory-mapped from safetensors")
+
+
+if __name__ == "__main__":
+    if safetensors_files(local_save_path):
+        print(f"Model and tokenizer already exist at {local_save_path}")
+    else:
+        legacy = [name for name in LEGACY_WEIGHTS if os.path.exists(os.path.join(local_save_path, name))]
+        if legacy:
+            # Convert the pickled copy already on disk
+            tokenizer = AutoTokenizer.from_pretrained(local_save_path)
+            model = AutoModelForQuestionAnswering.from_pretrained(local_save_path, use_safetensors=False)
+        else:
+            # Load from Hub and save locally
+            os.makedirs(local_save_path, exist_ok=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModelForQuestionAnswering.from_pretrained(model_name)
+
+        tokenizer.save_pretrained(local_save_path)
+        model.save_pretrained(local_save_path, safe_serialization=True)
+        checked = verify_safetensors(local_save_path, model)
+        print(f"✅ Verified {checked / 2**20:.0f} MiB of safetensors weights")
+        for name in legacy:
+            os.remove(os.path.join(local_save_path, name))
+            print(f"🗑️ Removed pickled weights {name}")
+        print(f"Model and tokenizer saved to {local_save_path}")
+
+    check_mapped_load(local_save_path)
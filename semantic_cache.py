@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """Bounded cache from query embeddings to final answer payloads.
+
+    A lookup returns the payload of the most similar cached query when their
+    cosine similarity reaches ``threshold``, so paraphrases such as "chemo
+    side effects?" and "Side effects of chemotherapy?" share one answer.
+    Entries expire after ``ttl`` seconds, the least recently used entry is
+    evicted when the cache is full, and everything is dropped when the
+    knowledge base ``version`` passed to :meth:`get`/:meth:`put` changes.
+    ``max_entries=0`` turns the cache off: nothing is stored and every
+    lookup misses.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, threshold=0.92, clock=time.monotonic):
+        self.max_entries = max(max_entries, 0)
+        self.ttl = ttl
+        self.threshold = threshold
+        self.clock = clock
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._vectors = None
+        self._payloads = [None] * self.max_entries
+        self._expires = np.full(self.max_entries, -np.inf)
+        # Occupied slots, least recently used first, and unused slots
+        self._lru = OrderedDict()
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._clear()
+            self.version = version
+
+    def __len__(self):
+        return len(self._lru)
+
+    def get(self, embedding, version=None):
+        """Cached payload for a normalized query embedding, or None"""
+        with self._lock:
+            self._check_version(version)
+            if not self._lru:
+                self.misses += 1
+                return None
+            slots = np.fromiter(self._lru, dtype=np.int64, count=len(self._lru))
+            similarities = self._vectors[slots] @ np.asarray(embedding, dtype=np.float32)
+            similarities[self._expires[slots] <= self.clock()] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            self._lru.move_to_end(int(slots[best]))
+            self.hits += 1
+            return self._payloads[slots[best]]
+
+    def put(self, embedding, payload, version=None):
+        if self.max_entries == 0:
+            return
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(embedding)), dtype=np.float32)
+            now = self.clock()
+            for slot in [slot for slot in self._lru if self._expires[slot] <= now]:
+                del self._lru[slot]
+                self._payloads[slot] = None
+                self._free.append(slot)
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot, _ = self._lru.popitem(last=False)
+            self._vectors[slot] = embedding
+            self._payloads[slot] = payload
+            self._expires[slot] = now + self.ttl
+            self._lru[slot] = None
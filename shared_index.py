@@ -0,0 +1,60 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+
+@contextmanager
+def atomic_write(path, mode='wb'):
+    """Write to a temporary file and move it over ``path`` once complete.
+
+    Readers in other processes either see the previous file or the finished
+    new one, never a partially written file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def array_path(directory, name):
+    return os.path.join(directory, name + ".npy")
+
+
+def publish_array(directory, name, array):
+    """Write ``array`` as ``<directory>/<name>.npy`` for other processes to attach"""
+    os.makedirs(directory, exist_ok=True)
+    with atomic_write(array_path(directory, name)) as f:
+        np.save(f, np.ascontiguousarray(array))
+
+
+def attach_array(directory, name):
+    """Read-only memory-mapped view of a published array, or None if missing.
+
+    Every process attaching the same file maps the same page-cache pages, so
+    the array costs its size once per host rather than once per worker.
+    """
+    path = array_path(directory, name)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r')
+
+
+def spill_array(array):
+    """Read-only memory-mapped copy of ``array`` in an unnamed temporary file.
+
+    For arrays that are read a few rows at a time: the rows live in the page
+    cache, which the OS can drop under memory pressure, instead of in the
+    process heap.
+    """
+    array = np.ascontiguousarray(array)
+    with tempfile.TemporaryFile() as f:
+        f.write(array.tobytes())
+        f.flush()
+        # The mapping keeps the file alive after it is closed
+        return np.memmap(f, dtype=array.dtype, mode='r', shape=array.shape)
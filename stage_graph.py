@@ -0,0 +1,96 @@
+import contextvars
+import threading
+from concurrent.futures import Future
+
+
+class StageGraph:
+    """Named pipeline stages with explicit dependencies.
+
+    Each stage is a function of the results of the stages (or run inputs)
+    it lists in ``after``. A run starts every stage as soon as its inputs
+    are ready, so independent stages overlap on the executor and a stage
+    never occupies a thread while waiting. Stages may only depend on
+    inputs or earlier stages, so the graph cannot contain a cycle. Stages
+    see the context variables (e.g. the request trace) of the caller of run.
+    """
+
+    def __init__(self, inputs=()):
+        self.inputs = tuple(inputs)
+        self.stages = {}
+
+    def add(self, name, fn, after=()):
+        unknown = [dep for dep in after if dep not in self.stages and dep not in self.inputs]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on undefined stages: {unknown}")
+        if name in self.stages or name in self.inputs:
+            raise ValueError(f"Stage '{name}' is already defined")
+        self.stages[name] = (fn, tuple(after))
+        return self
+
+    def run(self, executor=None, **inputs):
+        """Start all stages; without an executor they run inline, in order"""
+        missing = set(self.inputs) - set(inputs)
+        if missing:
+            raise ValueError(f"Missing run inputs: {sorted(missing)}")
+        return StageRun(self, executor, inputs)
+
+
+class StageRun:
+    """One execution of a StageGraph; result(name) waits for a stage"""
+
+    def __init__(self, graph, executor, inputs):
+        self.executor = executor
+        self.context = contextvars.copy_context()
+        self.futures = {}
+        for name, value in inputs.items():
+            future = self.futures[name] = Future()
+            future.set_result(value)
+        for name in graph.stages:
+            self.futures[name] = Future()
+        for name, (fn, after) in graph.stages.items():
+            self._schedule(name, fn, after)
+
+    def result(self, name, timeout=None):
+        return self.futures[name].result(timeout)
+
+    def _schedule(self, name, fn, after):
+        future = self.futures[name]
+        deps = [self.futures[dep] for dep in after]
+
+        def execute():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                # One copy per stage: a context cannot be entered by two threads at once
+                future.set_result(self.context.copy().run(fn, *[dep.result() for dep in deps]))
+            except BaseException as e:
+                future.set_exception(e)
+
+        def launch():
+            failed = next((dep for dep in deps if dep.exception() is not None), None)
+            if failed is not None:
+                future.set_exception(failed.exception())
+            elif self.executor is None:
+                execute()
+            else:
+                try:
+                    self.executor.submit(execute)
+                except RuntimeError as e:
+                    # Executor shut down: fail the stage rather than leave it pending
+                    future.set_exception(e)
+
+        if not deps:
+            launch()
+            return
+        lock = threading.Lock()
+        waiting = [len(deps)]
+
+        def dependency_done(_):
+            with lock:
+                waiting[0] -= 1
+                ready = waiting[0] == 0
+            if ready:
+                launch()
+
+        for dep in deps:
+            dep.add_done_callback(dependency_done)
@@ -418,6 +418,125 @@ class CancerChatbot {
     }
 }
 
+// Typeahead suggestions of known questions from /api/suggest
+class QuestionSuggestions {
+    constructor(input, { limit = 8, delay = 80 } = {}) {
+        this.input = input;
+        this.limit = limit;
+        this.delay = delay;
+        this.items = [];
+        this.active = -1;
+        this.timer = null;
+        this.controller = null;
+
+        this.list = document.createElement('ul');
+        this.list.className = 'suggestion-list';
+        this.list.id = `${input.id}Suggestions`;
+        this.list.setAttribute('role', 'listbox');
+        input.setAttribute('aria-controls', this.list.id);
+        input.setAttribute('aria-autocomplete', 'list');
+        input.parentElement.classList.add('suggestion-anchor');
+        input.parentElement.appendChild(this.list);
+
+        input.addEventListener('input', () => this.schedule());
+        input.addEventListener('keydown', (e) => this.handleKeydown(e));
+        input.addEventListener('blur', () => setTimeout(() => this.hide(), 150));
+        // mousedown fires before the input loses focus
+        this.list.addEventListener('mousedown', (e) => {
+            const item = e.target.closest('.suggestion-item');
+            if (item) {
+                e.preventDefault();
+                this.choose(Number(item.dataset.index));
+            }
+        });
+    }
+
+    schedule() {
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.fetchSuggestions(), this.delay);
+    }
+
+    async fetchSuggestions() {
+        const query = this.input.value.trim();
+        if (query.length < 2) {
+            this.hide();
+            return;
+        }
+        // Only the answer to the latest keystroke matters
+        if (this.controller) {
+            this.controller.abort();
+        }
+        this.controller = new AbortController();
+        try {
+            const response = await fetch(`/api/suggest?q=${encodeURIComponent(query)}&limit=${this.limit}`,
+                                         { signal: this.controller.signal });
+            const data = await response.json();
+            this.show(data.suggestions || []);
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                this.hide();
+            }
+        }
+    }
+
+    show(items) {
+        this.items = items;
+        this.active = -1;
+        this.list.innerHTML = '';
+        items.forEach((item, index) => {
+            const li = document.createElement('li');
+            li.className = `suggestion-item suggestion-${item.type}`;
+            li.dataset.index = index;
+            li.setAttribute('role', 'option');
+            const icon = item.type === 'topic' ? 'fas fa-tag' : 'fas fa-search';
+            li.innerHTML = `<i class="${icon} me-2"></i>`;
+            li.appendChild(document.createTextNode(item.text));
+            this.list.appendChild(li);
+        });
+        this.list.classList.toggle('open', items.length > 0);
+    }
+
+    hide() {
+        this.items = [];
+        this.active = -1;
+        this.list.classList.remove('open');
+    }
+
+    highlight(index) {
+        const options = this.list.querySelectorAll('.suggestion-item');
+        options.forEach((li, i) => li.classList.toggle('active', i === index));
+        this.active = index;
+    }
+
+    choose(index) {
+        const item = this.items[index];
+        if (!item) return;
+        this.input.value = item.text;
+        this.hide();
+        this.input.focus();
+        this.input.dispatchEvent(new Event('input'));
+        clearTimeout(this.timer);
+    }
+
+    handleKeydown(e) {
+        if (!this.items.length) return;
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            const step = e.key === 'ArrowDown' ? 1 : -1;
+            this.highlight((this.active + step + this.items.length) % this.items.length);
+        } else if (e.key === 'Enter' && this.active >= 0) {
+            // Pick the suggestion instead of sending what was typed
+            e.preventDefault();
+            e.stopImmediatePropagation();
+            this.choose(this.active);
+        } else if (e.key === 'Escape') {
+            this.hide();
+        } else if (e.key === 'Enter') {
+            this.hide();
+        }
+    }
+}
+
 // Treatment Chart Functionality
 async function loadTreatmentChart() {
     try {
@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import json
+import os
+
+from shared_index import atomic_write
+
+try:
+    import brotli
+except ImportError:
+    # .br variants are skipped; browsers are served gzip instead
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+
+# Every fingerprinted name any build has written, kept servable after redeploys
+BUILT_NAME = 'built.json'
+
+# Served with every fingerprinted file: its name changes whenever its bytes do
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Only text formats are worth compressing; images and fonts already are
+COMPRESSIBLE = ('.css', '.js', '.json', '.svg', '.txt', '.map', '.html')
+
+# Preferred first when the client accepts both
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def content_hash(data, length=12):
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def fingerprinted_name(filename, digest):
+    """css/style.css -> css/style.<digest>.css"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{digest}{ext}"
+
+
+def compressors():
+    """Encodings this build can write, as (suffix, compress function)"""
+    found = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        found.insert(0, ('.br', lambda data: brotli.compress(data, quality=11)))
+    return found
+
+
+def build_assets(static_dir, output_dir):
+    """Write fingerprinted copies of every file under static_dir to output_dir.
+
+    Text files also get .br/.gz variants when those are smaller. The
+    manifest mapping source names to fingerprinted names is replaced last,
+    so a server reading it only ever sees files that are fully written.
+    Earlier builds' files are left in place, and listed with the new ones
+    in built.json, so pages rendered before a deploy still load theirs.
+    Returns the manifest.
+    """
+    output_dir = os.path.abspath(output_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != output_dir)
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+            hashed = fingerprinted_name(filename, content_hash(data))
+            target = os.path.join(output_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write_once(target, data)
+            if filename.endswith(COMPRESSIBLE):
+                for suffix, compress in compressors():
+                    compressed = compress(data)
+                    if len(compressed) < len(data):
+                        _write_once(target + suffix, compressed)
+            manifest[filename] = hashed
+    os.makedirs(output_dir, exist_ok=True)
+    built = sorted(set(_read_json(os.path.join(output_dir, BUILT_NAME), [])) | set(manifest.values()))
+    with atomic_write(os.path.join(output_dir, BUILT_NAME), 'w') as f:
+        json.dump(built, f, indent=2)
+    with atomic_write(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_once(path, data):
+    # Same name, same bytes: a file from an earlier build is already right
+    if not os.path.exists(path):
+        with atomic_write(path) as f:
+            f.write(data)
+
+
+def accepted_encodings(header):
+    """Content codings the Accept-Encoding header allows (q > 0)"""
+    accepted = set()
+    refused = set()
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        (accepted if q > 0 else refused).add(coding)
+    if '*' in accepted:
+        accepted.update(coding for coding, _ in ENCODINGS if coding not in refused)
+    return accepted
+
+
+class AssetManifest:
+    """Fingerprinted names written by scripts/build_assets.py.
+
+    url() gives the name a template should link to; variant() picks the
+    file to send for a request, for the current build or any earlier one
+    still on disk. With no manifest (assets not built) every lookup misses
+    and templates fall back to the plain static files.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.names = _read_json(os.path.join(directory, MANIFEST_NAME), {})
+        self.served = set(_read_json(os.path.join(directory, BUILT_NAME), [])) | set(self.names.values())
+
+    def url(self, filename):
+        """Fingerprinted name of a static file, or None if it was not built"""
+        return self.names.get(filename)
+
+    def variant(self, hashed, accept_encoding):
+        """(file name, content coding or None) to send, or None if unknown"""
+        if hashed not in self.served or not os.path.exists(os.path.join(self.directory, hashed)):
+            return None
+        accepted = accepted_encodings(accept_encoding)
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and os.path.exists(os.path.join(self.directory, hashed + suffix)):
+                return hashed + suffix, coding
+        return hashed, None
+
+    def __len__(self):
+        return len(self.names)
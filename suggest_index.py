@@ -0,0 +1,129 @@
+from bisect import bisect_left
+
+from answer_table import normalize_question
+
+# Sorts after every character a normalized key can contain
+_KEY_END = "\U0010ffff"
+
+
+class SuggestionIndex:
+    """Typeahead over knowledge base questions and focus (topic) names.
+
+    Keys are normalized texts in one sorted list. A question is indexed
+    from its start and from the start of each later word, so "lung" finds
+    "What are the symptoms of lung cancer ?", ranked after texts that
+    start with the prefix. Ties are broken by a popularity rank computed
+    at build time: how many rows share the normalized question, then how
+    many questions its topic has.
+
+    A lookup is a binary search for the prefix range and a sort of at
+    most scan_limit entries; prefixes matching more keys than that (short
+    ones such as "wh") have their results precomputed.
+    """
+
+    def __init__(self, texts, kinds, keys, key_texts, key_ranks, top, max_results, min_chars):
+        self.texts = texts
+        self.kinds = kinds
+        self.keys = keys
+        self.key_texts = key_texts
+        self.key_ranks = key_ranks
+        self.top = top
+        self.max_results = max_results
+        self.min_chars = min_chars
+
+    @classmethod
+    def build(cls, questions, max_results=10, scan_limit=256, min_chars=2):
+        """Index (question, focus name) pairs; each distinct focus name is a topic"""
+        question_counts = {}
+        focus_counts = {}
+        first_text = {}
+        focus_of = {}
+        for question, focus in questions:
+            key = normalize_question(question)
+            if not key:
+                continue
+            question_counts[key] = question_counts.get(key, 0) + 1
+            first_text.setdefault(key, question.strip())
+            focus_of.setdefault(key, focus)
+            if focus:
+                focus_counts[focus] = focus_counts.get(focus, 0) + 1
+
+        texts, kinds, popularity = [], [], []
+        for key, count in question_counts.items():
+            texts.append(first_text[key])
+            kinds.append('question')
+            popularity.append((-count, -focus_counts.get(focus_of[key], 0), len(first_text[key]), first_text[key]))
+        for focus, count in focus_counts.items():
+            texts.append(focus)
+            kinds.append('topic')
+            popularity.append((0, -count, len(focus), focus))
+        rank_of = {text_id: rank for rank, text_id in enumerate(sorted(range(len(texts)), key=popularity.__getitem__))}
+
+        # (key, text id, rank): matches at the start of a text outrank matches inside it
+        entries = []
+        for text_id, text in enumerate(texts):
+            key = normalize_question(text)
+            entries.append((key, text_id, rank_of[text_id]))
+            for i, char in enumerate(key):
+                if char == ' ':
+                    entries.append((key[i + 1:], text_id, len(texts) + rank_of[text_id]))
+        entries.sort()
+        keys = [key for key, _, _ in entries]
+        key_texts = [text_id for _, text_id, _ in entries]
+        key_ranks = [rank for _, _, rank in entries]
+
+        index = cls(texts, kinds, keys, key_texts, key_ranks, {}, max_results, min_chars)
+        index.top = index._precompute(scan_limit)
+        return index
+
+    def _best(self, lo, hi, limit):
+        """Best-ranked distinct texts among keys[lo:hi]"""
+        best = []
+        for position in sorted(range(lo, hi), key=self.key_ranks.__getitem__):
+            text_id = self.key_texts[position]
+            if text_id not in best:
+                best.append(text_id)
+                if len(best) == limit:
+                    break
+        return tuple(best)
+
+    def _precompute(self, scan_limit):
+        """Results of every prefix matching more than scan_limit keys"""
+        top = {}
+        # Ranges of keys still sharing a too-wide prefix, refined one character at a time
+        ranges = [(0, len(self.keys))]
+        length = self.min_chars
+        while ranges:
+            wider = []
+            for lo, hi in ranges:
+                start = lo
+                while start < hi:
+                    if len(self.keys[start]) < length:
+                        start += 1
+                        continue
+                    prefix = self.keys[start][:length]
+                    end = bisect_left(self.keys, prefix + _KEY_END, start, hi)
+                    if end - start > scan_limit:
+                        top[prefix] = self._best(start, end, self.max_results)
+                        wider.append((start, end))
+                    start = end
+            ranges = wider
+            length += 1
+        return top
+
+    def suggest(self, text, limit=8):
+        """Up to limit {'text', 'type'} suggestions for what the user has typed so far"""
+        prefix = normalize_question(text)
+        if len(prefix) < self.min_chars:
+            return []
+        # Negative or zero limits would slice from the end or scan the whole range
+        limit = max(1, min(limit, self.max_results))
+        text_ids = self.top.get(prefix)
+        if text_ids is None:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + _KEY_END, lo)
+            text_ids = self._best(lo, hi, limit)
+        return [{'text': self.texts[i], 'type': self.kinds[i]} for i in text_ids[:limit]]
+
+    def __len__(self):
+        return len(self.texts)
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AdmissionController, Deadline, Overloaded
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest.TestCase):
+    """Test cases for Deadline class"""
+
+    def test_expiry(self):
+        """Test that a deadline expires once its budget is spent"""
+        clock = FakeClock()
+        deadline = Deadline(2.0, clock=clock)
+
+        self.assertFalse(deadline.expired())
+        clock.now = 1.5
+        self.assertAlmostEqual(deadline.remaining(), 0.5)
+        clock.now = 2.0
+        self.assertTrue(deadline.expired())
+        self.assertEqual(deadline.remaining(), 0.0)
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for AdmissionController class"""
+
+    def test_sheds_when_queue_is_full(self):
+        """Test that requests beyond running plus queued slots are shed"""
+        controller = AdmissionController(max_concurrent=1, max_queue=1, retry_after=3)
+        release = threading.Event()
+        entered = threading.Event()
+
+        def running():
+            with controller.slot():
+                entered.set()
+                release.wait(5)
+
+        runner = threading.Thread(target=running)
+        runner.start()
+        entered.wait(5)
+        waiter = threading.Thread(target=controller.admit)
+        waiter.start()
+        for _ in range(5000):
+            if controller.pending == 2:
+                break
+            threading.Event().wait(0.001)
+
+        with self.assertRaises(Overloaded) as context:
+            controller.admit()
+        self.assertEqual(context.exception.retry_after, 3)
+        self.assertEqual(controller.shed, 1)
+
+        release.set()
+        runner.join(5)
+        waiter.join(5)
+        self.assertEqual(controller.admitted, 2)
+
+    def test_queue_wait_times_out(self):
+        """Test that a request waiting past its timeout is shed"""
+        controller = AdmissionController(max_concurrent=1, max_queue=4)
+        controller.admit()
+
+        with self.assertRaises(Overloaded):
+            controller.admit(timeout=0.01)
+        self.assertEqual(controller.pending, 1)
+        self.assertEqual(controller.shed, 1)
+
+    def test_slot_released_after_error(self):
+        """Test that a failing request gives its slot back"""
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+
+        with self.assertRaises(RuntimeError):
+            with controller.slot():
+                raise RuntimeError("model crashed")
+
+        with controller.slot():
+            self.assertEqual(controller.pending, 1)
+        self.assertEqual(controller.pending, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add the scripts directory to the path to import the bulk answering script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import answer_bulk
+from answer_bulk import answer_batch, batches, load_checkpoint, read_questions, write_results
+
+
+class TestAnswerBulk(unittest.TestCase):
+    """Test cases for the resumable bulk answering script"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return path
+
+    def test_read_questions_csv(self):
+        """Test that CSV questions are read with their positions, stripped"""
+        path = self.write('questions.csv', 'id,question\n1,  What is lung cancer? \n2,"Is it, really?"\n3,\n')
+
+        self.assertEqual(list(read_questions(path, 'question')),
+                         [(0, 'What is lung cancer?'), (1, 'Is it, really?'), (2, '')])
+
+    def test_read_questions_jsonl(self):
+        """Test that JSONL records are read and blank lines skipped"""
+        path = self.write('questions.jsonl', '{"q": "What is melanoma?"}\n\n{"q": null}\n')
+
+        self.assertEqual(list(read_questions(path, 'q')), [(0, 'What is melanoma?'), (1, '')])
+
+    def test_read_questions_missing_field(self):
+        """Test that a record without the question field is rejected"""
+        path = self.write('questions.jsonl', '{"question": "ok"}\n{"text": "no field"}\n')
+
+        with self.assertRaises(ValueError):
+            list(read_questions(path, 'question'))
+
+    def test_load_checkpoint_missing_file(self):
+        """Test that a new output file has nothing answered"""
+        self.assertEqual(load_checkpoint(os.path.join(self.temp_dir, 'answers.jsonl')), {})
+
+    def test_load_checkpoint_truncates_partial_line(self):
+        """Test that a line cut short by an interruption is dropped from the file"""
+        complete = json.dumps({'index': 0, 'question': 'a', 'response': 'x'}) + '\n'
+        path = self.write('answers.jsonl', complete + '{"index": 1, "quest')
+
+        self.assertEqual(load_checkpoint(path), {0: 'a'})
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), complete)
+
+    def test_write_results_then_resume(self):
+        """Test that written results are found again by load_checkpoint"""
+        path = os.path.join(self.temp_dir, 'answers.jsonl')
+        with open(path, 'a', encoding='utf-8') as out:
+            write_results(out, [{'index': 3, 'question': 'q3', 'response': 'r'}])
+
+        self.assertEqual(load_checkpoint(path), {3: 'q3'})
+
+    def test_batches_skip_done_indices(self):
+        """Test that answered questions are skipped and batches are filled to size"""
+        questions = [(i, f'q{i}') for i in range(6)]
+
+        result = list(batches(iter(questions), {1: 'q1', 4: 'q4'}, 3))
+
+        self.assertEqual(result, [[(0, 'q0'), (2, 'q2'), (3, 'q3')], [(5, 'q5')]])
+
+    def test_batches_reject_changed_input(self):
+        """Test that resuming against a different question at an answered index fails"""
+        with self.assertRaises(ValueError):
+            list(batches(iter([(0, 'q0'), (1, 'changed')]), {1: 'q1'}, 2))
+
+    def test_answer_batch_marks_empty_questions(self):
+        """Test that empty questions get an error and the rest are answered in order"""
+        pipeline = MagicMock()
+        pipeline.answer_batch.return_value = [{'response': 'a'}, {'response': 'b'}]
+        with patch.object(answer_bulk, '_pipeline', pipeline):
+            results = answer_batch([(0, 'q0'), (1, ''), (2, 'q2')])
+
+        pipeline.answer_batch.assert_called_once_with(['q0', 'q2'])
+        self.assertEqual(results, [
+            {'index': 0, 'question': 'q0', 'response': 'a'},
+            {'index': 1, 'question': '', 'error': 'empty question'},
+            {'index': 2, 'question': 'q2', 'response': 'b'},
+        ])
+
+    def test_answer_batch_pipeline_failure(self):
+        """Test that a pipeline exception becomes an error on every question of the batch"""
+        pipeline = MagicMock()
+        pipeline.answer_batch.side_effect = RuntimeError("out of memory")
+        with patch.object(answer_bulk, '_pipeline', pipeline):
+            results = answer_batch([(0, 'q0'), (1, 'q1')])
+
+        self.assertEqual([result['error'] for result in results], ['out of memory', 'out of memory'])
+        self.assertEqual([result['index'] for result in results], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_dedup import content_hash, MinHasher, deduplicate_answers
+
+
+BASE_ANSWER = (
+    "Chemotherapy is a cancer treatment that uses drugs to stop the growth of cancer cells, "
+    "either by killing the cells or by stopping them from dividing. When chemotherapy is taken "
+    "by mouth or injected into a vein or muscle, the drugs enter the bloodstream and can reach "
+    "cancer cells throughout the body."
+)
+
+
+class TestContentHash(unittest.TestCase):
+    """Test cases for content_hash function"""
+
+    def test_whitespace_and_case_insensitive(self):
+        """Test that formatting-only differences hash equal"""
+        self.assertEqual(content_hash("Key  Points\n - A"), content_hash("key points - a"))
+
+    def test_different_text(self):
+        """Test that different texts hash differently"""
+        self.assertNotEqual(content_hash("surgery"), content_hash("radiation"))
+
+
+class TestMinHasher(unittest.TestCase):
+    """Test cases for MinHasher class"""
+
+    def test_signature_is_deterministic(self):
+        """Test that equal texts produce equal signatures"""
+        hasher = MinHasher(num_perm=32)
+        self.assertTrue((hasher.signature(BASE_ANSWER) == hasher.signature(BASE_ANSWER)).all())
+        self.assertEqual(len(hasher.signature(BASE_ANSWER)), 32)
+
+    def test_similar_texts_agree_more(self):
+        """Test that near-identical texts share more signature slots"""
+        hasher = MinHasher(num_perm=128)
+        near = BASE_ANSWER.replace("muscle", "tissue")
+        far = "Radiation therapy uses high-energy beams to destroy cancer cells and shrink tumors."
+
+        near_agreement = (hasher.signature(BASE_ANSWER) == hasher.signature(near)).mean()
+        far_agreement = (hasher.signature(BASE_ANSWER) == hasher.signature(far)).mean()
+        self.assertGreater(near_agreement, 0.6)
+        self.assertLess(far_agreement, 0.1)
+
+
+class TestDeduplicateAnswers(unittest.TestCase):
+    """Test cases for deduplicate_answers function"""
+
+    def test_exact_duplicates_share_id(self):
+        """Test exact dedup keeps the first occurrence"""
+        answers = ["A answer", "B answer", "a  answer", "B answer"]
+        unique, ids = deduplicate_answers(answers)
+
+        self.assertEqual(unique, ["A answer", "B answer"])
+        self.assertEqual(ids.tolist(), [0, 1, 0, 1])
+
+    def test_near_duplicates_off_by_default(self):
+        """Test near duplicates are kept apart without a threshold"""
+        answers = [BASE_ANSWER, BASE_ANSWER.replace("muscle", "tissue")]
+        unique, ids = deduplicate_answers(answers)
+
+        self.assertEqual(len(unique), 2)
+        self.assertEqual(ids.tolist(), [0, 1])
+
+    def test_near_duplicates_merged_with_threshold(self):
+        """Test MinHash near dedup maps near copies to one canonical id"""
+        other = "Radiation therapy uses high-energy beams to destroy cancer cells and shrink tumors."
+        answers = [other, BASE_ANSWER, BASE_ANSWER.replace("muscle", "tissue"), BASE_ANSWER]
+        unique, ids = deduplicate_answers(answers, near_threshold=0.5)
+
+        self.assertEqual(unique, [other, BASE_ANSWER])
+        self.assertEqual(ids.tolist(), [0, 1, 1, 1])
+
+    def test_empty_input(self):
+        """Test empty answer list"""
+        unique, ids = deduplicate_answers([], near_threshold=0.8)
+        self.assertEqual(unique, [])
+        self.assertEqual(len(ids), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
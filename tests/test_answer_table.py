@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_table import AnswerTable, normalize_question
+
+
+class TestNormalizeQuestion(unittest.TestCase):
+    """Test cases for normalize_question function"""
+
+    def test_case_punctuation_and_spaces(self):
+        """Test that formatting differences normalize away"""
+        self.assertEqual(normalize_question("  Side effects of  CHEMOTHERAPY?? "), "side effects of chemotherapy")
+
+    def test_accents_kept(self):
+        """Test that accented letters survive normalization"""
+        self.assertEqual(normalize_question("Qu’est-ce que la chimiothérapie ?"), "qu est ce que la chimiothérapie")
+
+
+class TestAnswerTable(unittest.TestCase):
+    """Test cases for AnswerTable class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.payloads = {
+            "What is (are) Breast Cancer ?": {"response": "a disease", "tokens": ["breast", "cancer"]},
+            "Side effects of chemotherapy?": {"response": "nausea", "tokens": ["effect"]},
+        }
+        self.table = AnswerTable.build(self.payloads, meta={"version": "v1"})
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_exact_and_normalized_lookup(self):
+        """Test lookups by exact and normalized question"""
+        self.assertEqual(self.table.get("Side effects of chemotherapy?"), {"response": "nausea", "tokens": ["effect"]})
+        self.assertEqual(self.table.get("side effects of chemotherapy")["response"], "nausea")
+        self.assertEqual(self.table.get("what is are breast cancer")["response"], "a disease")
+
+    def test_unknown_question(self):
+        """Test that an unknown question misses"""
+        self.assertIsNone(self.table.get("How much does surgery cost?"))
+
+    def test_save_and_load(self):
+        """Test that a saved table reloads with the same entries"""
+        self.table.save(self.temp_dir)
+        loaded = AnswerTable.load(self.temp_dir)
+
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(loaded.meta, {"version": "v1"})
+        self.assertEqual(loaded.get("SIDE EFFECTS OF CHEMOTHERAPY")["response"], "nausea")
+
+    def test_load_missing(self):
+        """Test loading from a directory without a table"""
+        self.assertIsNone(AnswerTable.load(self.temp_dir))
+
+    def test_empty_table(self):
+        """Test an empty table"""
+        table = AnswerTable.build({})
+        self.assertIsNone(table.get("anything"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -8,7 +8,7 @@ import shutil
 # Add the parent directory to the path to import modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from biobert_qa import BioBERT_QA, clean_context
+from biobert_qa import MAX_LENGTH, BioBERT_QA, clean_context, safetensors_files
 
 
 class TestCleanContext(unittest.TestCase):
@@ -126,13 +126,13 @@ class TestBioBERTQA(unittest.TestCase):
         mock_tokenizer_instance = MagicMock()
         mock_tokenizer.return_value = mock_tokenizer_instance
         
-        # Mock encode_plus output
+        # Mock tokenizer output
         mock_inputs = {
             "input_ids": MagicMock(),
             "attention_mask": MagicMock()
         }
         mock_inputs["input_ids"].tolist.return_value = [[101, 2054, 2003, 3252, 1029, 102, 3252, 2003, 1037, 4168, 102]]
-        mock_tokenizer_instance.encode_plus.return_value = mock_inputs
+        mock_tokenizer_instance.return_value = mock_inputs
         
         # Mock model
         mock_model_instance = MagicMock()
@@ -169,9 +169,10 @@ class TestBioBERTQA(unittest.TestCase):
             # Check that we got a meaningful answer
             self.assertEqual(result, "cancer is a disease")
             
-            # Verify that encode_plus was called with correct parameters
-            mock_tokenizer_instance.encode_plus.assert_called_once_with(
-                question, context, add_special_tokens=True, return_tensors="pt"
+            # Verify that the tokenizer was called with correct parameters
+            mock_tokenizer_instance.assert_called_once_with(
+                question, context, add_special_tokens=True, truncation="only_second",
+                max_length=MAX_LENGTH, return_tensors="pt"
             )
             
         finally:
@@ -188,13 +189,13 @@ class TestBioBERTQA(unittest.TestCase):
         mock_tokenizer_instance = MagicMock()
         mock_tokenizer.return_value = mock_tokenizer_instance
         
-        # Mock encode_plus output
+        # Mock tokenizer output
         mock_inputs = {
             "input_ids": MagicMock(),
             "attention_mask": MagicMock()
         }
         mock_inputs["input_ids"].tolist.return_value = [[101, 2054, 2003, 3252, 1029, 102]]
-        mock_tokenizer_instance.encode_plus.return_value = mock_inputs
+        mock_tokenizer_instance.return_value = mock_inputs
         
         # Mock model
         mock_model_instance = MagicMock()
@@ -243,13 +244,13 @@ class TestBioBERTQA(unittest.TestCase):
         mock_tokenizer_instance = MagicMock()
         mock_tokenizer.return_value = mock_tokenizer_instance
         
-        # Mock encode_plus output
+        # Mock tokenizer output
         mock_inputs = {
             "input_ids": MagicMock(),
             "attention_mask": MagicMock()
         }
         mock_inputs["input_ids"].tolist.return_value = [[101, 102]]
-        mock_tokenizer_instance.encode_plus.return_value = mock_inputs
+        mock_tokenizer_instance.return_value = mock_inputs
         
         # Mock model
         mock_model_instance = MagicMock()
@@ -287,6 +288,95 @@ class TestBioBERTQA(unittest.TestCase):
         finally:
             os.chdir(original_cwd)
 
+    @patch('biobert_qa.AutoTokenizer.from_pretrained')
+    @patch('biobert_qa.AutoModelForQuestionAnswering.from_pretrained')
+    def test_answer_questions_padded_batches(self, mock_model, mock_tokenizer):
+        """Test batched answering masks padding and keeps pair order"""
+        import torch
+
+        mock_tokenizer_instance = MagicMock()
+        mock_tokenizer.return_value = mock_tokenizer_instance
+        mock_tokenizer_instance.return_value = {
+            "input_ids": torch.tensor([[101, 7, 8, 9, 102], [101, 5, 102, 0, 0]]),
+            "attention_mask": torch.tensor([[1, 1, 1, 1, 1], [1, 1, 1, 0, 0]])
+        }
+        mock_tokenizer_instance.convert_ids_to_tokens.side_effect = lambda ids: [str(i) for i in ids]
+        mock_tokenizer_instance.convert_tokens_to_string.side_effect = lambda tokens: " ".join(tokens)
+
+        mock_model_instance = MagicMock()
+        mock_model.return_value = mock_model_instance
+        outputs = MagicMock()
+        # Padding positions carry the highest logits and must be ignored
+        outputs.start_logits = torch.tensor([[0., 5., 1., 0., 0.], [0., 3., 0., 9., 9.]])
+        outputs.end_logits = torch.tensor([[0., 0., 1., 5., 0.], [0., 3., 0., 9., 9.]])
+        mock_model_instance.return_value = outputs
+
+        qa_model = BioBERT_QA()
+        answers = qa_model.answer_questions([("q1", "c1"), ("q2", "c2")], batch_size=2)
+
+        self.assertEqual(answers, ["7 8 9", "5"])
+        mock_tokenizer_instance.assert_called_once_with(
+            ["q1", "q2"], ["c1", "c2"],
+            add_special_tokens=True, padding=True, truncation="only_second", max_length=MAX_LENGTH,
+            return_tensors="pt"
+        )
+
+    def test_long_context_same_answer_both_paths(self):
+        """Test a context past the model's length is cut the same way by the single and batched paths"""
+        import torch
+        from transformers import BertConfig, BertForQuestionAnswering, BertTokenizerFast
+
+        words = ["cancer", "cells", "grow", "chemotherapy", "treats", "tumors", "what", "is", "the"]
+        vocab_path = os.path.join(self.temp_dir, "vocab.txt")
+        with open(vocab_path, 'w') as f:
+            f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "?", "."] + words))
+        tokenizer = BertTokenizerFast(vocab_file=vocab_path)
+        torch.manual_seed(0)
+        model = BertForQuestionAnswering(BertConfig(
+            vocab_size=tokenizer.vocab_size, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+            intermediate_size=64, max_position_embeddings=MAX_LENGTH
+        )).eval()
+
+        with patch('biobert_qa.AutoTokenizer.from_pretrained', return_value=tokenizer), \
+                patch('biobert_qa.AutoModelForQuestionAnswering.from_pretrained', return_value=model):
+            qa_model = BioBERT_QA()
+
+        question = "what is chemotherapy?"
+        long_context = " ".join(words[i % len(words)] for i in range(3 * MAX_LENGTH)) + "."
+        single = qa_model.answer_question(question, long_context)
+        batched = qa_model.answer_questions([("what is cancer?", "cancer cells grow."), (question, long_context)])
+        self.assertEqual(batched[1], single)
+
+    def test_safetensors_files(self):
+        """Test finding single-file and sharded safetensors weights"""
+        self.assertEqual(safetensors_files(self.model_dir), [os.path.join(self.model_dir, "model.safetensors")])
+
+        with open(os.path.join(self.model_dir, "model.safetensors.index.json"), 'w') as f:
+            f.write('{"weight_map": {"a": "model-00002.safetensors", "b": "model-00001.safetensors",'
+                    ' "c": "model-00001.safetensors"}}')
+        self.assertEqual(safetensors_files(self.model_dir), [
+            os.path.join(self.model_dir, "model-00001.safetensors"),
+            os.path.join(self.model_dir, "model-00002.safetensors")
+        ])
+
+        self.assertEqual(safetensors_files(self.temp_dir), [])
+
+    @patch('biobert_qa.AutoTokenizer.from_pretrained')
+    @patch('biobert_qa.AutoModelForQuestionAnswering.from_pretrained')
+    def test_loads_safetensors_when_present(self, mock_model, mock_tokenizer):
+        """Test that safetensors weights are required when the model has them"""
+        weights = [os.path.join(self.model_dir, "model.safetensors")]
+        with patch('biobert_qa.safetensors_files', return_value=weights):
+            qa_model = BioBERT_QA()
+        mock_model.assert_called_once_with(qa_model.model_path, use_safetensors=True)
+        self.assertEqual(qa_model.weight_files, weights)
+
+        mock_model.reset_mock()
+        with patch('biobert_qa.safetensors_files', return_value=[]):
+            with self.assertLogs('biobert_qa', level='WARNING'):
+                qa_model = BioBERT_QA()
+        mock_model.assert_called_once_with(qa_model.model_path, use_safetensors=None)
+
 
 class TestBioBERTQAIntegration(unittest.TestCase):
     """Integration tests for BioBERT_QA (requires actual model)"""
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm25_index import BM25Index, reciprocal_rank_fusion
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for BM25Index class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.docs = [
+            Counter(["chemotherapy", "side", "effect", "nausea"]),
+            Counter(["radiation", "therapy", "beam"]),
+            Counter(["tamoxifen", "breast", "hormone", "therapy"]),
+            Counter(["chemotherapy", "chemotherapy", "drug", "cell"]),
+        ]
+        self.index = BM25Index.build(self.docs)
+
+    def test_postings_layout(self):
+        """Test CSR postings of a term"""
+        term_id = self.index.term_ids["chemotherapy"]
+        start, end = self.index.offsets[term_id], self.index.offsets[term_id + 1]
+
+        self.assertEqual(self.index.docs[start:end].tolist(), [0, 3])
+        self.assertEqual(self.index.tfs[start:end].tolist(), [1, 2])
+        self.assertEqual(self.index.docs.dtype, np.int32)
+        self.assertEqual(self.index.tfs.dtype, np.uint16)
+
+    def test_rare_term_ranks_its_document_first(self):
+        """Test that a rare keyword such as a drug name finds its document"""
+        rows, scores = self.index.search(["tamoxifen"], k=3)
+
+        self.assertEqual(rows.tolist(), [2])
+        self.assertGreater(scores[0], 0)
+
+    def test_rare_terms_weigh_more(self):
+        """Test idf: a term in one document outweighs a term in two"""
+        self.assertGreater(self.index.idf[self.index.term_ids["beam"]],
+                           self.index.idf[self.index.term_ids["therapy"]])
+
+    def test_search_unknown_terms(self):
+        """Test that unknown tokens match nothing"""
+        rows, _ = self.index.search(["unknownword"], k=3)
+        self.assertEqual(len(rows), 0)
+
+    def test_search_within_rows(self):
+        """Test that search restricted to rows ignores other documents"""
+        rows, _ = self.index.search(["chemotherapy"], k=3, rows=np.array([1, 2, 3]))
+        self.assertEqual(rows.tolist(), [3])
+
+    def test_save_and_load(self):
+        """Test that a saved index reloads with identical scores"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.index.save(temp_dir, "bm25")
+            loaded = BM25Index.load(temp_dir, "bm25")
+
+            np.testing.assert_allclose(loaded.scores(["therapy", "drug"]), self.index.scores(["therapy", "drug"]))
+            self.assertIsInstance(loaded.docs, np.memmap)
+            self.assertIsNone(BM25Index.load(temp_dir, "other"))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_empty_index(self):
+        """Test an index without documents"""
+        index = BM25Index.build([])
+        self.assertEqual(len(index.search(["chemotherapy"], k=1)[0]), 0)
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    """Test cases for reciprocal_rank_fusion function"""
+
+    def test_agreement_wins(self):
+        """Test that an item ranked well by both lists comes first"""
+        fused = reciprocal_rank_fusion([[1, 2, 3], [2, 4, 1]])
+        self.assertEqual(fused[0], 2)
+        self.assertEqual(set(fused), {1, 2, 3, 4})
+
+    def test_single_ranking_preserved(self):
+        """Test that one ranking passes through unchanged"""
+        self.assertEqual(reciprocal_rank_fusion([[5, 3, 9]]), [5, 3, 9])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
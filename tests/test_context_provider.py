@@ -4,11 +4,15 @@ import os
 from unittest.mock import patch, MagicMock
 import json
 import tempfile
+import shutil
+import torch
+import numpy as np
 
 # Add the parent directory to the path to import modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from context_provider import LocalContextRetriever
+from sentence_transformers import util
 
 
 class TestLocalContextRetriever(unittest.TestCase):
@@ -103,6 +107,179 @@ class TestLocalContextRetriever(unittest.TestCase):
         self.assertEqual(result[0], "Chemotherapy can cause nausea and vomiting.")
         self.assertEqual(result[1], "It may also lead to fatigue and hair loss.")
         
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    def test_corpus_dir_is_reused(self, mock_sentence_transformer, mock_nltk_download):
+        """Test that a saved corpus store and embeddings are memory-mapped on the next start"""
+        mock_model = MagicMock()
+        mock_sentence_transformer.return_value = mock_model
+        mock_model.encode.return_value = np.eye(3, dtype=np.float32)
+        corpus_dir = tempfile.mkdtemp()
+
+        try:
+            LocalContextRetriever(self.temp_file.name, corpus_dir=corpus_dir, embedding_precision="int8")
+            with patch('context_provider.CorpusStore.from_records') as mock_from_records:
+                retriever = LocalContextRetriever(self.temp_file.name, corpus_dir=corpus_dir)
+                quantized = LocalContextRetriever(self.temp_file.name, corpus_dir=corpus_dir, embedding_precision="int8")
+                mock_from_records.assert_not_called()
+
+            # Only the first process encoded the corpus; later ones attached
+            mock_model.encode.assert_called_once()
+            self.assertEqual(retriever.answers[2], self.test_data[2]["answer"])
+            self.assertTrue(torch.equal(retriever.embeddings, torch.eye(3)))
+            self.assertIsInstance(quantized.embeddings, np.memmap)
+            self.assertIsInstance(quantized.index.codes, np.memmap)
+        finally:
+            shutil.rmtree(corpus_dir)
+
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    @patch('context_provider.util.pytorch_cos_sim')
+    def test_duplicate_answers_returned_once(self, mock_cos_sim, mock_sentence_transformer, mock_nltk_download):
+        """Test that questions sharing an answer yield one context block"""
+        self.test_data.append({
+            "question": "Which side effects does chemo have?",
+            "answer": self.test_data[0]["answer"]
+        })
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data, f)
+        mock_sentence_transformer.return_value = MagicMock()
+        mock_similarities = MagicMock()
+        mock_similarities.topk.return_value.indices.tolist.return_value = [3, 0, 1, 2]
+        mock_cos_sim.return_value = [mock_similarities]
+
+        retriever = LocalContextRetriever(self.temp_file.name)
+        result = retriever.get_best_answer_chunks("chemo side effects", top_k=2)
+
+        self.assertEqual(retriever.corpus.unique_answer_count, 3)
+        self.assertEqual(retriever.answers[3], self.test_data[0]["answer"])
+        self.assertEqual(result, [self.test_data[0]["answer"], self.test_data[1]["answer"]])
+
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    def test_sentences_cached_per_answer(self, mock_sentence_transformer, mock_nltk_download):
+        """Test that each canonical answer is sentence-split only once"""
+        mock_sentence_transformer.return_value = MagicMock()
+        retriever = LocalContextRetriever(self.temp_file.name)
+
+        with patch.object(retriever, 'split_into_sentences', return_value=["s"]) as mock_split:
+            retriever.sentences_for(1)
+            retriever.sentences_for(1)
+
+        mock_split.assert_called_once_with(self.test_data[1]["answer"])
+
+    def _write_focus_data(self):
+        self.test_data = [
+            {"focus": "Breast Cancer", "question": "What is breast cancer?", "answer": "Breast answer."},
+            {"focus": "Lung Cancer", "question": "What is lung cancer?", "answer": "Lung answer."},
+            {"focus": "Small Cell Lung Cancer", "question": "Treatment for small cell lung cancer?", "answer": "SCLC answer."},
+        ]
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data, f)
+
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    def test_route_by_focus(self, mock_sentence_transformer, mock_nltk_download):
+        """Test that queries naming a disease route to its partitions"""
+        self._write_focus_data()
+        mock_sentence_transformer.return_value = MagicMock()
+        retriever = LocalContextRetriever(self.temp_file.name)
+
+        self.assertEqual(retriever.route("Symptoms of breast cancer?").tolist(), [0])
+        self.assertEqual(sorted(retriever.route("lung cancer stages").tolist()), [1, 2])
+        self.assertEqual(retriever.route("stage", entities=[{"text": "Lung Cancer", "label": "ORG"}]).tolist(), [1, 2])
+        self.assertIsNone(retriever.route("Side effects of chemotherapy?"))
+        self.assertIsNone(retriever.route("Cost of cancer treatments?"))
+
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    def test_incidental_words_do_not_route(self, mock_sentence_transformer, mock_nltk_download):
+        """Test that a word shared with a focus name by chance leaves the query unrouted"""
+        focuses = ["Lip and Oral Cavity Cancer", "Osteosarcoma and Malignant Fibrous Histiocytoma of Bone",
+                   "Skin Cancer", "Chronic Lymphocytic Leukemia", "Chronic Myelogenous Leukemia"]
+        self.test_data = [{"focus": focus, "question": f"What is {focus}?", "answer": f"{focus} answer."}
+                          for focus in focuses]
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data, f)
+        mock_sentence_transformer.return_value = MagicMock()
+        retriever = LocalContextRetriever(self.temp_file.name)
+
+        self.assertIsNone(retriever.route("Can I take oral chemotherapy at home?"))
+        self.assertIsNone(retriever.route("Does hormone therapy cause bone loss?"))
+        self.assertIsNone(retriever.route("How do I treat a skin rash from radiation?"))
+        self.assertIsNone(retriever.route("How to manage chronic pain?"))
+
+        # Disease terms and complete focus names still route
+        self.assertEqual(retriever.route("Is osteosarcoma hereditary?").tolist(), [1])
+        self.assertEqual(retriever.route("skin cancer prevention").tolist(), [2])
+        self.assertEqual(sorted(retriever.route("chronic leukemia outlook").tolist()), [3, 4])
+        self.assertEqual(retriever.route("stage", entities=[{"text": "Chronic Lymphocytic Leukemia"}]).tolist(), [3])
+
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    def test_routed_search_scores_partition_only(self, mock_sentence_transformer, mock_nltk_download):
+        """Test that a routed query never returns rows outside its partition"""
+        self._write_focus_data()
+        mock_model = MagicMock()
+        mock_sentence_transformer.return_value = mock_model
+        embeddings = torch.eye(3)
+        mock_model.encode.side_effect = [embeddings, embeddings[0], embeddings[0]]
+
+        retriever = LocalContextRetriever(self.temp_file.name)
+
+        # The query vector matches the breast cancer row best, but the text
+        # routes to small cell lung cancer, so only that row is a candidate
+        self.assertEqual(retriever.get_best_answer_ids("small cell lung cancer", top_k=1), [2])
+        self.assertEqual(retriever.get_best_answer_ids("anything else", top_k=1), [0])
+
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    def test_quantized_precision(self, mock_sentence_transformer, mock_nltk_download):
+        """Test int8 storage returns the same best answer as exact search"""
+        mock_model = MagicMock()
+        mock_sentence_transformer.return_value = mock_model
+        embeddings = torch.tensor([[1.0, 0.0, 0.0], [0.6, 0.8, 0.0], [0.0, 0.0, 1.0]])
+        mock_model.encode.side_effect = [embeddings.numpy(), np.array([0.5, 0.9, 0.1], dtype=np.float32)]
+
+        retriever = LocalContextRetriever(self.temp_file.name, embedding_precision="int8")
+
+        self.assertEqual(retriever.index.codes.dtype, np.int8)
+        # Only the codes are held in memory; float32 rows are re-read from a file mapping
+        self.assertIsInstance(retriever.index.full, np.memmap)
+        self.assertEqual(retriever.get_best_answer_ids("radiation", top_k=2), [1, 0])
+
+    @patch('context_provider.nltk.download')
+    @patch('context_provider.SentenceTransformer')
+    def test_hybrid_sparse_match_prunes_dense(self, mock_sentence_transformer, mock_nltk_download):
+        """Test that a confident keyword hit wins and limits dense scoring"""
+        mock_model = MagicMock()
+        mock_sentence_transformer.return_value = mock_model
+        mock_model.encode.side_effect = [np.eye(3, dtype=np.float32), torch.tensor([1.0, 0.0, 0.0])]
+        tokenizer = lambda texts: [text.lower().replace("?", "").replace(".", "").split() for text in texts]
+
+        retriever = LocalContextRetriever(self.temp_file.name, tokenizer=tokenizer, sparse_prune_k=1)
+        self.assertEqual(len(retriever.bm25), 3)
+
+        # Dense alone prefers row 0, but 'immunotherapy' only occurs in row 2
+        with patch('context_provider.util.pytorch_cos_sim', wraps=util.pytorch_cos_sim) as mock_cos_sim:
+            result = retriever.get_best_answer_ids("immunotherapy", top_k=1, tokens=["immunotherapy"])
+
+        self.assertEqual(result, [2])
+        self.assertEqual(mock_cos_sim.call_args[0][1].shape[0], 1)
+
+    def test_read_csv_records(self):
+        """Test reading the CSV knowledge base format"""
+        csv_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='')
+        csv_file.write('focus,question,answer\nBreast Cancer,What is it?,"Line one\nline two"\n')
+        csv_file.close()
+
+        try:
+            records = LocalContextRetriever._read_records(csv_file.name)
+        finally:
+            os.unlink(csv_file.name)
+
+        self.assertEqual(records, [{"focus": "Breast Cancer", "question": "What is it?", "answer": "Line one\nline two"}])
+
     def test_file_not_found(self):
         """Test behavior when JSON file is not found"""
         with self.assertRaises(FileNotFoundError):
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import mmap
+import shutil
+import tempfile
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_store import CorpusStore, source_signature
+
+
+class TestCorpusStore(unittest.TestCase):
+    """Test cases for CorpusStore class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.records = [
+            {"question": "What is chemotherapy?", "answer": "Chemotherapy uses drugs to kill cancer cells."},
+            {"question": "Qu'est-ce que la chimiothérapie ?", "answer": "Un traitement médicamenteux."},
+            {"question": "Empty answer?", "answer": ""}
+        ]
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_from_records(self):
+        """Test building a store from records"""
+        store = CorpusStore.from_records(self.records)
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.questions[0], "What is chemotherapy?")
+        self.assertEqual(store.answers[1], "Un traitement médicamenteux.")
+        self.assertEqual(store.answers[2], "")
+        self.assertEqual(store.offsets[-1], len(store.buffer))
+
+    def test_views_behave_like_lists(self):
+        """Test negative indexing, slicing and iteration on text views"""
+        store = CorpusStore.from_records(self.records)
+
+        self.assertEqual(store.questions[-1], "Empty answer?")
+        self.assertEqual(store.questions[0:2], [r["question"] for r in self.records[:2]])
+        self.assertEqual(list(store.answers), [r["answer"] for r in self.records])
+        with self.assertRaises(IndexError):
+            store.questions[3]
+
+    def test_duplicate_answers_stored_once(self):
+        """Test that repeated answers share one canonical entry"""
+        records = self.records + [{"question": "Define chemo", "answer": self.records[0]["answer"]}]
+        store = CorpusStore.from_records(records)
+
+        self.assertEqual(store.unique_answer_count, 3)
+        self.assertEqual(store.answer_ids.tolist(), [0, 1, 2, 0])
+        self.assertEqual(store.answers[3], self.records[0]["answer"])
+        self.assertEqual(store.unique_answer(2), "")
+
+    def test_focus_ids(self):
+        """Test that focus names are interned per row"""
+        records = [dict(r, focus="Breast Cancer") for r in self.records[:2]] + [self.records[2]]
+        store = CorpusStore.from_records(records)
+
+        self.assertEqual(store.focus_names, ["Breast Cancer", ""])
+        self.assertEqual(store.focus_ids.tolist(), [0, 0, 1])
+
+    def test_save_and_load_mmap(self):
+        """Test that a saved store reloads memory-mapped with identical text"""
+        CorpusStore.from_records(self.records, meta={"version": 1}).save(self.temp_dir)
+        self.assertTrue(CorpusStore.exists(self.temp_dir))
+
+        store = CorpusStore.load(self.temp_dir)
+
+        self.assertIsInstance(store.buffer, mmap.mmap)
+        self.assertEqual(store.meta, {"version": 1})
+        self.assertEqual(store.focus_names, [""])
+        self.assertEqual(list(store.questions), [r["question"] for r in self.records])
+        self.assertEqual(list(store.answers), [r["answer"] for r in self.records])
+
+    def test_empty_store_roundtrip(self):
+        """Test saving and loading an empty store"""
+        CorpusStore.from_records([]).save(self.temp_dir)
+
+        store = CorpusStore.load(self.temp_dir)
+
+        self.assertEqual(len(store), 0)
+        self.assertEqual(len(store.questions), 0)
+
+    def test_source_signature_changes_with_content(self):
+        """Test that the source signature tracks file size"""
+        path = os.path.join(self.temp_dir, "data.json")
+        with open(path, "w") as f:
+            f.write("[]")
+        before = source_signature(path)
+        with open(path, "w") as f:
+            f.write("[{}]")
+
+        self.assertNotEqual(before, source_signature(path))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
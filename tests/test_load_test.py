@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+
+# Add the parent and scripts directories to the path to import modules and the load generator
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from answer_table import normalize_question
+from load_test import RequestMix, find_knee, summarize
+
+
+def level(load, throughput, p99_ms, error_rate=0.0):
+    return {'load': load, 'throughput_per_s': throughput, 'p99_ms': p99_ms, 'error_rate': error_rate}
+
+
+class TestFindKnee(unittest.TestCase):
+    """Test cases for picking the knee of a load curve"""
+
+    def test_no_levels(self):
+        """Test an empty run has no knee"""
+        self.assertEqual(find_knee([], 2.0), (None, None))
+
+    def test_healthy_curve(self):
+        """Test the heaviest level is the knee when nothing degrades"""
+        levels = [level(1, 2.0, 500), level(2, 4.0, 550), level(4, 7.5, 800)]
+        self.assertEqual(find_knee(levels, 2.0), (4, None))
+
+    def test_p99_growth(self):
+        """Test the knee stops before the level whose p99 grew past the factor"""
+        levels = [level(1, 2.0, 500), level(2, 4.0, 700), level(4, 8.0, 1200)]
+        knee, reason = find_knee(levels, 2.0)
+        self.assertEqual(knee, 2)
+        self.assertIn('p99', reason)
+
+    def test_errors_and_sheds(self):
+        """Test a level shedding requests is past the knee even with a flat p99"""
+        levels = [level(1, 2.0, 500), level(2, 4.0, 500), level(4, 6.0, 500, error_rate=0.2)]
+        knee, reason = find_knee(levels, 2.0)
+        self.assertEqual(knee, 2)
+        self.assertIn('error rate', reason)
+
+    def test_throughput_flattening(self):
+        """Test a level that adds load without adding throughput is past the knee"""
+        levels = [level(1, 2.7, 400), level(2, 2.8, 700)]
+        knee, reason = find_knee(levels, 2.0)
+        self.assertEqual(knee, 1)
+        self.assertIn('throughput', reason)
+
+    def test_lightest_level_failing(self):
+        """Test no knee is reported when even the lightest level errors"""
+        knee, reason = find_knee([level(1, 1.0, 500, error_rate=0.5)], 2.0)
+        self.assertIsNone(knee)
+        self.assertIn('error rate', reason)
+
+
+QUESTIONS = ["What are the symptoms of Hodgkin lymphoma ?", "How is breast cancer diagnosed in older women ?"]
+
+
+class TestRequestMix(unittest.TestCase):
+    """Test cases for the seeded request stream"""
+
+    def queries(self, question_mode, count=50, seed=13):
+        mix = RequestMix(QUESTIONS, {'query': 1.0}, seed, question_mode)
+        return [mix.next()[3]['query'] for _ in range(count)]
+
+    def test_perturbed_questions_miss_the_answer_table(self):
+        """Test perturbed questions never normalize to a dataset question"""
+        keys = {normalize_question(question) for question in QUESTIONS}
+        self.assertFalse(any(normalize_question(query) in keys for query in self.queries('perturbed')))
+
+    def test_seeded(self):
+        """Test the same seed gives the same stream"""
+        self.assertEqual(self.queries('perturbed'), self.queries('perturbed'))
+
+    def test_verbatim_questions(self):
+        """Test verbatim mode sends the dataset questions unchanged"""
+        self.assertTrue(set(self.queries('verbatim')) <= set(QUESTIONS))
+
+    def test_unknown_mode(self):
+        """Test an unknown question mode is rejected"""
+        with self.assertRaises(ValueError):
+            RequestMix(QUESTIONS, {'query': 1.0}, 13, 'paraphrased')
+
+
+class TestSummarize(unittest.TestCase):
+    """Test cases for per-level summaries"""
+
+    def test_cached_rate(self):
+        """Test the cached share counts only answered queries"""
+        results = [('query', 200, 0.1, True), ('query', 200, 0.5, False), ('query', 503, 0.01, None),
+                   ('stats', 200, 0.01, None)]
+        summary = summarize(results, 1.0)
+        self.assertEqual(summary['cached_rate'], 0.5)
+        self.assertEqual(summary['shed'], 1)
+        self.assertIsNone(summary['endpoints']['stats']['cached_rate'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import torch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_report import AllocationTracker, MemoryLedger, file_backed_bytes, object_bytes, rss_bytes
+
+
+class TestMemoryLedger(unittest.TestCase):
+    """Test cases for per-component memory accounting"""
+
+    def test_object_bytes(self):
+        """Test sizes of modules, tensors, arrays and DataFrames"""
+        module = torch.nn.Linear(4, 2)
+        self.assertEqual(object_bytes(module), (4 * 2 + 2) * 4)
+        self.assertEqual(object_bytes(torch.zeros(3, 5, dtype=torch.float16)), 30)
+        self.assertEqual(object_bytes(np.zeros(10, dtype=np.int8)), 10)
+        frame = pd.DataFrame({'a': [1, 2, 3]})
+        self.assertEqual(object_bytes(frame), int(frame.memory_usage(deep=True).sum()))
+        self.assertEqual(object_bytes(None), 0)
+        self.assertEqual(object_bytes("no size"), 0)
+
+    @unittest.skipUnless(os.path.exists('/proc/self/maps'), "needs /proc/self/maps")
+    def test_file_backed_bytes(self):
+        """Test that tensors memory-mapped from a file are counted, heap tensors are not"""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "weights.bin")
+            np.arange(64 * 32, dtype=np.float32).tofile(path)
+            module = torch.nn.Linear(64, 32)
+            self.assertEqual(file_backed_bytes(module, [path]), 0)
+
+            mapped = np.memmap(path, dtype=np.float32, mode='c', shape=(32, 64))
+            module.weight = torch.nn.Parameter(torch.from_numpy(mapped), requires_grad=False)
+            self.assertEqual(file_backed_bytes(module, [path]), 64 * 32 * 4)
+            del module, mapped
+        finally:
+            shutil.rmtree(directory)
+
+    def test_measure_records_rss_growth(self):
+        """Test that measure() attributes RSS growth to the component"""
+        ledger = MemoryLedger()
+        with ledger.measure("block"):
+            block = np.ones(32 * 1024 * 1024, dtype=np.uint8)
+        ledger.add_bytes("block", array=block)
+
+        report = ledger.report()
+        component = report['components']['block']
+        self.assertGreaterEqual(component['rss_delta_bytes'], 16 * 1024 * 1024)
+        self.assertEqual(component['bytes'], {'array': block.nbytes})
+        self.assertGreater(component['load_seconds'], 0)
+        self.assertEqual(report['accounted_rss_bytes'], component['rss_delta_bytes'])
+        self.assertGreater(rss_bytes(), 0)
+
+    def test_measure_records_on_error(self):
+        """Test that a failing load is still accounted for"""
+        ledger = MemoryLedger()
+        with self.assertRaises(ValueError):
+            with ledger.measure("broken"):
+                raise ValueError("load failed")
+        self.assertIn("broken", ledger.report()['components'])
+
+
+class TestAllocationTracker(unittest.TestCase):
+    """Test cases for the opt-in tracemalloc diff"""
+
+    def test_diff_requires_start(self):
+        """Test that diffing without a baseline is an error"""
+        tracker = AllocationTracker()
+        self.assertFalse(tracker.active)
+        with self.assertRaises(RuntimeError):
+            tracker.diff()
+
+    def test_diff_shows_growth_and_reset(self):
+        """Test that growth since the baseline is reported, and reset clears it"""
+        tracker = AllocationTracker()
+        tracker.start()
+        try:
+            self.assertTrue(tracker.active)
+            retained = [bytearray(1024) for _ in range(1000)]
+            diff = tracker.diff(limit=5)
+            self.assertGreaterEqual(diff['growth_bytes'], 1000 * 1024)
+            self.assertLessEqual(len(diff['top']), 5)
+            self.assertTrue(any(__file__ in location for location in diff['top'][0]['location']))
+
+            tracker.reset()
+            self.assertLess(tracker.diff()['growth_bytes'], 1000 * 1024)
+            del retained
+        finally:
+            tracker.stop()
+        self.assertFalse(tracker.active)
+
+
+if __name__ == '__main__':
+    unittest.main()
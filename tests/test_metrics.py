@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Counter, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for the Prometheus metrics registry"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.registry = Registry()
+
+    def test_counter_by_label(self):
+        """Test that counters accumulate per label value"""
+        counter = Counter('lookups_total', 'Lookups', labels=('result',), registry=self.registry)
+        counter.inc(result="hit")
+        counter.inc(2, result="hit")
+        counter.inc(result="miss")
+
+        self.assertEqual(counter.value(result="hit"), 3)
+        text = self.registry.render()
+        self.assertIn('# TYPE lookups_total counter', text)
+        self.assertIn('lookups_total{result="hit"} 3', text)
+        self.assertIn('lookups_total{result="miss"} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram exposition with cumulative buckets, sum and count"""
+        histogram = Histogram('stage_seconds', 'Stage time', labels=('stage',),
+                              buckets=(0.1, 1.0), registry=self.registry)
+        histogram.observe(0.05, stage="spacy")
+        histogram.observe(0.5, stage="spacy")
+        histogram.observe(5.0, stage="spacy")
+
+        lines = self.registry.render().splitlines()
+
+        self.assertIn('stage_seconds_bucket{stage="spacy",le="0.1"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="spacy",le="1.0"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="spacy",le="+Inf"} 3', lines)
+        self.assertIn('stage_seconds_sum{stage="spacy"} 5.55', lines)
+        self.assertIn('stage_seconds_count{stage="spacy"} 3', lines)
+
+    def test_histogram_timer(self):
+        """Test that the timer context manager records one observation"""
+        histogram = Histogram('total_seconds', 'Total', registry=self.registry)
+        with histogram.time():
+            pass
+
+        self.assertEqual(histogram.count(), 1)
+
+    def test_callback_and_label_escaping(self):
+        """Test callback metrics and escaping of label values"""
+        counter = Counter('errors_total', 'Errors', labels=('message',), registry=self.registry)
+        counter.inc(message='bad "quote"\n')
+        self.registry.callback('pending', 'Pending requests', 'gauge', lambda: 4)
+
+        text = self.registry.render()
+
+        self.assertIn('errors_total{message="bad \\"quote\\"\\n"} 1', text)
+        self.assertIn('pending 4', text)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
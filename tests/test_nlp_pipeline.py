@@ -10,7 +10,9 @@ from nlp_pipeline import (
     nettoyage_normalisation,
     tokenisation_lemmatisation_stopwords,
     ner_medical,
+    lemmatisation_corpus,
     pipeline_pretraitement_requete,
+    pipeline_pretraitement_requetes,
     download_spacy_model,
     load_spacy_model
 )
@@ -76,6 +78,61 @@ class TestNLPPipeline(unittest.TestCase):
         expected = ["side", "effect"]
         self.assertEqual(result, expected)
         
+    @patch('nlp_pipeline.nlp_en')
+    def test_lemmatisation_corpus_batches_with_pipe(self, mock_nlp_en):
+        """Test corpus lemmatisation runs nlp.pipe once over cleaned texts"""
+        def make_doc(lemmas):
+            tokens = []
+            for lemma in lemmas:
+                token = MagicMock()
+                token.lemma_ = lemma
+                token.is_stop = lemma == "the"
+                token.is_punct = False
+                token.is_space = False
+                tokens.append(token)
+            doc = MagicMock()
+            doc.__iter__ = MagicMock(return_value=iter(tokens))
+            return doc
+
+        mock_nlp_en.pipe.return_value = [make_doc(["the", "drug"]), make_doc(["tumor"])]
+
+        result = lemmatisation_corpus(["The DRUGS!", "Tumors"])
+
+        self.assertEqual(result, [["drug"], ["tumor"]])
+        texts = list(mock_nlp_en.pipe.call_args[0][0])
+        self.assertEqual(texts, ["the drugs", "tumors"])
+        self.assertEqual(mock_nlp_en.pipe.call_args[1]["disable"], ["ner", "parser"])
+
+    @patch('nlp_pipeline.detect')
+    @patch('nlp_pipeline.nlp_fr')
+    @patch('nlp_pipeline.nlp_en')
+    def test_pipeline_pretraitement_requetes_batch(self, mock_nlp_en, mock_nlp_fr, mock_detect):
+        """Test batch preprocessing groups texts by language and keeps their order"""
+        def make_doc(lemma, entity):
+            token = MagicMock()
+            token.lemma_ = lemma
+            token.is_stop = token.is_punct = token.is_space = False
+            ent = MagicMock()
+            ent.text = entity
+            ent.label_ = "DISEASE"
+            doc = MagicMock()
+            doc.__iter__ = MagicMock(return_value=iter([token]))
+            doc.ents = [ent]
+            return doc
+
+        mock_detect.side_effect = ["en", "fr", "en"]
+        mock_nlp_en.pipe.return_value = [make_doc("chemotherapy", "cancer"), make_doc("surgery", "tumor")]
+        mock_nlp_fr.pipe.return_value = [make_doc("chimiothérapie", "cancer")]
+
+        results = pipeline_pretraitement_requetes([self.test_text_en, self.test_text_fr, "Surgery?"])
+
+        self.assertEqual([r["langue_detectee"] for r in results], ["en", "fr", "en"])
+        self.assertEqual([r["tokens"] for r in results], [["chemotherapy"], ["chimiothérapie"], ["surgery"]])
+        self.assertEqual(results[2]["entites"], [{"text": "tumor", "label": "DISEASE"}])
+        self.assertEqual(results[2]["texte_original"], "Surgery?")
+        self.assertEqual(list(mock_nlp_en.pipe.call_args[0][0]), ["what are the side effects of chemotherapy", "surgery"])
+        mock_nlp_fr.pipe.assert_called_once()
+
     @patch('nlp_pipeline.nlp_en')
     def test_ner_medical_english(self, mock_nlp_en):
         """Test named entity recognition for English"""
@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import ProfileStore, RequestProfiler, StackSampler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class FixedRandom:
+    def __init__(self, value):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+
+class TestStackSampler(unittest.TestCase):
+    """Test cases for the wall-clock stack sampler"""
+
+    def test_collapsed_stacks_of_calling_thread(self):
+        """Test that samples land in the running function, rooted at 'request'"""
+        sampler = StackSampler(interval=0.001).start()
+        busy(0.1)
+        sampler.stop()
+
+        self.assertGreater(sampler.samples, 0)
+        lines = sampler.collapsed().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith('request;'))
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any('busy (test_profiling.py:' in line for line in lines))
+
+    def test_extra_threads_by_name_prefix(self):
+        """Test that threads matching a prefix are sampled under their own root"""
+        worker = threading.Thread(target=busy, args=(0.2,), name="stage_0")
+        worker.start()
+        sampler = StackSampler(interval=0.001, extra_prefixes=("stage",)).start()
+        time.sleep(0.1)
+        sampler.stop()
+        worker.join()
+        self.assertTrue(any(stack.startswith('stage_0;') for stack in sampler.stacks))
+
+
+class TestProfileStore(unittest.TestCase):
+    """Test cases for the bounded profile directory"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.directory)
+
+    def test_keeps_newest_files(self):
+        """Test that only max_files profiles are kept, newest first"""
+        store = ProfileStore(self.directory, max_files=2)
+        names = []
+        for i in range(4):
+            names.append(store.write('/api/query', f"request;f{i} 1\n"))
+            time.sleep(0.01)
+
+        self.assertEqual(sorted(store.files()), sorted(names[-2:]))
+        self.assertTrue(names[-1].endswith('-api_query.folded'))
+        with open(os.path.join(self.directory, names[-1]), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "request;f3 1\n")
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Test cases for choosing and profiling requests"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.directory = tempfile.mkdtemp()
+        self.store = ProfileStore(self.directory)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.directory)
+
+    def test_wanted(self):
+        """Test the trigger and the sampling rate"""
+        self.assertFalse(RequestProfiler(self.store).wanted())
+        self.assertTrue(RequestProfiler(self.store).wanted(triggered=True))
+        self.assertTrue(RequestProfiler(self.store, sample_rate=0.5, rng=FixedRandom(0.4)).wanted())
+        self.assertFalse(RequestProfiler(self.store, sample_rate=0.5, rng=FixedRandom(0.6)).wanted())
+
+    def test_profile_writes_file(self):
+        """Test that a profiled block is written to the store"""
+        profiler = RequestProfiler(self.store, interval=0.001)
+        with profiler.profile('/api/query') as profile:
+            busy(0.05)
+
+        self.assertGreater(profile['samples'], 0)
+        self.assertEqual(self.store.files(), [profile['file']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,297 @@
+import unittest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AdmissionController, Deadline, Overloaded
+from answer_table import AnswerTable
+from metrics import CACHE_LOOKUPS, FORWARD_PASSES, STAGE_SECONDS
+from qa_service import QAPipeline, NO_ANSWER, is_usable_answer
+from semantic_cache import SemanticAnswerCache
+from tracing import Trace, activate
+
+
+NLP_RESULT = {
+    "langue_detectee": "en",
+    "texte_original": "Side effects of chemotherapy?",
+    "texte_nettoye": "side effects of chemotherapy",
+    "tokens": ["effect", "chemotherapy"],
+    "entites": []
+}
+
+
+class TestQAPipeline(unittest.TestCase):
+    """Test cases for QAPipeline class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.retriever = MagicMock()
+        self.retriever.corpus.version = "v1"
+        self.retriever.encode_query.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        self.retriever.get_best_answer_ids.return_value = [7]
+        self.retriever.sentences_for.return_value = [
+            "Key points are listed below for this type of cancer.",
+            "Chemotherapy commonly causes nausea and fatigue."
+        ]
+        self.qa_model = MagicMock()
+        self.qa_model.answer_question.side_effect = [
+            "No clear answer found in the given context.",
+            "nausea and fatigue"
+        ]
+
+    def test_is_usable_answer(self):
+        """Test the answer acceptance rule"""
+        self.assertTrue(is_usable_answer("nausea and fatigue"))
+        self.assertFalse(is_usable_answer("yes"))
+        self.assertFalse(is_usable_answer("No clear answer found in the given context."))
+        self.assertFalse(is_usable_answer(None))
+
+    def test_answer_from_context_stops_at_first_usable_answer(self):
+        """Test that BioBERT runs sentence by sentence until an answer is usable"""
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        answer = pipeline.answer_from_context("Side effects of chemotherapy?", tokens=["chemotherapy"])
+
+        self.assertEqual(answer, "nausea and fatigue")
+        self.assertEqual(self.qa_model.answer_question.call_count, 2)
+        self.retriever.sentences_for.assert_called_once_with(7)
+
+    def test_answer_from_context_without_answer(self):
+        """Test the fallback when no sentence yields an answer"""
+        self.retriever.sentences_for.return_value = []
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        self.assertEqual(pipeline.answer_from_context("query"), NO_ANSWER)
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_answer_payload(self, mock_pretraitement):
+        """Test the response payload of a model-answered query"""
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        payload = pipeline.answer("Side effects of chemotherapy?")
+
+        self.assertEqual(payload["response"], "nausea and fatigue")
+        self.assertEqual(payload["tokens"], ["effect", "chemotherapy"])
+        self.assertFalse(payload["cached"])
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_answer_with_stage_executor(self, mock_pretraitement):
+        """Test that running stages on an executor gives the same payload"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pipeline = QAPipeline(self.retriever, self.qa_model, executor=executor)
+            payload = pipeline.answer("Side effects of chemotherapy?")
+
+        self.assertEqual(payload["response"], "nausea and fatigue")
+        self.retriever.get_best_answer_ids.assert_called_once_with(
+            "Side effects of chemotherapy?", entities=[], tokens=["effect", "chemotherapy"],
+            query_embedding=self.retriever.encode_query.return_value
+        )
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_stage_metrics_recorded(self, mock_pretraitement):
+        """Test that each stage, forward pass and cache lookup is measured"""
+        before_forward = STAGE_SECONDS.count(stage="biobert_forward")
+        before_total = STAGE_SECONDS.count(stage="total")
+        before_queries = FORWARD_PASSES.count()
+        before_misses = CACHE_LOOKUPS.value(cache="semantic", result="miss")
+        pipeline = QAPipeline(self.retriever, self.qa_model, answer_cache=SemanticAnswerCache())
+
+        pipeline.answer("Side effects of chemotherapy?")
+
+        self.assertEqual(STAGE_SECONDS.count(stage="biobert_forward") - before_forward, 2)
+        self.assertEqual(STAGE_SECONDS.count(stage="total") - before_total, 1)
+        self.assertEqual(FORWARD_PASSES.count() - before_queries, 1)
+        self.assertEqual(CACHE_LOOKUPS.value(cache="semantic", result="miss") - before_misses, 1)
+        for stage in ("query_encode", "retrieval", "sentence_split"):
+            self.assertGreater(STAGE_SECONDS.count(stage=stage), 0)
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_trace_records_stage_spans(self, mock_pretraitement):
+        """Test that an active trace gets a span per stage, including those run on the executor"""
+        trace = Trace('/api/query')
+        with ThreadPoolExecutor(max_workers=2) as executor, activate(trace):
+            pipeline = QAPipeline(self.retriever, self.qa_model, answer_cache=SemanticAnswerCache(),
+                                  executor=executor)
+            pipeline.answer("Side effects of chemotherapy?")
+
+        spans = {}
+        for span in trace.to_dict()['spans']:
+            spans.setdefault(span['name'], []).append(span['attributes'])
+        self.assertEqual(spans['cache_lookup'], [{'hit': False}])
+        self.assertEqual(spans['retrieval'][0]['answer_ids'], [7])
+        self.assertEqual(spans['sentence_split'], [{'block_sentences': [2], 'sentences': 2}])
+        self.assertEqual([attrs['usable'] for attrs in spans['biobert_forward']], [False, True])
+        self.assertIn('query_encode', spans)
+        self.assertEqual(trace.attributes, {'source': 'biobert', 'forward_passes': 2, 'deadline_exceeded': False})
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_semantic_cache_skips_model(self, mock_pretraitement):
+        """Test that a repeated query is served from the semantic cache"""
+        pipeline = QAPipeline(self.retriever, self.qa_model, answer_cache=SemanticAnswerCache())
+
+        first = pipeline.answer("Side effects of chemotherapy?")
+        second = pipeline.answer("chemo side effects?")
+
+        self.assertEqual(second["response"], first["response"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(self.qa_model.answer_question.call_count, 2)
+
+    @patch('qa_service.pipeline_pretraitement_requete')
+    def test_answer_table_skips_everything(self, mock_pretraitement):
+        """Test that a precomputed answer needs no preprocessing or model"""
+        table = AnswerTable.build({"Side effects of chemotherapy?": {"response": "precomputed", "tokens": []}})
+        pipeline = QAPipeline(self.retriever, self.qa_model, answer_table=table)
+
+        payload = pipeline.answer("side effects of chemotherapy")
+
+        self.assertEqual(payload, {"response": "precomputed", "tokens": [], "cached": True})
+        mock_pretraitement.assert_not_called()
+        self.retriever.encode_query.assert_not_called()
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_cache_hits_answered_while_every_slot_is_taken(self, mock_pretraitement):
+        """Test that table and cache hits skip admission and only model work is shed"""
+        admission = AdmissionController(max_concurrent=1, max_queue=0)
+        admit = lambda: admission.slot(timeout=0)
+        table = AnswerTable.build({"Side effects of chemotherapy?": {"response": "precomputed", "tokens": []}})
+        pipeline = QAPipeline(self.retriever, self.qa_model, answer_cache=SemanticAnswerCache(), answer_table=table)
+        pipeline.answer("What causes nausea?", admit=admit)
+
+        admission.admit()
+        try:
+            self.assertEqual(pipeline.answer("side effects of chemotherapy", admit=admit)["response"], "precomputed")
+            cached = pipeline.answer("Why am I nauseous?", admit=admit)
+            self.assertTrue(cached["cached"])
+            self.assertEqual(admission.shed, 0)
+            with self.assertRaises(Overloaded):
+                QAPipeline(self.retriever, self.qa_model).answer("What causes nausea?", admit=admit)
+            self.assertEqual(admission.shed, 1)
+        finally:
+            admission.release()
+        self.assertEqual(admission.pending, 0)
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_closing_stream_leaves_admission(self, mock_pretraitement):
+        """Test that a stream closed mid-answer gives its admission slot back"""
+        admission = AdmissionController(max_concurrent=1, max_queue=0)
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        events = pipeline.stream("Side effects of chemotherapy?", admit=lambda: admission.slot(timeout=0))
+        self.assertEqual([next(events)[0], next(events)[0]], ['analysis', 'context'])
+        self.assertEqual(admission.pending, 1)
+        events.close()
+
+        self.assertEqual(admission.pending, 0)
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_stream_events_in_stage_order(self, mock_pretraitement):
+        """Test that streaming reports each stage before the answer"""
+        self.retriever.corpus.unique_answer.return_value = "Chemotherapy commonly causes nausea and fatigue."
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        events = list(pipeline.stream("Side effects of chemotherapy?"))
+
+        self.assertEqual([event for event, _ in events], ["analysis", "context", "progress", "progress", "answer"])
+        self.assertEqual(events[0][1]["tokens"], ["effect", "chemotherapy"])
+        self.assertEqual(events[1][1]["sentences"], 2)
+        self.assertEqual(events[-1][1]["response"], "nausea and fatigue")
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_closing_stream_stops_model_work(self, mock_pretraitement):
+        """Test that a cancelled stream runs no further BioBERT passes"""
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        events = pipeline.stream("Side effects of chemotherapy?")
+        for event, _ in events:
+            if event == "progress":
+                break
+        events.close()
+
+        self.assertEqual(self.qa_model.answer_question.call_count, 1)
+
+    @patch('qa_service.pipeline_pretraitement_requete', return_value=NLP_RESULT)
+    def test_deadline_returns_best_answer_so_far(self, mock_pretraitement):
+        """Test that an expired deadline stops the BioBERT loop between passes"""
+        self.retriever.sentences_for.return_value = ["First sentence.", "Second sentence.", "Third sentence."]
+        self.qa_model.answer_question.side_effect = ["yes", "no", "nausea and fatigue"]
+        cache = SemanticAnswerCache()
+        pipeline = QAPipeline(self.retriever, self.qa_model, answer_cache=cache)
+
+        payload = pipeline.answer("Side effects of chemotherapy?", deadline=Deadline(0))
+
+        self.assertEqual(payload["response"], "yes")
+        self.assertTrue(payload["deadline_exceeded"])
+        self.assertEqual(self.qa_model.answer_question.call_count, 1)
+        self.assertEqual(pipeline.deadline_cut, 1)
+        # A cut answer is not cached for later paraphrases
+        self.assertEqual(len(cache), 0)
+
+    @patch('qa_service.pipeline_pretraitement_requetes')
+    def test_answer_batch_runs_models_once_per_round(self, mock_pretraitement):
+        """Test that a batch is preprocessed, encoded and answered together, in order"""
+        mock_pretraitement.return_value = [NLP_RESULT, NLP_RESULT, NLP_RESULT]
+        self.retriever.encode_queries.return_value = np.eye(3, dtype=np.float32)[:, :2]
+        self.retriever.get_best_answer_ids.side_effect = [[7], RuntimeError("index unavailable"), [8]]
+        self.retriever.sentences_for.side_effect = lambda answer_id: {
+            7: ["First sentence about chemotherapy.", "Chemotherapy commonly causes nausea and fatigue."],
+            8: ["Radiation therapy damages cancer cells locally."]
+        }[answer_id]
+        self.qa_model.answer_questions.side_effect = [
+            ["No clear answer found in the given context.", "damages cancer cells"],
+            ["nausea and fatigue"]
+        ]
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        results = pipeline.answer_batch(["Side effects of chemotherapy?", "Broken?", "How does radiation work?"])
+
+        self.assertEqual(results[0]["response"], "nausea and fatigue")
+        self.assertEqual(results[1], {"error": "index unavailable"})
+        self.assertEqual(results[2]["response"], "damages cancer cells")
+        mock_pretraitement.assert_called_once()
+        self.retriever.encode_queries.assert_called_once()
+        self.retriever.encode_query.assert_not_called()
+        self.assertEqual(self.qa_model.answer_questions.call_count, 2)
+        # The second round only carries the query that is still unanswered
+        self.assertEqual(len(self.qa_model.answer_questions.call_args_list[1][0][0]), 1)
+
+    @patch('qa_service.pipeline_pretraitement_requetes')
+    def test_answer_batch_model_error_fails_only_its_item(self, mock_pretraitement):
+        """Test that a failing BioBERT batch is retried per item and only the bad item errors"""
+        mock_pretraitement.return_value = [NLP_RESULT, NLP_RESULT]
+        self.retriever.encode_queries.return_value = np.eye(2, dtype=np.float32)
+        self.retriever.sentences_for.return_value = ["Chemotherapy commonly causes nausea and fatigue."]
+        self.qa_model.answer_questions.side_effect = RuntimeError("sequence too long")
+
+        def answer_question(question, context):
+            if len(question) > 512:
+                raise RuntimeError("sequence too long")
+            return "nausea and fatigue"
+        self.qa_model.answer_question.side_effect = answer_question
+        pipeline = QAPipeline(self.retriever, self.qa_model)
+
+        results = pipeline.answer_batch(["Side effects of chemotherapy?", "x" * 5000])
+
+        self.assertEqual(results[0]["response"], "nausea and fatigue")
+        self.assertEqual(results[1], {"error": "sequence too long"})
+        self.assertEqual(self.qa_model.answer_question.call_count, 2)
+
+    @patch('qa_service.pipeline_pretraitement_requetes')
+    def test_answer_batch_all_precomputed(self, mock_pretraitement):
+        """Test that a fully precomputed batch runs no model"""
+        table = AnswerTable.build({"Side effects of chemotherapy?": {"response": "precomputed", "tokens": []}})
+        pipeline = QAPipeline(self.retriever, self.qa_model, answer_table=table)
+
+        results = pipeline.answer_batch(["side effects of chemotherapy"])
+
+        self.assertEqual(results, [{"response": "precomputed", "tokens": [], "cached": True}])
+        mock_pretraitement.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_cache import SemanticAnswerCache
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    """Test cases for SemanticAnswerCache class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.clock = FakeClock()
+        self.cache = SemanticAnswerCache(max_entries=2, ttl=10, threshold=0.9, clock=self.clock)
+
+    def test_empty_cache_misses(self):
+        """Test lookup on an empty cache"""
+        self.assertIsNone(self.cache.get(unit(1, 0, 0)))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_paraphrase_hits(self):
+        """Test that a nearby embedding returns the cached payload"""
+        self.cache.put(unit(1, 0.1, 0), {"response": "nausea"})
+
+        self.assertEqual(self.cache.get(unit(1, 0.15, 0)), {"response": "nausea"})
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_dissimilar_query_misses(self):
+        """Test that an embedding below the threshold is not served"""
+        self.cache.put(unit(1, 0, 0), {"response": "nausea"})
+        self.assertIsNone(self.cache.get(unit(1, 1, 0)))
+
+    def test_best_match_returned(self):
+        """Test that the most similar of several entries is returned"""
+        self.cache.put(unit(1, 0, 0), {"response": "a"})
+        self.cache.put(unit(0, 1, 0), {"response": "b"})
+        self.assertEqual(self.cache.get(unit(0.05, 1, 0)), {"response": "b"})
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the ttl"""
+        self.cache.put(unit(1, 0, 0), {"response": "a"})
+        self.clock.now = 10.5
+        self.assertIsNone(self.cache.get(unit(1, 0, 0)))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full"""
+        self.cache.put(unit(1, 0, 0), {"response": "a"})
+        self.cache.put(unit(0, 1, 0), {"response": "b"})
+        self.cache.get(unit(1, 0, 0))  # 'a' becomes most recently used
+        self.cache.put(unit(0, 0, 1), {"response": "c"})
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(unit(0, 1, 0)))
+        self.assertEqual(self.cache.get(unit(1, 0, 0)), {"response": "a"})
+        self.assertEqual(self.cache.get(unit(0, 0, 1)), {"response": "c"})
+
+    def test_expired_slot_reused_before_eviction(self):
+        """Test that expired entries are dropped before live ones are evicted"""
+        self.cache.put(unit(1, 0, 0), {"response": "a"})
+        self.clock.now = 5
+        self.cache.put(unit(0, 1, 0), {"response": "b"})
+        self.clock.now = 12
+        self.cache.put(unit(0, 0, 1), {"response": "c"})
+
+        self.assertEqual(self.cache.get(unit(0, 1, 0)), {"response": "b"})
+
+    def test_zero_size_disables_cache(self):
+        """Test that max_entries=0 stores nothing instead of failing"""
+        cache = SemanticAnswerCache(max_entries=0, clock=self.clock)
+        cache.put(unit(1, 0, 0), {"response": "a"})
+
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get(unit(1, 0, 0)))
+
+    def test_version_change_invalidates(self):
+        """Test that a new knowledge base version empties the cache"""
+        self.cache.put(unit(1, 0, 0), {"response": "a"}, version="v1")
+        self.assertEqual(self.cache.get(unit(1, 0, 0), version="v1"), {"response": "a"})
+
+        self.assertIsNone(self.cache.get(unit(1, 0, 0), version="v2"))
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
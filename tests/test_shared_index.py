@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_index import atomic_write, attach_array, publish_array, spill_array
+
+
+class TestSharedIndex(unittest.TestCase):
+    """Test cases for shared array publishing"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_publish_and_attach(self):
+        """Test that an attached array is a read-only map of the published one"""
+        array = np.arange(12, dtype=np.float32).reshape(3, 4)
+        publish_array(self.temp_dir, "embeddings", array)
+
+        attached = attach_array(self.temp_dir, "embeddings")
+
+        self.assertIsInstance(attached, np.memmap)
+        self.assertFalse(attached.flags.writeable)
+        np.testing.assert_array_equal(attached, array)
+
+    def test_spill_array(self):
+        """Test that a spilled array is a read-only file mapping with the same values"""
+        array = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+        spilled = spill_array(array)
+
+        self.assertIsInstance(spilled, np.memmap)
+        self.assertFalse(spilled.flags.writeable)
+        np.testing.assert_array_equal(spilled, array)
+
+    def test_attach_missing(self):
+        """Test attaching an array that was never published"""
+        self.assertIsNone(attach_array(self.temp_dir, "missing"))
+
+    def test_atomic_write_failure_keeps_old_file(self):
+        """Test that a failed write leaves the previous file and no temp file"""
+        path = os.path.join(self.temp_dir, "meta.json")
+        with atomic_write(path, 'w') as f:
+            f.write("old")
+
+        with self.assertRaises(RuntimeError):
+            with atomic_write(path, 'w') as f:
+                f.write("partial")
+                raise RuntimeError("interrupted")
+
+        with open(path) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.temp_dir), ["meta.json"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
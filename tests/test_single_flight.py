@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for SingleFlight class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+
+    def slow_answer(self, value):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return {"response": value}
+
+    def run_concurrently(self, count, fn):
+        results = [None] * count
+        errors = [None] * count
+
+        def worker(i):
+            try:
+                results[i] = self.flight.do("side effects of chemotherapy", fn, f"caller {i}")
+            except Exception as e:
+                errors[i] = e
+
+        threads = [threading.Thread(target=worker, args=(0,))]
+        threads[0].start()
+        self.started.wait(5)
+        threads += [threading.Thread(target=worker, args=(i,)) for i in range(1, count)]
+        for thread in threads[1:]:
+            thread.start()
+        # Wait until every follower is parked on the leader's future
+        for _ in range(5000):
+            if self.flight.coalesced >= count - 1:
+                break
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def test_concurrent_callers_share_one_execution(self):
+        """Test that identical in-flight keys run the function once"""
+        results, errors = self.run_concurrently(5, self.slow_answer)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(errors, [None] * 5)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.flight.executions, 1)
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_exception_shared_with_waiters(self):
+        """Test that a failure reaches every coalesced caller"""
+        def failing(value):
+            self.slow_answer(value)
+            raise RuntimeError("model crashed")
+
+        _, errors = self.run_concurrently(3, failing)
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(error, RuntimeError) for error in errors))
+
+    def test_sequential_calls_not_cached(self):
+        """Test that a finished call is not reused for later callers"""
+        self.release.set()
+        self.flight.do("key", self.slow_answer, "a")
+        self.flight.do("key", self.slow_answer, "b")
+
+        self.assertEqual(self.calls, 2)
+
+    def test_different_keys_run_independently(self):
+        """Test that distinct keys never wait on each other"""
+        self.release.set()
+        self.assertEqual(self.flight.do("a", lambda: 1), 1)
+        self.assertEqual(self.flight.do("b", lambda: 2), 2)
+        self.assertEqual(self.flight.coalesced, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
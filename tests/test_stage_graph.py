@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stage_graph import StageGraph
+
+
+class TestStageGraph(unittest.TestCase):
+    """Test cases for StageGraph class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.executor.shutdown()
+
+    def test_dependency_results_passed_in_order(self):
+        """Test that a stage receives its dependencies' results"""
+        graph = (StageGraph(inputs=('query',))
+                 .add('upper', str.upper, after=('query',))
+                 .add('length', len, after=('query',))
+                 .add('summary', lambda upper, length: f"{upper}:{length}", after=('upper', 'length')))
+
+        for executor in (None, self.executor):
+            run = graph.run(executor, query="chemo")
+            self.assertEqual(run.result('summary', timeout=5), "CHEMO:5")
+
+    def test_independent_stages_overlap(self):
+        """Test that stages without a mutual dependency run at the same time"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(query):
+            # Only passes if both stages are running concurrently
+            barrier.wait()
+            return query
+
+        graph = (StageGraph(inputs=('query',))
+                 .add('analysis', meet, after=('query',))
+                 .add('embedding', meet, after=('query',)))
+
+        run = graph.run(self.executor, query="q")
+
+        self.assertEqual(run.result('analysis', timeout=5), "q")
+        self.assertEqual(run.result('embedding', timeout=5), "q")
+
+    def test_failure_propagates_to_dependents(self):
+        """Test that a failed stage fails every stage after it"""
+        def broken(query):
+            raise RuntimeError("spaCy crashed")
+
+        calls = []
+        graph = (StageGraph(inputs=('query',))
+                 .add('analysis', broken, after=('query',))
+                 .add('context', calls.append, after=('analysis',)))
+
+        run = graph.run(self.executor, query="q")
+
+        with self.assertRaises(RuntimeError):
+            run.result('context', timeout=5)
+        self.assertEqual(calls, [])
+
+    def test_undefined_dependency_rejected(self):
+        """Test that stages can only depend on inputs or earlier stages"""
+        graph = StageGraph(inputs=('query',))
+
+        with self.assertRaises(ValueError):
+            graph.add('context', len, after=('analysis',))
+        with self.assertRaises(ValueError):
+            graph.run()
+
+    def test_stages_see_caller_context(self):
+        """Test that context variables set by the caller reach stages on the executor"""
+        request_id = contextvars.ContextVar('request_id', default=None)
+        graph = (StageGraph(inputs=('query',))
+                 .add('first', lambda query: request_id.get(), after=('query',))
+                 .add('second', lambda query: request_id.get(), after=('query',)))
+
+        token = request_id.set("r-42")
+        try:
+            run = graph.run(self.executor, query="q")
+        finally:
+            request_id.reset(token)
+        self.assertEqual(run.result('first', timeout=5), "r-42")
+        self.assertEqual(run.result('second', timeout=5), "r-42")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
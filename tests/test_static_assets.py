@@ -0,0 +1,139 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import static_assets
+from static_assets import (
+    BUILT_NAME, MANIFEST_NAME, AssetManifest, accepted_encodings, build_assets, content_hash, fingerprinted_name
+)
+
+CSS = b"body { color: #333; }\n" * 50
+
+
+class TestBuildAssets(unittest.TestCase):
+    """Test fingerprinting and precompression of static files"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.static = os.path.join(self.tmp, 'static')
+        self.output = os.path.join(self.static, 'dist')
+        os.makedirs(os.path.join(self.static, 'css'))
+        with open(os.path.join(self.static, 'css', 'style.css'), 'wb') as f:
+            f.write(CSS)
+        with open(os.path.join(self.static, 'logo.png'), 'wb') as f:
+            f.write(b'\x89PNG' + bytes(200))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_fingerprinted_name(self):
+        """Test the content hash goes before the extension"""
+        self.assertEqual(fingerprinted_name('css/style.css', 'abc123'), 'css/style.abc123.css')
+
+    def test_build_writes_hashed_copies_and_manifest(self):
+        """Test every file is copied under its content hash and listed in the manifest"""
+        manifest = build_assets(self.static, self.output)
+        hashed = f"css/style.{content_hash(CSS)}.css"
+        self.assertEqual(manifest['css/style.css'], hashed)
+        self.assertIn('logo.png', manifest)
+        with open(os.path.join(self.output, hashed), 'rb') as f:
+            self.assertEqual(f.read(), CSS)
+        with open(os.path.join(self.output, MANIFEST_NAME), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), manifest)
+
+    def test_text_files_get_gzip_variant(self):
+        """Test text files are precompressed and binary ones are not"""
+        manifest = build_assets(self.static, self.output)
+        with open(os.path.join(self.output, manifest['css/style.css'] + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS)
+        self.assertFalse(os.path.exists(os.path.join(self.output, manifest['logo.png'] + '.gz')))
+
+    def test_gzip_output_is_reproducible(self):
+        """Test rebuilding the same bytes gives the same compressed file"""
+        manifest = build_assets(self.static, self.output)
+        path = os.path.join(self.output, manifest['css/style.css'] + '.gz')
+        with open(path, 'rb') as f:
+            first = f.read()
+        os.remove(path)
+        build_assets(self.static, self.output)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), first)
+
+    def test_rebuild_keeps_previous_version(self):
+        """Test a changed file gets a new name and the old one stays servable"""
+        old = build_assets(self.static, self.output)['css/style.css']
+        with open(os.path.join(self.static, 'css', 'style.css'), 'ab') as f:
+            f.write(b"a { color: red; }\n")
+        new = build_assets(self.static, self.output)['css/style.css']
+        self.assertNotEqual(old, new)
+        self.assertTrue(os.path.exists(os.path.join(self.output, old)))
+        # ... and is still served to pages that link it
+        self.assertEqual(AssetManifest(self.output).variant(old, 'gzip'), (old + '.gz', 'gzip'))
+        # The output directory itself is not fingerprinted again
+        self.assertFalse(any(name.startswith('dist/') for name in build_assets(self.static, self.output)))
+
+    @unittest.skipIf(static_assets.brotli is None, "brotli is not installed")
+    def test_brotli_variant(self):
+        """Test .br variants are written when brotli is available"""
+        manifest = build_assets(self.static, self.output)
+        with open(os.path.join(self.output, manifest['css/style.css'] + '.br'), 'rb') as f:
+            self.assertEqual(static_assets.brotli.decompress(f.read()), CSS)
+
+
+class TestAssetManifest(unittest.TestCase):
+    """Test lookups and content negotiation over a built manifest"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp, 'dist')
+        os.makedirs(os.path.join(self.tmp, 'css'))
+        with open(os.path.join(self.tmp, 'css', 'style.css'), 'wb') as f:
+            f.write(CSS)
+        build_assets(self.tmp, self.output)
+        self.assets = AssetManifest(self.output)
+        self.hashed = self.assets.url('css/style.css')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_missing_manifest(self):
+        """Test an unbuilt directory resolves nothing"""
+        assets = AssetManifest(os.path.join(self.tmp, 'missing'))
+        self.assertEqual(len(assets), 0)
+        self.assertIsNone(assets.url('css/style.css'))
+
+    def test_unknown_file_is_not_served(self):
+        """Test only fingerprinted names from a build are served"""
+        self.assertIsNone(self.assets.variant('css/style.css', 'gzip'))
+        self.assertIsNone(self.assets.variant(MANIFEST_NAME, 'gzip'))
+        self.assertIsNone(self.assets.variant(BUILT_NAME, 'gzip'))
+
+    def test_variant_negotiation(self):
+        """Test the compressed variant is picked only when accepted"""
+        self.assertEqual(self.assets.variant(self.hashed, 'gzip, deflate'), (self.hashed + '.gz', 'gzip'))
+        self.assertEqual(self.assets.variant(self.hashed, None), (self.hashed, None))
+        self.assertEqual(self.assets.variant(self.hashed, 'gzip;q=0'), (self.hashed, None))
+
+    def test_brotli_preferred_when_present(self):
+        """Test br wins over gzip when both are accepted and built"""
+        with open(os.path.join(self.output, self.hashed + '.br'), 'wb') as f:
+            f.write(b'br')
+        self.assertEqual(self.assets.variant(self.hashed, 'gzip, br'), (self.hashed + '.br', 'br'))
+        self.assertEqual(self.assets.variant(self.hashed, 'gzip'), (self.hashed + '.gz', 'gzip'))
+
+    def test_accepted_encodings(self):
+        """Test q-values and wildcards in Accept-Encoding"""
+        self.assertEqual(accepted_encodings('gzip, br;q=0.5'), {'gzip', 'br'})
+        self.assertEqual(accepted_encodings('br;q=0, *'), {'*', 'gzip'})
+        self.assertEqual(accepted_encodings(''), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import time
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from suggest_index import SuggestionIndex
+
+
+QUESTIONS = [
+    ("What is (are) Breast Cancer ?", "Breast Cancer"),
+    ("What is (are) Breast Cancer ?", "Breast Cancer"),
+    ("Who is at risk for Breast Cancer? ?", "Breast Cancer"),
+    ("What are the treatments for Breast Cancer ?", "Breast Cancer"),
+    ("What is (are) Lung Cancer ?", "Lung Cancer"),
+    ("What are the symptoms of Non-Small Cell Lung Cancer ?", "Non-Small Cell Lung Cancer"),
+]
+
+
+class TestSuggestionIndex(unittest.TestCase):
+    """Test cases for the typeahead prefix index"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.index = SuggestionIndex.build(QUESTIONS, max_results=5, scan_limit=2)
+
+    def texts(self, prefix, limit=8):
+        return [item['text'] for item in self.index.suggest(prefix, limit)]
+
+    def test_distinct_questions_and_topics(self):
+        """Test that duplicate questions are indexed once and focus names become topics"""
+        self.assertEqual(len(self.index), 5 + 3)
+        self.assertIn({'text': 'Lung Cancer', 'type': 'topic'}, self.index.suggest("lung"))
+
+    def test_prefix_is_normalized(self):
+        """Test that case and punctuation of the typed text do not matter"""
+        self.assertEqual(self.texts("WHAT IS (are) lung"), ["What is (are) Lung Cancer ?"])
+        self.assertEqual(self.texts("what is are lung"), ["What is (are) Lung Cancer ?"])
+
+    def test_popular_questions_first(self):
+        """Test that the question asked twice and the larger topic rank first"""
+        self.assertEqual(self.texts("what"), [
+            "What is (are) Breast Cancer ?",
+            "What are the treatments for Breast Cancer ?",
+            "What is (are) Lung Cancer ?",
+            "What are the symptoms of Non-Small Cell Lung Cancer ?",
+        ])
+
+    def test_word_matches_after_start_matches(self):
+        """Test that a word inside a question matches, after texts starting with it"""
+        texts = self.texts("lung")
+        self.assertEqual(texts[0], "Lung Cancer")
+        self.assertIn("What are the symptoms of Non-Small Cell Lung Cancer ?", texts)
+        self.assertEqual(len(texts), len(set(texts)))
+
+    def test_precomputed_and_scanned_prefixes_agree(self):
+        """Test that results for wide prefixes match a full scan"""
+        scanned = SuggestionIndex.build(QUESTIONS, max_results=5, scan_limit=1000)
+        self.assertEqual(scanned.top, {})
+        self.assertTrue(self.index.top)
+        for prefix in ("wh", "what", "what is", "breast", "ca", "cancer", "lu"):
+            self.assertEqual(self.index.suggest(prefix), scanned.suggest(prefix), prefix)
+
+    def test_short_and_unknown_prefixes(self):
+        """Test that too-short or unmatched input gives no suggestions"""
+        self.assertEqual(self.index.suggest("w"), [])
+        self.assertEqual(self.index.suggest("  ?! "), [])
+        self.assertEqual(self.index.suggest("xyz"), [])
+
+    def test_limit_capped_by_max_results(self):
+        """Test that no more than max_results suggestions are returned"""
+        self.assertEqual(len(self.index.suggest("cancer", limit=50)), 5)
+
+    def test_limit_below_one(self):
+        """Test that zero or negative limits return one suggestion, not most of them"""
+        best = self.index.suggest("what", limit=1)
+        self.assertEqual(len(best), 1)
+        self.assertEqual(self.index.suggest("what", limit=0), best)
+        self.assertEqual(self.index.suggest("what", limit=-1), best)
+
+    def test_lookup_is_fast(self):
+        """Test that a lookup stays well under a millisecond"""
+        questions = [(f"What is the outlook for cancer type {i} ?", f"Cancer Type {i % 50}") for i in range(5000)]
+        index = SuggestionIndex.build(questions)
+        start = time.perf_counter()
+        for _ in range(200):
+            index.suggest("what is the")
+            index.suggest("cancer type 12")
+        self.assertLess((time.perf_counter() - start) / 400, 0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
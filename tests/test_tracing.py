@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracing import SlowLog, Trace, activate, annotate, current_trace, span, tag
+
+
+class TestTrace(unittest.TestCase):
+    """Test cases for request traces and spans"""
+
+    def test_spans_without_trace_are_noops(self):
+        """Test that spans, tags and annotations outside a trace record nothing"""
+        self.assertIsNone(current_trace())
+        with span("retrieval", hybrid=True) as attributes:
+            attributes['answer_ids'] = [1]
+            annotate(input_tokens=12)
+            tag(source="biobert")
+        self.assertIsNone(current_trace())
+
+    def test_spans_and_attributes(self):
+        """Test that spans record duration and attributes, innermost span annotated"""
+        trace = Trace('/api/query')
+        with activate(trace):
+            with span("retrieval", hybrid=True) as attributes:
+                attributes['answer_ids'] = [3, 4]
+            with span("biobert_forward"):
+                annotate(input_tokens=87)
+            tag(source="biobert")
+        self.assertIsNone(current_trace())
+        trace.finish(status=200)
+
+        record = trace.to_dict()
+        self.assertEqual([s['name'] for s in record['spans']], ["retrieval", "biobert_forward"])
+        self.assertEqual(record['spans'][0]['attributes'], {'hybrid': True, 'answer_ids': [3, 4]})
+        self.assertEqual(record['spans'][1]['attributes'], {'input_tokens': 87})
+        self.assertEqual(record['attributes'], {'source': 'biobert', 'status': 200})
+        self.assertGreaterEqual(record['duration_ms'], record['spans'][1]['duration_ms'])
+
+    def test_spans_from_other_threads(self):
+        """Test that threads given the trace object add spans to it"""
+        trace = Trace('/api/query')
+
+        def stage():
+            with activate(trace), span("query_encode"):
+                pass
+
+        thread = threading.Thread(target=stage)
+        thread.start()
+        thread.join()
+        self.assertEqual([s['name'] for s in trace.to_dict()['spans']], ["query_encode"])
+
+    def test_trace_id(self):
+        """Test that well-formed incoming ids are kept and others replaced"""
+        self.assertEqual(Trace('/api/query', 'req-123').trace_id, 'req-123')
+        self.assertEqual(len(Trace('/api/query').trace_id), 32)
+        self.assertNotEqual(Trace('/api/query', 'bad id\n').trace_id, 'bad id\n')
+
+
+class TestSlowLog(unittest.TestCase):
+    """Test cases for the rotating slow query log"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "slow.jsonl")
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.directory)
+
+    def finished_trace(self, seconds, query):
+        trace = Trace('/api/query')
+        trace.attributes['query'] = query
+        trace.duration = seconds
+        return trace
+
+    def test_only_slow_traces_written(self):
+        """Test that traces under the threshold are skipped"""
+        slow_log = SlowLog(self.path, threshold=0.5)
+        try:
+            self.assertFalse(slow_log.record(self.finished_trace(0.1, "fast")))
+            self.assertTrue(slow_log.record(self.finished_trace(0.9, "slow")))
+        finally:
+            slow_log.close()
+
+        with open(self.path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['attributes']['query'] for record in records], ["slow"])
+        self.assertAlmostEqual(records[0]['duration_ms'], 900)
+
+    def test_rotation(self):
+        """Test that the log rotates by size and keeps the configured backups"""
+        slow_log = SlowLog(self.path, threshold=0, max_bytes=400, backups=2)
+        try:
+            for i in range(20):
+                slow_log.record(self.finished_trace(1.0, f"query {i}"))
+        finally:
+            slow_log.close()
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["slow.jsonl", "slow.jsonl.1", "slow.jsonl.2"])
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(json.loads(f.readlines()[-1])['attributes']['query'], "query 19")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import QuantizedEmbeddings, normalize_rows
+
+
+class TestQuantizedEmbeddings(unittest.TestCase):
+    """Test cases for QuantizedEmbeddings class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        rng = np.random.RandomState(0)
+        self.full = normalize_rows(rng.randn(500, 64))
+        # Queries are noisy copies of known rows
+        self.targets = rng.choice(500, size=50, replace=False)
+        self.queries = normalize_rows(self.full[self.targets] + 0.05 * rng.randn(50, 64))
+
+    def exact_top(self, query, k):
+        return np.argsort(-(self.full @ query), kind='stable')[:k]
+
+    def test_unknown_precision(self):
+        """Test that an unsupported precision is rejected"""
+        with self.assertRaises(ValueError):
+            QuantizedEmbeddings(self.full, "int4")
+
+    def test_compressed_sizes(self):
+        """Test storage size of each precision"""
+        self.assertEqual(QuantizedEmbeddings(self.full, "float16").nbytes, self.full.nbytes // 2)
+        int8 = QuantizedEmbeddings(self.full, "int8")
+        self.assertEqual(int8.codes.dtype, np.int8)
+        self.assertEqual(int8.nbytes, self.full.nbytes // 4 + 64 * 4)
+
+    def test_int8_approximation_error_is_small(self):
+        """Test that int8 first-pass scores stay close to exact scores"""
+        index = QuantizedEmbeddings(self.full, "int8")
+        approx = index.approximate_scores(self.queries[0])
+        np.testing.assert_allclose(approx, self.full @ self.queries[0], atol=0.02)
+
+    def test_search_matches_exact_ranking(self):
+        """Test recall parity of re-scored search with exact search"""
+        for precision in ("float32", "float16", "int8"):
+            index = QuantizedEmbeddings(self.full, precision, rerank_k=20)
+            for query, target in zip(self.queries, self.targets):
+                rows, scores = index.search(query, 5)
+                self.assertEqual(rows.tolist(), self.exact_top(query, 5).tolist())
+                self.assertEqual(rows[0], target)
+                np.testing.assert_allclose(scores, self.full[rows] @ query, rtol=1e-5)
+
+    def test_search_within_rows(self):
+        """Test that search restricted to rows only returns those rows"""
+        index = QuantizedEmbeddings(self.full, "int8")
+        allowed = np.arange(100, 200)
+        rows, _ = index.search(self.full[5], 3, rows=allowed)
+
+        self.assertTrue(set(rows.tolist()) <= set(allowed.tolist()))
+        self.assertEqual(len(rows), 3)
+
+    def test_k_larger_than_index(self):
+        """Test asking for more results than rows"""
+        index = QuantizedEmbeddings(self.full[:3], "float16")
+        rows, _ = index.search(self.full[0], 10)
+        self.assertEqual(sorted(rows.tolist()), [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
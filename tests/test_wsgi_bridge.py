@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+
+from flask import Flask, Response, jsonify, request
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wsgi_bridge import ThreadedWSGIApp, build_environ
+
+
+async def call(application, path, method='GET', body=b'', query_string=b'', disconnect=None):
+    """Drive one ASGI HTTP request and collect the response messages"""
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+             'headers': [(b'content-type', b'application/json')], 'http_version': '1.1'}
+    requests = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if requests:
+            return requests.pop(0)
+        await (disconnect.wait() if disconnect else asyncio.Event().wait())
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    return sent[0]['status'], b''.join(message.get('body', b'') for message in sent[1:])
+
+
+class TestBuildEnviron(unittest.TestCase):
+    """Test cases for build_environ function"""
+
+    def test_headers_and_query(self):
+        """Test that headers and the query string reach the WSGI environ"""
+        scope = {'method': 'POST', 'path': '/api/query', 'query_string': b'q=1',
+                 'headers': [(b'content-type', b'application/json'), (b'x-trace', b'abc')]}
+
+        environ = build_environ(scope, b'{}')
+
+        self.assertEqual(environ['PATH_INFO'], '/api/query')
+        self.assertEqual(environ['QUERY_STRING'], 'q=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(environ['HTTP_X_TRACE'], 'abc')
+        self.assertEqual(environ['wsgi.input'].read(), b'{}')
+
+
+class TestThreadedWSGIApp(unittest.TestCase):
+    """Test cases for ThreadedWSGIApp class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.release = threading.Event()
+        self.closed = threading.Event()
+        flask_app = Flask(__name__)
+
+        @flask_app.route('/api/query', methods=['POST'])
+        def query():
+            self.release.wait(5)
+            return jsonify({'echo': request.get_json()['query']})
+
+        @flask_app.route('/api/query/stream')
+        def stream():
+            def events():
+                try:
+                    for i in range(1000):
+                        yield f"data: {i}\n\n"
+                        self.release.wait(0.01)
+                finally:
+                    self.closed.set()
+            return Response(events(), mimetype='text/event-stream')
+
+        @flask_app.route('/health')
+        def health():
+            return jsonify({'status': 'ok'})
+
+        self.application = ThreadedWSGIApp(flask_app, heavy_prefixes=('/api/query',), inference_threads=1)
+
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.release.set()
+        self.application.inference_pool.shutdown()
+        self.application.web_pool.shutdown()
+
+    def test_request_round_trip(self):
+        """Test that a JSON request is served through the bridge"""
+        self.release.set()
+        status, body = asyncio.run(call(self.application, '/api/query', 'POST', b'{"query": "chemo"}'))
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'"echo":"chemo"', body.replace(b' ', b''))
+
+    def test_legacy_write_callable(self):
+        """Test that bytes passed to write() are sent before the returned iterable"""
+        def legacy_app(environ, start_response):
+            write = start_response('200 OK', [('Content-Type', 'text/plain')])
+            write(b'head ')
+            return [b'tail']
+
+        application = ThreadedWSGIApp(legacy_app)
+        try:
+            status, body = asyncio.run(call(application, '/legacy'))
+        finally:
+            application.inference_pool.shutdown()
+            application.web_pool.shutdown()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'head tail')
+
+    def test_light_routes_answer_while_inference_is_busy(self):
+        """Test that health checks are not queued behind model requests"""
+        async def scenario():
+            busy = [asyncio.ensure_future(call(self.application, '/api/query', 'POST', b'{"query": "q"}'))
+                    for _ in range(3)]
+            status, _ = await asyncio.wait_for(call(self.application, '/health'), 5)
+            still_busy = not any(task.done() for task in busy)
+            self.release.set()
+            await asyncio.gather(*busy)
+            return status, still_busy
+
+        status, still_busy = asyncio.run(scenario())
+
+        self.assertEqual(status, 200)
+        self.assertTrue(still_busy)
+
+    def test_disconnect_closes_streaming_response(self):
+        """Test that a client disconnect closes the WSGI iterable"""
+        async def scenario():
+            disconnect = asyncio.Event()
+            task = asyncio.ensure_future(call(self.application, '/api/query/stream', disconnect=disconnect))
+            await asyncio.sleep(0.05)
+            disconnect.set()
+            await asyncio.wait_for(task, 5)
+
+        asyncio.run(scenario())
+
+        self.assertTrue(self.closed.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
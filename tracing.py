@@ -0,0 +1,144 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+_trace = contextvars.ContextVar('trace', default=None)
+_span = contextvars.ContextVar('span', default=None)
+
+# Incoming X-Trace-Id values are reused only when they look like an id
+TRACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class Trace:
+    """Timed spans of one request, in the order they started.
+
+    Spans may be recorded from several threads (pipeline stages run on a
+    shared pool); their start times are offsets from the trace start.
+    """
+
+    def __init__(self, name, trace_id=None):
+        self.name = name
+        self.trace_id = trace_id if trace_id and TRACE_ID_PATTERN.match(trace_id) else uuid.uuid4().hex
+        self.started_at = time.time()
+        self.attributes = {}
+        self.spans = []
+        self.duration = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Record the block as a span; yields its attribute dict for the block to fill in"""
+        start = time.perf_counter()
+        attributes = dict(attributes)
+        token = _span.set(attributes)
+        try:
+            yield attributes
+        finally:
+            _span.reset(token)
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append({
+                    'name': name,
+                    'start_ms': (start - self._start) * 1000,
+                    'duration_ms': (end - start) * 1000,
+                    'attributes': attributes,
+                })
+
+    def finish(self, **attributes):
+        """Stop the clock; returns the duration in seconds"""
+        self.attributes.update(attributes)
+        self.duration = time.perf_counter() - self._start
+        return self.duration
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start_ms'])
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': (self.duration if self.duration is not None else time.perf_counter() - self._start) * 1000,
+            'attributes': self.attributes,
+            'spans': spans,
+        }
+
+
+def current_trace():
+    return _trace.get()
+
+
+@contextmanager
+def activate(trace):
+    """Make trace the current one for this block (and stages it starts)"""
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def span(name, **attributes):
+    """A span of the current trace; a plain dict when no trace is active"""
+    trace = _trace.get()
+    if trace is None:
+        yield attributes
+        return
+    with trace.span(name, **attributes) as span_attributes:
+        yield span_attributes
+
+
+def tag(**attributes):
+    """Add attributes to the current trace as a whole, if any"""
+    trace = _trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def annotate(**attributes):
+    """Add attributes to the innermost open span, if any"""
+    attrs = _span.get()
+    if attrs is not None:
+        attrs.update(attributes)
+
+
+class SlowLog:
+    """Append-only JSONL file of traces slower than threshold seconds.
+
+    Rotated by size (path, path.1, ... path.<backups>). Each worker process
+    should write its own file, since rotation is not coordinated across
+    processes.
+    """
+
+    def __init__(self, path, threshold, max_bytes=10 * 1024 * 1024, backups=5):
+        self.path = path
+        self.threshold = threshold
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8',
+                                           delay=True)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.logger = logging.getLogger(f"{__name__}.slow.{path}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.handler)
+
+    def record(self, trace):
+        """Write the trace if it was slow; returns whether it was written"""
+        if trace.duration is None or trace.duration < self.threshold:
+            return False
+        self.logger.info(json.dumps(trace.to_dict(), default=str))
+        return True
+
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
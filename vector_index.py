@@ -0,0 +1,87 @@
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+def normalize_rows(matrix):
+    """L2-normalize rows so a dot product equals cosine similarity"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class QuantizedEmbeddings:
+    """Compressed embedding matrix with exact re-scoring of the best candidates.
+
+    The first pass scans ``codes`` -- float16 values, or int8 values with one
+    scale per dimension -- a block at a time, so only a quarter (int8) or
+    half (float16) of the float32 bytes cross the memory bus. The
+    ``rerank_k`` best approximate hits are then re-scored against the
+    full-precision rows in ``full``. Only those rows are read, so ``full``
+    is meant to be a file mapping and ``codes`` the only resident part;
+    ``nbytes`` counts just the codes and scales.
+    """
+
+    BLOCK_ROWS = 4096
+
+    def __init__(self, full, precision="int8", rerank_k=32, codes=None, scales=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        self.full = full
+        self.precision = precision
+        self.rerank_k = rerank_k
+        if codes is None:
+            codes, scales = self.quantize(full, precision)
+        self.codes = codes
+        self.scales = scales
+
+    @staticmethod
+    def quantize(full, precision):
+        """Return ``(codes, scales)`` for a normalized float32 matrix"""
+        full = np.asarray(full, dtype=np.float32)
+        if precision == "float32":
+            return full, None
+        if precision == "float16":
+            return full.astype(np.float16), None
+        scales = np.abs(full).max(axis=0) / 127.0 if len(full) else np.ones(full.shape[1:], np.float32)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(full / scales), -127, 127).astype(np.int8)
+        return codes, scales
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def approximate_scores(self, query, rows=None):
+        """First-pass scores of every row (or of ``rows``) against a normalized query"""
+        codes = self.codes if rows is None else self.codes[rows]
+        weights = query if self.scales is None else query * self.scales
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), self.BLOCK_ROWS):
+            block = codes[start:start + self.BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ weights
+        return scores
+
+    def search(self, query, k, rows=None):
+        """Return ``(row_indices, exact_scores)`` of the k best rows, best first"""
+        query = np.asarray(query, dtype=np.float32)
+        approx = self.approximate_scores(query, rows)
+        if len(approx) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        candidate_count = min(len(approx), max(k, self.rerank_k))
+        if candidate_count < len(approx):
+            candidates = np.argpartition(-approx, candidate_count - 1)[:candidate_count]
+        else:
+            candidates = np.arange(len(approx))
+        if rows is not None:
+            candidates = np.asarray(rows)[candidates]
+
+        # Gather in row order so a disk-backed ``full`` is read sequentially
+        candidates = np.sort(candidates)
+        exact = np.asarray(self.full[candidates], dtype=np.float32) @ query
+        order = np.argsort(-exact, kind='stable')[:k]
+        return candidates[order], exact[order]
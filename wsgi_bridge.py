@@ -0,0 +1,124 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+_END = object()
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope and its fully read body"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    # The body is already fully read, so its length is known even for chunked uploads
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class ThreadedWSGIApp:
+    """ASGI application serving a WSGI app from two bounded thread pools.
+
+    Requests under one of heavy_prefixes (the model routes) run on the
+    inference pool; everything else runs on a separate web pool, so pages,
+    stats and health checks keep answering while every inference thread is
+    busy. Requests waiting for a thread are parked coroutines on the event
+    loop, not blocked threads. If the client disconnects mid-response the
+    WSGI iterable is closed, which stops a streaming generator early.
+    Bytes passed to the legacy write() callable are sent ahead of the
+    iterable's, as PEP 3333 requires.
+    """
+
+    def __init__(self, wsgi_app, heavy_prefixes=(), inference_threads=2, web_threads=8):
+        self.wsgi_app = wsgi_app
+        self.heavy_prefixes = tuple(heavy_prefixes)
+        self.inference_pool = ThreadPoolExecutor(inference_threads, thread_name_prefix='inference')
+        self.web_pool = ThreadPoolExecutor(web_threads, thread_name_prefix='web')
+
+    def pool_for(self, path):
+        return self.inference_pool if path.startswith(self.heavy_prefixes) else self.web_pool
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.inference_pool.shutdown(wait=False)
+                self.web_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        pool = self.pool_for(scope['path'])
+        response = {}
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return written.append
+
+        iterable = await loop.run_in_executor(pool, self.wsgi_app, build_environ(scope, bytes(body)), start_response)
+        disconnected = asyncio.ensure_future(receive())
+        try:
+            iterator = iter(iterable)
+            await send({'type': 'http.response.start', 'status': response['status'],
+                        'headers': response['headers']})
+            while not disconnected.done():
+                chunk = await loop.run_in_executor(pool, next, iterator, _END)
+                # write() output, from the app call or from inside the iterable, goes out first
+                while written:
+                    data = written.pop(0)
+                    if data:
+                        await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+                if chunk is _END:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            disconnected.cancel()
+            if hasattr(iterable, 'close'):
+                await loop.run_in_executor(pool, iterable.close)